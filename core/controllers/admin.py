@@ -139,6 +139,49 @@ class AdminPage(base.BaseHandler):
         self.render_template('admin/admin.html')
 
 
+def _get_all_handler_names():
+    """Returns the names of the stats of all handler classes."""
+    handler_names = set()
+    handler_classes = [base.BaseHandler]
+    while handler_classes:
+        for subclass in handler_classes.pop().__subclasses__():
+            handler_names.add(base.get_handler_name(subclass))
+            handler_classes.append(subclass)
+    return handler_names
+
+
+def _get_counters_and_handler_stats():
+    """Returns a dict with the values of the performance counters and the
+    stats of each handler, both for this instance and aggregated across all
+    instances.
+    """
+    aggregated_counter_values = counters.get_aggregated_counter_values()
+    local_handler_stats = {
+        handler_stats.name: handler_stats.to_dict()
+        for handler_stats in counters.Registry.get_all_handler_stats()}
+    aggregated_handler_stats = counters.get_aggregated_handler_stats(
+        _get_all_handler_names().union(local_handler_stats))
+
+    return {
+        'counters': sorted([{
+            'name': counter.name,
+            'description': counter.description,
+            'value': counter.value,
+            'aggregated_value': aggregated_counter_values[counter.name],
+        } for counter in counters.Registry.get_all_counters()],
+            key=lambda counter: counter['name']),
+        'handler_stats': sorted([{
+            'name': handler_name,
+            'local': local_handler_stats.get(handler_name),
+            'aggregated': aggregated_handler_stats.get(handler_name),
+        } for handler_name in set(local_handler_stats).union(
+            aggregated_handler_stats)],
+            key=lambda handler_stats: handler_stats['name']),
+        'latency_bucket_upper_bounds_msec': (
+            counters.LATENCY_BUCKET_UPPER_BOUNDS_MSEC),
+    }
+
+
 class AdminHandler(base.BaseHandler):
     """Handler for the admin page."""
 
@@ -148,12 +191,14 @@ class AdminHandler(base.BaseHandler):
     def get(self):
         """Handles GET requests."""
 
-        self.render_json({
+        values = {
             'config_properties': (
                 config_domain.Registry.get_config_property_schemas()),
             'computed_properties': (
                 config_domain.Registry.get_computed_property_names()),
-        })
+        }
+        values.update(_get_counters_and_handler_stats())
+        self.render_json(values)
 
     @require_super_admin
     def post(self):
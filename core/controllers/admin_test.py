@@ -66,6 +66,24 @@ class AdminIntegrationTest(test_utils.GenericTestBase):
         self.assertEqual(response.status_int, 200)
         self.logout()
 
+    def test_counters_handler(self):
+        """Test that the admin handler reports counters and handler stats."""
+        self.login(self.ADMIN_EMAIL, is_super_admin=True)
+        self.testapp.get('/admin')
+
+        response_dict = self.get_json('/adminhandler')
+        self.assertIn('emails-sent', [
+            counter['name'] for counter in response_dict['counters']])
+
+        admin_page_stats = [
+            handler_stats for handler_stats in response_dict['handler_stats']
+            if handler_stats['name'] == 'admin.AdminPage']
+        self.assertEqual(len(admin_page_stats), 1)
+        self.assertGreaterEqual(
+            admin_page_stats[0]['local']['request_count'], 1)
+
+        self.logout()
+
     def test_change_configuration_property(self):
         """Test that configuration properties can be changed."""
 
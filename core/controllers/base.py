@@ -19,6 +19,7 @@ __author__ = 'Sean Lip'
 import base64
 import Cookie
 import datetime
+import hashlib
 import hmac
 import json
 import logging
@@ -45,6 +46,7 @@ import utils
 import jinja2
 import webapp2
 
+from google.appengine.api import apiproxy_stub_map
 from google.appengine.api import users
 
 
@@ -154,6 +156,28 @@ def _clear_login_cookies(response_headers):
         response_headers.add_header(*cookie.output().split(': ', 1))
 
 
+# The kinds of API calls counted for each request, keyed by the name of the
+# corresponding App Engine API service.
+_COUNTED_API_SERVICES = {
+    'datastore_v3': counters.API_CALL_DATASTORE,
+    'memcache': counters.API_CALL_MEMCACHE,
+}
+
+
+def _count_api_call(service, call, request, response):
+    """API proxy hook that records datastore and memcache RPCs in the stats
+    of the current request."""
+    if service in _COUNTED_API_SERVICES:
+        counters.record_api_call(_COUNTED_API_SERVICES[service])
+
+
+def get_handler_name(handler_class):
+    """Returns the name under which the stats of requests served by the given
+    handler class are recorded."""
+    return '%s.%s' % (
+        handler_class.__module__.split('.')[-1], handler_class.__name__)
+
+
 class LogoutPage(webapp2.RequestHandler):
 
     def get(self):
@@ -199,6 +223,12 @@ class BaseHandler(webapp2.RequestHandler):
 
         self.start_time = datetime.datetime.utcnow()
 
+        # Count the datastore and memcache calls made while handling this
+        # request. The hook is only added if it is not present already.
+        apiproxy_stub_map.apiproxy.GetPreCallHooks().Append(
+            'request-stats', _count_api_call)
+        counters.begin_request_scope()
+
         # Initializes the return dict for the handlers.
         self.values = {}
 
@@ -287,7 +317,19 @@ class BaseHandler(webapp2.RequestHandler):
 
                 return self.handle_exception(e, self.app.debug)
 
-        super(BaseHandler, self).dispatch()
+        # Permission checks made while handling this request share a single
+        # read of each exploration's rights.
+        rights_manager.begin_request_scope()
+        try:
+            super(BaseHandler, self).dispatch()
+        finally:
+            rights_manager.end_request_scope()
+
+            duration = datetime.datetime.utcnow() - self.start_time
+            counters.end_request_scope(
+                get_handler_name(self.__class__),
+                duration.seconds * 1E3 + duration.microseconds / 1E3)
+            counters.flush_to_aggregate_if_due()
 
     def get(self, *args, **kwargs):
         """Base method to handle GET requests."""
@@ -305,7 +347,18 @@ class BaseHandler(webapp2.RequestHandler):
         """Base method to handle DELETE requests."""
         raise self.PageNotFoundException
 
-    def render_json(self, values):
+    def render_json(self, values, preserialized_values=None, use_etag=False):
+        """Writes the given values to the response as a JSON dict.
+
+        Args:
+          - values: dict. The values to JSON-encode.
+          - preserialized_values: dict or None. Further entries of the
+              response, whose values have already been JSON-encoded using
+              utils.JSONEncoderForHTML, and which are written as-is.
+          - use_etag: bool. Whether to set an ETag derived from the contents
+              of the response, and to reply with 304 Not Modified if it
+              matches the one sent by the client.
+        """
         self.response.content_type = 'application/javascript; charset=utf-8'
         self.response.headers['Content-Disposition'] = 'attachment'
         self.response.headers['Strict-Transport-Security'] = (
@@ -313,7 +366,25 @@ class BaseHandler(webapp2.RequestHandler):
         self.response.headers['X-Content-Type-Options'] = 'nosniff'
 
         json_output = json.dumps(values, cls=utils.JSONEncoderForHTML)
-        self.response.write('%s%s' % (feconf.XSSI_PREFIX, json_output))
+        if preserialized_values:
+            json_items = [json_output[1:-1]] if values else []
+            for (key, serialized_value) in preserialized_values.iteritems():
+                json_items.append('%s: %s' % (
+                    json.dumps(key, cls=utils.JSONEncoderForHTML),
+                    serialized_value))
+            json_output = '{%s}' % ', '.join(json_items)
+        response_body = '%s%s' % (feconf.XSSI_PREFIX, json_output)
+
+        if use_etag:
+            # Clients must revalidate the response on each request, since it
+            # may depend on the user.
+            self.response.headers['Cache-Control'] = 'private, no-cache'
+            self.response.etag = hashlib.md5(response_body).hexdigest()
+            if self.response.etag in self.request.if_none_match:
+                self.response.status = 304
+                response_body = ''
+
+        self.response.write(response_body)
 
         # Calculate the processing time of this request.
         duration = datetime.datetime.utcnow() - self.start_time
@@ -18,6 +18,7 @@ import logging
 
 from core import jobs
 from core.controllers import base
+from core.domain import stats_services
 from core.platform import models
 email_services = models.Registry.import_email_services()
 (job_models,) = models.Registry.import_models([models.NAMES.job])
@@ -88,6 +89,19 @@ class JobStatusMailerHandler(base.BaseHandler):
             feconf.ADMIN_EMAIL_ADDRESS, email_subject, email_message)
 
 
+class CronAnswerBufferFlushHandler(base.BaseHandler):
+    """Handler for merging buffered answer submissions into the answer
+    logs.
+    """
+
+    @require_cron_or_superadmin
+    def get(self):
+        """Handles GET requests."""
+        num_shards_flushed = stats_services.flush_all_buffered_answers()
+        logging.info(
+            '%s answer submission buffer shards flushed.' % num_shards_flushed)
+
+
 class CronMapreduceCleanupHandler(base.BaseHandler):
 
     def get(self):
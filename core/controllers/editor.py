@@ -123,9 +123,7 @@ def require_editor(handler):
             raise self.UnauthorizedUserException(
                 'You do not have the credentials to access this page.')
 
-        try:
-            exploration = exp_services.get_exploration_by_id(exploration_id)
-        except:
+        if exp_services.get_exploration_metadata_by_id(exploration_id) is None:
             raise self.PageNotFoundException
 
         if not rights_manager.Actor(self.user_id).can_edit(exploration_id):
@@ -136,6 +134,8 @@ def require_editor(handler):
         if not escaped_state_name:
             return handler(self, exploration_id, **kwargs)
 
+        exploration = exp_services.get_exploration_by_id(
+            exploration_id, readonly=True)
         state_name = self.unescape_state_name(escaped_state_name)
         if state_name not in exploration.states:
             logging.error('Could not find state: %s' % state_name)
@@ -273,7 +273,7 @@ class ExplorationHandler(EditorHandler):
             'param_specs': exploration.param_specs_dict,
             'version': exploration.version,
             'rights': rights_manager.get_exploration_rights(
-                exploration_id).to_dict(),
+                exploration_id, readonly=True).to_dict(),
             'show_state_editor_tutorial_on_load': (
                 self.user_id and not
                 self.user_has_started_state_editor_tutorial),
@@ -345,9 +345,8 @@ class ExplorationHandler(EditorHandler):
             '%s %s tried to delete exploration %s' %
             (role, self.user_id, exploration_id))
 
-        exploration = exp_services.get_exploration_by_id(exploration_id)
         can_delete = rights_manager.Actor(self.user_id).can_delete(
-            exploration.id)
+            exploration_id)
         if not can_delete:
             raise self.UnauthorizedUserException(
                 'User %s does not have permissions to delete exploration %s' %
@@ -371,9 +370,10 @@ class ExplorationRightsHandler(EditorHandler):
     @require_editor
     def put(self, exploration_id):
         """Updates the editing rights for the given exploration."""
-        exploration = exp_services.get_exploration_by_id(exploration_id)
+        exp_metadata = exp_services.get_exploration_metadata_by_id(
+            exploration_id)
         version = self.payload.get('version')
-        _require_valid_version(version, exploration.version)
+        _require_valid_version(version, exp_metadata['version'])
 
         is_public = self.payload.get('is_public')
         is_publicized = self.payload.get('is_publicized')
@@ -448,7 +448,7 @@ class ExplorationRightsHandler(EditorHandler):
 
         self.render_json({
             'rights': rights_manager.get_exploration_rights(
-                exploration_id).to_dict()
+                exploration_id, readonly=True).to_dict()
         })
 
 
@@ -480,25 +480,29 @@ class ExplorationDownloadHandler(EditorHandler):
 
     def get(self, exploration_id):
         """Handles GET requests."""
-        try:
-            exploration = exp_services.get_exploration_by_id(exploration_id)
-        except:
+        exp_metadata = exp_services.get_exploration_metadata_by_id(
+            exploration_id)
+        if exp_metadata is None:
             raise self.PageNotFoundException
 
-        version = self.request.get('v', default_value=exploration.version)
+        version = self.request.get(
+            'v', default_value=exp_metadata['version'])
         output_format = self.request.get('output_format', default_value='zip')
         width = int(self.request.get('width', default_value=80))
 
         # If the title of the exploration has changed, we use the new title
         filename = 'oppia-%s-v%s' % (
-            utils.to_ascii(exploration.title.replace(' ', '')), version)
+            utils.to_ascii(exp_metadata['title'].replace(' ', '')), version)
 
         if output_format == feconf.OUTPUT_FORMAT_ZIP:
             self.response.headers['Content-Type'] = 'text/plain'
             self.response.headers['Content-Disposition'] = (
                 'attachment; filename=%s.zip' % str(filename))
-            self.response.write(
-                exp_services.export_to_zip_file(exploration_id, version))
+            # The archive is written to the response as it is built, rather
+            # than being built in memory first.
+            exp_services.write_zip_file(
+                exploration_id, utils.WriteOnlyStream(self.response.write),
+                version=version)
         elif output_format == feconf.OUTPUT_FORMAT_JSON:
                 self.render_json(exp_services.export_states_to_yaml(
                     exploration_id, version=version, width=width))
@@ -512,12 +516,13 @@ class StateDownloadHandler(EditorHandler):
 
     def get(self, exploration_id):
         """Handles GET requests."""
-        try:
-            exploration = exp_services.get_exploration_by_id(exploration_id)
-        except:
+        exp_metadata = exp_services.get_exploration_metadata_by_id(
+            exploration_id)
+        if exp_metadata is None:
             raise self.PageNotFoundException
 
-        version = self.request.get('v', default_value=exploration.version)
+        version = self.request.get(
+            'v', default_value=exp_metadata['version'])
         width = int(self.request.get('width', default_value=80))
 
         try:
@@ -601,9 +606,7 @@ class ExplorationStatisticsHandler(EditorHandler):
 
     def get(self, exploration_id, exploration_version):
         """Handles GET requests."""
-        try:
-            exp_services.get_exploration_by_id(exploration_id)
-        except:
+        if exp_services.get_exploration_metadata_by_id(exploration_id) is None:
             raise self.PageNotFoundException
 
         self.render_json(stats_services.get_exploration_stats(
@@ -615,9 +618,7 @@ class ExplorationStatsVersionsHandler(EditorHandler):
 
     def get(self, exploration_id):
         """Handles GET requests."""
-        try:
-            exp_services.get_exploration_by_id(exploration_id)
-        except:
+        if exp_services.get_exploration_metadata_by_id(exploration_id) is None:
             raise self.PageNotFoundException
 
         self.render_json({
@@ -707,7 +708,7 @@ class ChangeListSummaryHandler(EditorHandler):
         change_list = self.payload.get('change_list')
         version = self.payload.get('version')
         current_exploration = exp_services.get_exploration_by_id(
-            exploration_id)
+            exploration_id, readonly=True)
 
         if version != current_exploration.version:
             # TODO(sll): Improve this.
@@ -727,10 +728,9 @@ class ChangeListSummaryHandler(EditorHandler):
         else:
             utils.recursively_remove_key(change_list, '$$hashKey')
 
-            summary = exp_services.get_summary_of_change_list(
-                current_exploration, change_list)
-            updated_exploration = exp_services.apply_change_list(
-                exploration_id, change_list)
+            (updated_exploration, summary) = (
+                exp_services.apply_change_list_and_get_summary(
+                    exploration_id, change_list))
             warning_message = ''
             try:
                 updated_exploration.validate(strict=True)
@@ -193,7 +193,7 @@ class EditorTest(BaseEditorControllerTest):
         # then submit 'blah' once, 'blah2' twice and 'blah3' three times.
         # TODO(sll): Use the ExplorationPlayer in reader_test for this.
         exploration_dict = self.get_json(
-            '%s/0' % feconf.EXPLORATION_INIT_URL_PREFIX)
+            '%s/0' % feconf.EXPLORATION_PAYLOAD_URL_PREFIX)
         self.assertEqual(
             exploration_dict['exploration']['title'], 'Welcome to Oppia!')
 
@@ -574,7 +574,7 @@ class VersioningIntegrationTest(BaseEditorControllerTest):
 
             # Check that exploration is really not reverted to old version
             reader_dict = self.get_json(
-                '%s/%s' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID))
+                '%s/%s' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID))
             init_state_name = reader_dict['exploration']['init_state_name']
             init_state_data = (
                 reader_dict['exploration']['states'][init_state_name])
@@ -592,7 +592,7 @@ class VersioningIntegrationTest(BaseEditorControllerTest):
 
         # Check that exploration is really reverted to version 1
         reader_dict = self.get_json(
-            '%s/%s' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID))
+            '%s/%s' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID))
 
         init_state_name = reader_dict['exploration']['init_state_name']
         init_state_data = (
@@ -605,7 +605,7 @@ class VersioningIntegrationTest(BaseEditorControllerTest):
         """Test retrieval of old exploration versions."""
         # The latest version contains 'ABC'.
         reader_dict = self.get_json(
-            '%s/%s' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID))
+            '%s/%s' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID))
         init_state_name = reader_dict['exploration']['init_state_name']
         init_state_data = (
             reader_dict['exploration']['states'][init_state_name])
@@ -615,7 +615,7 @@ class VersioningIntegrationTest(BaseEditorControllerTest):
 
         # v1 contains 'Hi, welcome to Oppia!'.
         reader_dict = self.get_json(
-            '%s/%s?v=1' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID))
+            '%s/%s?v=1' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID))
         init_state_name = reader_dict['exploration']['init_state_name']
         init_state_data = (
             reader_dict['exploration']['states'][init_state_name])
@@ -625,7 +625,7 @@ class VersioningIntegrationTest(BaseEditorControllerTest):
 
         # v2 contains 'ABC'.
         reader_dict = self.get_json(
-            '%s/%s?v=2' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID))
+            '%s/%s?v=2' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID))
         init_state_name = reader_dict['exploration']['init_state_name']
         init_state_data = (
             reader_dict['exploration']['states'][init_state_name])
@@ -635,7 +635,7 @@ class VersioningIntegrationTest(BaseEditorControllerTest):
 
         # v3 does not exist.
         response = self.testapp.get(
-            '%s/%s?v=3' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID),
+            '%s/%s?v=3' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID),
             expect_errors=True)
         self.assertEqual(response.status_int, 404)
 
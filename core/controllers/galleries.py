@@ -242,7 +242,9 @@ class GalleryRedirectPage(base.BaseHandler):
 
 
 class ExplorationSummariesHandler(base.BaseHandler):
-    """Returns summaries corresponding to ids of public explorations."""
+    """Returns summaries corresponding to ids of explorations that the current
+    user can play.
+    """
 
     def get(self):
         """Handles GET requests."""
@@ -257,6 +259,14 @@ class ExplorationSummariesHandler(base.BaseHandler):
 
         exp_summaries = exp_services.get_exploration_summaries_matching_ids(
             exp_ids)
+        # Summaries of private explorations are only returned to users who can
+        # play them. The rights of all the explorations are fetched together.
+        exp_summaries = [
+            exp_summary if can_play else None
+            for (exp_summary, can_play) in zip(
+                exp_summaries,
+                rights_manager.Actor(self.user_id).check_permission_multi(
+                    'can_play', exp_ids))]
 
         self.values.update({
             'summaries': [(None if exp_summary is None else {
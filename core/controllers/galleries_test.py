@@ -16,6 +16,8 @@
 
 __author__ = 'Sean Lip'
 
+import json
+
 from core.controllers import galleries
 from core.domain import config_services
 from core.domain import exp_jobs
@@ -23,6 +25,7 @@ from core.domain import exp_services
 from core.domain import rights_manager
 from core.tests import test_utils
 import feconf
+import utils
 
 
 CAN_EDIT_STR = 'can_edit'
@@ -189,6 +192,39 @@ class GalleryPageTest(test_utils.GenericTestBase):
             'status': rights_manager.EXPLORATION_STATUS_PUBLICIZED,
         }, response_dict['explorations_list'][0])
 
+    def test_exploration_summaries_handler_hides_private_explorations(self):
+        """Test that summaries of private explorations are only returned to
+        users who can play them.
+        """
+        self.save_new_valid_exploration('A', self.EDITOR_ID, title='Title A')
+        self.save_new_valid_exploration('B', self.EDITOR_ID, title='Title B')
+        rights_manager.publish_exploration(self.EDITOR_ID, 'B')
+
+        summaries_url = utils.set_url_query_parameter(
+            '/explorationsummarieshandler/data', 'stringified_exp_ids',
+            json.dumps(['A', 'B']))
+
+        # Logged-out users cannot see the private exploration.
+        summaries = self.get_json(summaries_url)['summaries']
+        self.assertEqual(summaries[0], None)
+        self.assertEqual(summaries[1]['title'], 'Title B')
+
+        # Neither can other logged-in users.
+        self.signup(self.VIEWER_EMAIL, self.VIEWER_USERNAME)
+        self.login(self.VIEWER_EMAIL)
+        summaries = self.get_json(summaries_url)['summaries']
+        self.assertEqual(summaries[0], None)
+        self.assertEqual(summaries[1]['title'], 'Title B')
+        self.logout()
+
+        # The owner of the private exploration can see its summary.
+        self.login(self.EDITOR_EMAIL)
+        summaries = self.get_json(summaries_url)['summaries']
+        self.assertEqual(
+            [summary['title'] for summary in summaries],
+            ['Title A', 'Title B'])
+        self.logout()
+
     def test_new_exploration_ids(self):
         """Test generation of exploration ids."""
         self.login(self.EDITOR_EMAIL)
@@ -19,8 +19,8 @@ __author__ = 'Sean Lip'
 import copy
 
 from core.controllers import base
+from core.domain import classifier_services
 from core.domain import config_domain
-from core.domain import dependency_registry
 from core.domain import event_services
 from core.domain import exp_domain
 from core.domain import exp_services
@@ -28,10 +28,8 @@ from core.domain import feedback_services
 from core.domain import fs_domain
 from core.domain import interaction_registry
 from core.domain import param_domain
+from core.domain import player_assets_registry
 from core.domain import rights_manager
-from core.domain import rte_component_registry
-from core.domain import rule_domain
-from core.domain import skins_services
 import feconf
 import jinja_utils
 import utils
@@ -77,23 +75,10 @@ def classify(
     normalized_answer = interaction_instance.normalize_answer(
         answer, handler_name)
 
-    handler = next(
-        h for h in state.interaction.handlers if h.name == handler_name)
     fs = fs_domain.AbstractFileSystem(fs_domain.ExplorationFileSystem(exp_id))
-    input_type = interaction_instance.get_handler_by_name(
-        handler_name).obj_type
-    for rule_spec in handler.rule_specs:
-        if rule_domain.evaluate_rule(
-                rule_spec.definition, exp_param_specs, input_type, params,
-                normalized_answer, fs):
-            return rule_spec
-
-    raise Exception(
-        'No matching rule found for handler %s. Rule specs are %s.' % (
-            handler.name,
-            [rule_spec.to_dict() for rule_spec in handler.rule_specs]
-        )
-    )
+    return classifier_services.get_classifier(
+        exp_param_specs, state, handler_name).classify(
+            params, normalized_answer, fs)
 
 
 class ExplorationPage(base.BaseHandler):
@@ -111,7 +96,7 @@ class ExplorationPage(base.BaseHandler):
 
         try:
             exploration = exp_services.get_exploration_by_id(
-                exploration_id, version=version)
+                exploration_id, version=version, readonly=True)
         except Exception as e:
             raise self.PageNotFoundException(e)
 
@@ -122,46 +107,36 @@ class ExplorationPage(base.BaseHandler):
 
         is_iframed = (self.request.get('iframed') == 'true')
 
-        # TODO(sll): Cache these computations.
-        interaction_ids = exploration.get_interaction_ids()
-        dependency_ids = (
-            interaction_registry.Registry.get_deduplicated_dependency_ids(
-                interaction_ids))
-        dependencies_html, additional_angular_modules = (
-            dependency_registry.Registry.get_deps_html_and_angular_modules(
-                dependency_ids))
-
-        interaction_templates = (
-            rte_component_registry.Registry.get_html_for_all_components() +
-            interaction_registry.Registry.get_interaction_html(
-                interaction_ids))
+        # The extension assets are precompiled when the instance is warmed
+        # up, and bundled once per set of interactions.
+        assets_bundle = player_assets_registry.Registry.get_bundle(
+            exploration.get_interaction_ids())
+        skin_assets = player_assets_registry.Registry.get_skin_assets(
+            exploration.default_skin)
 
         self.values.update({
-            'INTERACTION_SPECS': interaction_registry.Registry.get_all_specs(),
-            'additional_angular_modules': additional_angular_modules,
+            'INTERACTION_SPECS': (
+                player_assets_registry.Registry.get_interaction_specs()),
+            'additional_angular_modules': (
+                assets_bundle['additional_angular_modules']),
             'can_edit': (
                 bool(self.username) and
                 self.username not in config_domain.BANNED_USERNAMES.value and
                 rights_manager.Actor(self.user_id).can_edit(exploration_id)
             ),
             'dependencies_html': jinja2.utils.Markup(
-                dependencies_html),
+                assets_bundle['dependencies_html']),
             'exploration_title': exploration.title,
             'exploration_version': version,
             'iframed': is_iframed,
             'interaction_templates': jinja2.utils.Markup(
-                interaction_templates),
+                assets_bundle['interaction_templates']),
             'is_private': rights_manager.is_exploration_private(
                 exploration_id),
             'nav_mode': feconf.NAV_MODE_EXPLORE,
-            'skin_templates': jinja2.utils.Markup(
-                skins_services.Registry.get_skin_templates(
-                    [exploration.default_skin])),
-            'skin_js_url': skins_services.Registry.get_skin_js_url(
-                exploration.default_skin),
-            'skin_tag': jinja2.utils.Markup(
-                skins_services.Registry.get_skin_tag(exploration.default_skin)
-            ),
+            'skin_templates': jinja2.utils.Markup(skin_assets['templates']),
+            'skin_js_url': skin_assets['js_url'],
+            'skin_tag': jinja2.utils.Markup(skin_assets['tag']),
             'title': exploration.title,
         })
 
@@ -173,7 +148,9 @@ class ExplorationPage(base.BaseHandler):
 
 
 class ExplorationHandler(base.BaseHandler):
-    """Provides the initial data for a single exploration."""
+    """Provides the initial data for a single exploration, apart from the
+    learner view data, which is provided by ExplorationPayloadHandler.
+    """
 
     def get(self, exploration_id):
         """Populates the data on the individual exploration page."""
@@ -182,7 +159,7 @@ class ExplorationHandler(base.BaseHandler):
 
         try:
             exploration = exp_services.get_exploration_by_id(
-                exploration_id, version=version)
+                exploration_id, version=version, readonly=True)
         except Exception as e:
             raise self.PageNotFoundException(e)
 
@@ -195,7 +172,6 @@ class ExplorationHandler(base.BaseHandler):
             'can_edit': (
                 self.user_id and
                 rights_manager.Actor(self.user_id).can_edit(exploration_id)),
-            'exploration': exploration.to_player_dict(),
             'intro_card_image_url': (
                 '/images/gallery/exploration_background_%s_large.png' %
                 intro_card_color),
@@ -206,6 +182,28 @@ class ExplorationHandler(base.BaseHandler):
         self.render_json(self.values)
 
 
+class ExplorationPayloadHandler(base.BaseHandler):
+    """Provides the learner view data for a version of an exploration.
+
+    This data is the same for all users, so it is computed once per version
+    and served pre-serialized, and clients revalidate it using its ETag.
+    """
+
+    def get(self, exploration_id):
+        version = self.request.get('v')
+        version = int(version) if version else None
+
+        try:
+            exploration = exp_services.get_exploration_by_id(
+                exploration_id, version=version, readonly=True)
+        except Exception as e:
+            raise self.PageNotFoundException(e)
+
+        self.render_json({}, preserialized_values={
+            'exploration': exp_services.get_player_payload_json(exploration),
+        }, use_etag=True)
+
+
 class AnswerSubmittedEventHandler(base.BaseHandler):
     """Tracks a learner submitting an answer."""
 
@@ -229,7 +227,7 @@ class AnswerSubmittedEventHandler(base.BaseHandler):
             rule_spec_dict, rule_spec_dict['obj_type'])
 
         exploration = exp_services.get_exploration_by_id(
-            exploration_id, version=version)
+            exploration_id, version=version, readonly=True)
         exp_param_specs = exploration.param_specs
         old_interaction = exploration.states[old_state_name].interaction
 
@@ -368,7 +366,7 @@ def submit_answer_in_tests(
     params['answer'] = answer
 
     exploration = exp_services.get_exploration_by_id(
-        exploration_id, version=version)
+        exploration_id, version=version, readonly=True)
     exp_param_specs = exploration.param_specs
     old_state = exploration.states[state_name]
 
@@ -96,6 +96,71 @@ class ReaderPermissionsTest(test_utils.GenericTestBase):
         self.assertEqual(response.status_int, 200)
 
 
+class ExplorationHandlerTests(test_utils.GenericTestBase):
+    """Test the handlers that provide the initial data for the learner
+    view.
+    """
+
+    EXP_ID = 'eid'
+
+    def setUp(self):
+        super(ExplorationHandlerTests, self).setUp()
+        self.save_new_valid_exploration(self.EXP_ID, 'owner_id')
+        self.init_url = '%s/%s' % (
+            feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID)
+        self.url = '%s/%s' % (
+            feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID)
+
+    def test_each_session_gets_a_new_session_id(self):
+        first_response_dict = self.get_json(self.init_url)
+        second_response_dict = self.get_json(self.init_url)
+
+        self.assertEqual(len(first_response_dict['session_id']), 24)
+        self.assertNotEqual(
+            first_response_dict['session_id'],
+            second_response_dict['session_id'])
+        self.assertEqual(first_response_dict['version'], 1)
+        self.assertFalse(first_response_dict['is_logged_in'])
+        self.assertNotIn('exploration', first_response_dict)
+
+    def test_player_payload_is_computed_once_per_version(self):
+        original_to_player_dict = exp_domain.Exploration.to_player_dict
+        player_dicts = []
+
+        def _to_player_dict(exploration):
+            player_dicts.append(original_to_player_dict(exploration))
+            return player_dicts[-1]
+
+        with self.swap(
+                exp_domain.Exploration, 'to_player_dict', _to_player_dict):
+            first_response_dict = self.get_json(self.url)
+            second_response_dict = self.get_json(self.url)
+
+        self.assertEqual(len(player_dicts), 1)
+        self.assertEqual(first_response_dict, second_response_dict)
+        self.assertEqual(
+            first_response_dict, {'exploration': player_dicts[0]})
+
+    def test_response_is_revalidated_using_its_etag(self):
+        response = self.testapp.get(self.url)
+        etag = response.headers['ETag']
+        self.assertEqual(
+            response.headers['Cache-Control'], 'private, no-cache')
+
+        response = self.testapp.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_int, 304)
+        self.assertEqual(response.body, '')
+
+        exp_services.update_exploration('owner_id', self.EXP_ID, [{
+            'cmd': 'edit_exploration_property',
+            'property_name': 'title',
+            'new_value': 'New title',
+        }], '')
+        response = self.testapp.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_int, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
 class ReaderControllerEndToEndTests(test_utils.GenericTestBase):
     """Test the reader controller using the sample explorations."""
 
@@ -127,7 +192,7 @@ class ReaderControllerEndToEndTests(test_utils.GenericTestBase):
         self.EXP_ID = exploration_id
 
         reader_dict = self.get_json(
-            '%s/%s' % (feconf.EXPLORATION_INIT_URL_PREFIX, self.EXP_ID))
+            '%s/%s' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, self.EXP_ID))
 
         self.last_state_name = reader_dict['exploration']['init_state_name']
         init_state_data = (
@@ -209,7 +274,7 @@ class FeedbackIntegrationTest(test_utils.GenericTestBase):
         # Viewer opens exploration
         self.login(self.VIEWER_EMAIL)
         exploration_dict = self.get_json(
-            '%s/%s' % (feconf.EXPLORATION_INIT_URL_PREFIX, EXP_ID))
+            '%s/%s' % (feconf.EXPLORATION_PAYLOAD_URL_PREFIX, EXP_ID))
         state_name_1 = exploration_dict['exploration']['init_state_name']
 
         # Viewer gives 1st feedback
@@ -57,7 +57,14 @@ class ValueGeneratorHandler(base.BaseHandler):
 
 
 class ImageHandler(base.BaseHandler):
-    """Handles image retrievals."""
+    """Handles image retrievals.
+
+    Images are served with an ETag identifying their contents, so that
+    clients can revalidate them cheaply. A specific version of an image can be
+    requested using the 'v' query parameter. Version numbers restart when a
+    deleted file is uploaded again, so responses are only cached for a short
+    time even when a version is requested.
+    """
 
     def get(self, exploration_id, encoded_filepath):
         """Returns an image.
@@ -70,18 +77,41 @@ class ImageHandler(base.BaseHandler):
         try:
             filepath = urllib.unquote(encoded_filepath)
             file_format = filepath[(filepath.rfind('.') + 1):]
-            # If the following is not cast to str, an error occurs in the wsgi
-            # library because unicode gets used.
-            self.response.headers['Content-Type'] = str(
-                'image/%s' % file_format)
+            version = self.request.get('v')
+            version = int(version) if version else None
 
             fs = fs_domain.AbstractFileSystem(
                 fs_domain.ExplorationFileSystem(exploration_id))
-            raw = fs.get(filepath)
-            self.response.write(raw)
+            # The contents are only read if the client does not already have
+            # them.
+            content_hash = fs.get_content_hash(filepath, version=version)
+            if content_hash is None:
+                raise Exception('File %s not found.' % filepath)
+            if content_hash in self.request.if_none_match:
+                self._set_caching_headers(content_hash)
+                self.response.status = 304
+                return
+
+            file_stream = fs.open(filepath, version=version)
+            if file_stream is None:
+                raise Exception('File %s not found.' % filepath)
         except:
             raise self.PageNotFoundException
 
+        self._set_caching_headers(file_stream.content_hash)
+        # If the following is not cast to str, an error occurs in the wsgi
+        # library because unicode gets used.
+        self.response.headers['Content-Type'] = str('image/%s' % file_format)
+        self.response.write(file_stream.read())
+
+    def _set_caching_headers(self, content_hash):
+        """Sets the ETag and Cache-Control headers for an image with the given
+        content hash.
+        """
+        self.response.headers['Cache-Control'] = str(
+            'public, max-age=%s' % feconf.ASSET_CACHE_MAX_AGE_SECS)
+        self.response.etag = str(content_hash)
+
 
 class StaticFileHandler(base.BaseHandler):
     """Handles static file serving on non-GAE platforms."""
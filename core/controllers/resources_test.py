@@ -61,6 +61,54 @@ class ImageHandlerTest(test_utils.GenericTestBase):
         self.assertEqual(response.content_type, 'image/png')
         self.assertEqual(response.body, raw_image)
 
+    def test_image_download_caching_headers(self):
+        """Test the caching headers sent with downloaded images."""
+
+        self.login(self.EDITOR_EMAIL)
+        response = self.testapp.get('/create/0')
+        csrf_token = self.get_csrf_token_from_response(response)
+
+        with open(os.path.join(feconf.TESTS_DATA_DIR, 'img.png'),
+                  mode='rb') as f:
+            raw_image = f.read()
+        response_dict = self.post_json(
+            '%s/0' % self.IMAGE_UPLOAD_URL_PREFIX,
+            {'filename': 'test.png'},
+            csrf_token=csrf_token,
+            upload_files=(('image', 'unused_filename', raw_image),)
+        )
+        image_url = str('%s/0/%s' % (
+            self.IMAGE_VIEW_URL_PREFIX, response_dict['filepath']))
+
+        self.logout()
+
+        response = self.testapp.get(image_url)
+        etag = response.headers['ETag']
+        self.assertEqual(
+            response.headers['Cache-Control'],
+            'public, max-age=%s' % feconf.ASSET_CACHE_MAX_AGE_SECS)
+
+        response = self.testapp.get(
+            image_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_int, 304)
+        self.assertEqual(response.body, '')
+
+        response = self.testapp.get(
+            image_url, headers={'If-None-Match': '"another_etag"'})
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual(response.body, raw_image)
+
+        # Version numbers can be reused, so requesting a version does not
+        # make the response immutable.
+        response = self.testapp.get('%s?v=1' % image_url)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(
+            response.headers['Cache-Control'],
+            'public, max-age=%s' % feconf.ASSET_CACHE_MAX_AGE_SECS)
+        self.assertEqual(response.body, raw_image)
+
+        self.testapp.get('%s?v=2' % image_url, status=404)
+
     def test_upload_empty_image(self):
         """Test upload of an empty image."""
 
@@ -18,10 +18,34 @@
 
 __author__ = 'Sean Lip'
 
+import threading
+import time
+
+import feconf
+
+# The upper bounds, in milliseconds, of the buckets of the request latency
+# histograms. The final bucket holds all latencies above the last bound.
+LATENCY_BUCKET_UPPER_BOUNDS_MSEC = [
+    10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# Kinds of API calls that are counted for each request.
+API_CALL_DATASTORE = 'datastore'
+API_CALL_MEMCACHE = 'memcache'
+
+# Prefixes of the memcache keys holding the values aggregated across
+# instances.
+_AGGREGATE_COUNTER_KEY_PREFIX = 'perf-counter:'
+_AGGREGATE_HANDLER_STATS_KEY_PREFIX = 'perf-handler-stats:'
+
+# The API call counts of the request that is being handled by this thread.
+_request_scope = threading.local()
+
 
 class PerfCounter(object):
-    """Generic in-process numeric counter; not aggregated across instances."""
-    # TODO(sll): Add aggregation across instances.
+    """Generic in-process numeric counter. The increments made on all
+    instances are periodically added to an aggregate in memcache; see
+    flush_to_aggregate().
+    """
 
     def __init__(self, name, description):
         if name in Registry._counters:
@@ -30,6 +54,8 @@ class PerfCounter(object):
         self._name = name
         self._description = description
         self._value = 0
+        # The part of the value that has been added to the aggregate.
+        self._flushed_value = 0
 
         Registry._counters[self.name] = self
 
@@ -49,15 +75,282 @@ class PerfCounter(object):
     def value(self):
         return self._value
 
+    def _get_unflushed_increments(self):
+        """Returns a dict with the increment of this counter's aggregate that
+        has not been flushed yet, and marks it as flushed.
+
+        Only whole units are flushed; the remainder of fractional values
+        (such as times) is carried over to the next flush.
+        """
+        increment = int(self._value - self._flushed_value)
+        self._flushed_value += increment
+        return {_AGGREGATE_COUNTER_KEY_PREFIX + self.name: increment}
+
+
+class HandlerStats(object):
+    """In-process statistics for the requests served by a handler class: a
+    histogram of their latencies, and the number of datastore and memcache
+    calls they made.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._stats = self._get_empty_stats()
+        # The part of the stats that has been added to the aggregate.
+        self._flushed_stats = self._get_empty_stats()
+
+    @staticmethod
+    def _get_empty_stats():
+        return {
+            'request_count': 0,
+            'datastore_call_count': 0,
+            'memcache_call_count': 0,
+            'latency_bucket_counts': (
+                [0] * (len(LATENCY_BUCKET_UPPER_BOUNDS_MSEC) + 1)),
+        }
+
+    @property
+    def name(self):
+        return self._name
+
+    def record_request(
+            self, latency_msec, datastore_call_count, memcache_call_count):
+        """Records a request served by this handler class."""
+        bucket_index = len(LATENCY_BUCKET_UPPER_BOUNDS_MSEC)
+        for (ind, upper_bound) in enumerate(LATENCY_BUCKET_UPPER_BOUNDS_MSEC):
+            if latency_msec <= upper_bound:
+                bucket_index = ind
+                break
+
+        self._stats['request_count'] += 1
+        self._stats['datastore_call_count'] += datastore_call_count
+        self._stats['memcache_call_count'] += memcache_call_count
+        self._stats['latency_bucket_counts'][bucket_index] += 1
+
+    def to_dict(self):
+        """Returns a summary of the requests recorded on this instance; see
+        get_stats_summary().
+        """
+        return get_stats_summary(self._stats)
+
+    @classmethod
+    def _get_aggregate_keys(cls, name):
+        """Returns a dict mapping the memcache keys of the aggregated stats
+        for the given handler to (stat name, bucket index) pairs, where the
+        bucket index is None for stats other than latency bucket counts.
+        """
+        prefix = '%s%s:' % (_AGGREGATE_HANDLER_STATS_KEY_PREFIX, name)
+        aggregate_keys = {
+            prefix + stat_name: (stat_name, None) for stat_name in [
+                'request_count', 'datastore_call_count',
+                'memcache_call_count']}
+        for ind in range(len(LATENCY_BUCKET_UPPER_BOUNDS_MSEC) + 1):
+            aggregate_keys['%slatency_bucket:%s' % (prefix, ind)] = (
+                'latency_bucket_counts', ind)
+        return aggregate_keys
+
+    def _get_unflushed_increments(self):
+        """Returns a dict with the increments of the aggregated stats for
+        this handler that have not been flushed yet, and marks them as
+        flushed.
+        """
+        increments = {}
+        for (key, (stat_name, ind)) in self._get_aggregate_keys(
+                self.name).iteritems():
+            if ind is None:
+                increments[key] = (
+                    self._stats[stat_name] - self._flushed_stats[stat_name])
+                self._flushed_stats[stat_name] = self._stats[stat_name]
+            else:
+                increments[key] = (
+                    self._stats[stat_name][ind] -
+                    self._flushed_stats[stat_name][ind])
+                self._flushed_stats[stat_name][ind] = (
+                    self._stats[stat_name][ind])
+        return increments
+
 
 class Registry(object):
     """Registry of all counters."""
     _counters = {}
+    _handler_stats = {}
+    _flush_lock = threading.Lock()
+    _last_flush_time_secs = 0
 
     @classmethod
     def get_all_counters(cls):
         return cls._counters.values()
 
+    @classmethod
+    def get_handler_stats(cls, handler_name):
+        """Returns the HandlerStats for the given handler name, creating it
+        if necessary.
+        """
+        if handler_name not in cls._handler_stats:
+            cls._handler_stats[handler_name] = HandlerStats(handler_name)
+        return cls._handler_stats[handler_name]
+
+    @classmethod
+    def get_all_handler_stats(cls):
+        return cls._handler_stats.values()
+
+
+def get_latency_percentile_msec(latency_bucket_counts, percentile):
+    """Returns an upper bound, in milliseconds, for the given percentile of
+    the latencies in a histogram, or None if the histogram is empty or the
+    percentile lies in its final, unbounded bucket.
+    """
+    total_count = sum(latency_bucket_counts)
+    if not total_count:
+        return None
+
+    cumulative_count = 0
+    for (ind, count) in enumerate(latency_bucket_counts):
+        cumulative_count += count
+        if cumulative_count * 100 >= total_count * percentile:
+            if ind < len(LATENCY_BUCKET_UPPER_BOUNDS_MSEC):
+                return LATENCY_BUCKET_UPPER_BOUNDS_MSEC[ind]
+            return None
+
+
+def get_stats_summary(stats):
+    """Returns a dict summarizing the given request stats of a handler, with
+    the latency percentiles and the average number of API calls per request.
+    """
+    request_count = stats['request_count']
+    return {
+        'request_count': request_count,
+        'latency_bucket_counts': list(stats['latency_bucket_counts']),
+        'p50_latency_msec': get_latency_percentile_msec(
+            stats['latency_bucket_counts'], 50),
+        'p95_latency_msec': get_latency_percentile_msec(
+            stats['latency_bucket_counts'], 95),
+        'p99_latency_msec': get_latency_percentile_msec(
+            stats['latency_bucket_counts'], 99),
+        'average_datastore_calls': (
+            float(stats['datastore_call_count']) / request_count
+            if request_count else None),
+        'average_memcache_calls': (
+            float(stats['memcache_call_count']) / request_count
+            if request_count else None),
+    }
+
+
+def begin_request_scope():
+    """Starts counting the API calls made by the current request."""
+    _request_scope.api_call_counts = {
+        API_CALL_DATASTORE: 0,
+        API_CALL_MEMCACHE: 0,
+    }
+
+
+def record_api_call(api_call_kind):
+    """Records an API call of the given kind (one of the API_CALL_* constants)
+    made by the current request. This is a no-op outside a request scope.
+    """
+    api_call_counts = getattr(_request_scope, 'api_call_counts', None)
+    if api_call_counts is not None:
+        api_call_counts[api_call_kind] += 1
+
+
+def end_request_scope(handler_name, latency_msec):
+    """Stops counting the API calls made by the current request, and records
+    them, together with its latency, in the stats for the given handler.
+    """
+    api_call_counts = getattr(_request_scope, 'api_call_counts', None)
+    _request_scope.api_call_counts = None
+    if api_call_counts is None:
+        return
+
+    Registry.get_handler_stats(handler_name).record_request(
+        latency_msec, api_call_counts[API_CALL_DATASTORE],
+        api_call_counts[API_CALL_MEMCACHE])
+
+
+def _get_memcache_services():
+    # This is imported lazily, since the memcache services themselves
+    # update counters.
+    from core.platform import models
+    return models.Registry.import_memcache_services()
+
+
+def flush_to_aggregate():
+    """Adds the counter and handler stats increments made on this instance
+    since the last flush to the aggregate in memcache.
+
+    The aggregate is best-effort: increments are lost if memcache is
+    unavailable, and the aggregate restarts from zero if it is evicted.
+    """
+    increments = {}
+    for counter in Registry.get_all_counters():
+        increments.update(counter._get_unflushed_increments())
+    for handler_stats in Registry.get_all_handler_stats():
+        increments.update(handler_stats._get_unflushed_increments())
+
+    increments = {
+        key: increment for (key, increment) in increments.iteritems()
+        if increment}
+    if increments:
+        _get_memcache_services().incr_multi(increments)
+
+
+def flush_to_aggregate_if_due():
+    """Flushes the increments made on this instance to the aggregate, if the
+    last flush was long enough ago and no other thread is flushing them.
+    """
+    if (time.time() - Registry._last_flush_time_secs <
+            feconf.PERF_COUNTER_FLUSH_INTERVAL_SECS):
+        return
+    if not Registry._flush_lock.acquire(False):
+        return
+    try:
+        Registry._last_flush_time_secs = time.time()
+        flush_to_aggregate()
+    finally:
+        Registry._flush_lock.release()
+
+
+def get_aggregated_counter_values():
+    """Returns a dict mapping the name of each counter to its value
+    aggregated across all instances, as of their last flushes.
+    """
+    keys = {
+        _AGGREGATE_COUNTER_KEY_PREFIX + counter.name: counter.name
+        for counter in Registry.get_all_counters()}
+    aggregated_values = _get_memcache_services().get_multi(keys.keys())
+    return {
+        name: aggregated_values.get(key, 0)
+        for (key, name) in keys.iteritems()}
+
+
+def get_aggregated_handler_stats(handler_names):
+    """Returns a dict mapping each of the given handler names that has served
+    any requests to a summary of its stats aggregated across all instances,
+    as of their last flushes; see get_stats_summary().
+    """
+    aggregate_keys = {}
+    for handler_name in handler_names:
+        for (key, stat) in HandlerStats._get_aggregate_keys(
+                handler_name).iteritems():
+            aggregate_keys[key] = (handler_name, stat)
+    aggregated_values = _get_memcache_services().get_multi(
+        aggregate_keys.keys())
+
+    handler_stats = {}
+    for (key, value) in aggregated_values.iteritems():
+        (handler_name, (stat_name, ind)) = aggregate_keys[key]
+        stats = handler_stats.setdefault(
+            handler_name, HandlerStats._get_empty_stats())
+        if ind is None:
+            stats[stat_name] = value
+        else:
+            stats[stat_name][ind] = value
+
+    return {
+        handler_name: get_stats_summary(stats)
+        for (handler_name, stats) in handler_stats.iteritems()
+        if stats['request_count']}
+
 
 MEMCACHE_HIT = PerfCounter(
     'memcache-hit',
@@ -81,6 +374,24 @@ MEMCACHE_DELETE_FAILURE = PerfCounter(
     'memcache-delete-failure',
     'Number of times an object failed to be deleted from memcache')
 
+EXPLORATION_CACHE_HIT = PerfCounter(
+    'exploration-cache-hit',
+    'Number of times an exploration was found in the in-process cache')
+EXPLORATION_CACHE_MISS = PerfCounter(
+    'exploration-cache-miss',
+    'Number of times an exploration was not found in the in-process cache')
+EXPLORATION_CACHE_EVICTION = PerfCounter(
+    'exploration-cache-eviction',
+    'Number of explorations evicted from the in-process cache to make room')
+MISSING_EXPLORATION_CACHE_HIT = PerfCounter(
+    'missing-exploration-cache-hit',
+    'Number of datastore reads saved by remembering in memcache that an '
+    'exploration or exploration summary does not exist')
+EXPLORATION_LOAD_LEASE_FALLBACKS = PerfCounter(
+    'exploration-load-lease-fallbacks',
+    'Number of explorations or exploration summaries loaded from the '
+    'datastore after waiting in vain for another request to load them')
+
 HTML_RESPONSE_TIME_SECS = PerfCounter(
     'html-response-time-secs',
     'Total processing time for all HTML responses, in seconds')
@@ -97,3 +408,23 @@ JSON_RESPONSE_COUNT = PerfCounter(
 EMAILS_SENT = PerfCounter(
     'emails-sent',
     'Number of times a call to send_mail() was made')
+
+ANSWER_SUBMISSIONS_BUFFERED = PerfCounter(
+    'answer-submissions-buffered',
+    'Number of submitted answers added to the answer submission buffer')
+ANSWER_SUBMISSIONS_MERGED = PerfCounter(
+    'answer-submissions-merged',
+    'Number of submitted answers merged into the answer logs')
+ANSWER_LOG_MERGE_BATCHES = PerfCounter(
+    'answer-log-merge-batches',
+    'Number of batched writes of merged answers to the answer logs')
+ANSWER_SUBMISSION_BUFFER_OVERFLOWS = PerfCounter(
+    'answer-submission-buffer-overflows',
+    'Number of submitted answers written directly to the answer logs '
+    'because the buffer was full or unavailable')
+ANSWER_SUBMISSIONS_DROPPED = PerfCounter(
+    'answer-submissions-dropped',
+    'Number of submitted answers that were too long to be logged')
+ANSWER_LOG_ANSWERS_EVICTED = PerfCounter(
+    'answer-log-answers-evicted',
+    'Number of low-frequency answers discarded from full answer logs')
@@ -0,0 +1,90 @@
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for performance counters and handler stats."""
+
+from core import counters
+from core.tests import test_utils
+
+
+class HandlerStatsTests(test_utils.GenericTestBase):
+    """Test the recording of handler stats."""
+
+    def test_latency_percentiles(self):
+        self.assertIsNone(
+            counters.get_latency_percentile_msec([0, 0, 0], 50))
+
+        handler_stats = counters.HandlerStats('test.LatencyHandler')
+        for _ in range(90):
+            handler_stats.record_request(7, 0, 0)
+        for _ in range(9):
+            handler_stats.record_request(300, 0, 0)
+        handler_stats.record_request(10 ** 6, 0, 0)
+
+        stats_dict = handler_stats.to_dict()
+        self.assertEqual(stats_dict['request_count'], 100)
+        self.assertEqual(stats_dict['p50_latency_msec'], 10)
+        self.assertEqual(stats_dict['p95_latency_msec'], 500)
+        self.assertEqual(stats_dict['p99_latency_msec'], 500)
+        self.assertIsNone(counters.get_latency_percentile_msec(
+            stats_dict['latency_bucket_counts'], 100))
+
+    def test_api_calls_are_recorded_per_request(self):
+        counters.begin_request_scope()
+        counters.record_api_call(counters.API_CALL_DATASTORE)
+        counters.record_api_call(counters.API_CALL_DATASTORE)
+        counters.record_api_call(counters.API_CALL_MEMCACHE)
+        counters.end_request_scope('test.ApiCallsHandler', 20)
+
+        # Calls made outside a request scope are not recorded.
+        counters.record_api_call(counters.API_CALL_DATASTORE)
+
+        stats_dict = counters.Registry.get_handler_stats(
+            'test.ApiCallsHandler').to_dict()
+        self.assertEqual(stats_dict['request_count'], 1)
+        self.assertEqual(stats_dict['average_datastore_calls'], 2)
+        self.assertEqual(stats_dict['average_memcache_calls'], 1)
+
+
+class AggregationTests(test_utils.GenericTestBase):
+    """Test the aggregation of counters and handler stats across
+    instances.
+    """
+
+    def test_increments_are_flushed_to_the_aggregate_once(self):
+        counters.flush_to_aggregate()
+        initial_value = counters.get_aggregated_counter_values()[
+            counters.EMAILS_SENT.name]
+
+        counters.EMAILS_SENT.inc(increment=3)
+        counters.Registry.get_handler_stats(
+            'test.AggregatedHandler').record_request(40, 1, 2)
+        counters.flush_to_aggregate()
+        counters.flush_to_aggregate()
+
+        self.assertEqual(
+            counters.get_aggregated_counter_values()[
+                counters.EMAILS_SENT.name],
+            initial_value + 3)
+
+        aggregated_handler_stats = counters.get_aggregated_handler_stats(
+            ['test.AggregatedHandler', 'test.UnusedHandler'])
+        self.assertEqual(
+            aggregated_handler_stats.keys(), ['test.AggregatedHandler'])
+        self.assertDictContainsSubset({
+            'request_count': 1,
+            'p50_latency_msec': 50,
+            'average_datastore_calls': 1,
+            'average_memcache_calls': 2,
+        }, aggregated_handler_stats['test.AggregatedHandler'])
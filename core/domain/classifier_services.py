@@ -0,0 +1,99 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Services for classifying learner answers against a state's rule specs."""
+
+import json
+
+from core.domain import interaction_registry
+from core.domain import rule_domain
+import feconf
+import utils
+
+# An in-process cache of compiled classifiers, keyed by a fingerprint of the
+# answer handler (and the exploration param specs) they were compiled from.
+# The fingerprint covers everything that affects classification, so it is
+# also correct for unsaved states that are previewed in the editor.
+_CLASSIFIER_CACHE = utils.LRUCache(feconf.CLASSIFIER_CACHE_MAX_ENTRIES)
+
+
+class AnswerClassifier(object):
+    """Classifies answers submitted to an answer handler of a state.
+
+    The rule specs of the handler are compiled when the classifier is
+    created, so that classification only evaluates the compiled rules.
+    Classifiers are shared between requests, and must not be modified.
+    """
+
+    def __init__(self, handler, exp_param_specs, input_type):
+        self._handler_name = handler.name
+        self._rule_specs = handler.rule_specs
+        self._compiled_rules = [
+            rule_domain.compile_rule(
+                rule_spec.definition, exp_param_specs, input_type)
+            for rule_spec in handler.rule_specs]
+
+    def classify(self, params, normalized_answer, fs):
+        """Returns the first rule spec that the normalized answer satisfies.
+
+        Args:
+          - params: the learner's parameter values.
+          - normalized_answer: the learner's answer, normalized by the
+              interaction.
+          - fs: the file system of the exploration.
+        """
+        for (rule_spec, compiled_rule) in zip(
+                self._rule_specs, self._compiled_rules):
+            if compiled_rule(params, normalized_answer, fs):
+                return rule_spec
+
+        raise Exception(
+            'No matching rule found for handler %s. Rule specs are %s.' % (
+                self._handler_name,
+                [rule_spec.to_dict() for rule_spec in self._rule_specs]
+            )
+        )
+
+
+def _get_classifier_cache_key(handler, exp_param_specs, input_type):
+    return utils.convert_to_hash(json.dumps({
+        'handler': handler.to_dict(),
+        'input_type': input_type,
+        'param_specs': {
+            ps_name: param_spec.to_dict()
+            for (ps_name, param_spec) in exp_param_specs.iteritems()
+        },
+    }, sort_keys=True), 28)
+
+
+def get_classifier(exp_param_specs, state, handler_name):
+    """Returns an AnswerClassifier for the given handler of the given state.
+
+    Classifiers are compiled once and then cached on this instance.
+    """
+    interaction_instance = interaction_registry.Registry.get_interaction_by_id(
+        state.interaction.id)
+    input_type = interaction_instance.get_handler_by_name(
+        handler_name).obj_type
+    handler = next(
+        h for h in state.interaction.handlers if h.name == handler_name)
+
+    cache_key = _get_classifier_cache_key(handler, exp_param_specs, input_type)
+    classifier = _CLASSIFIER_CACHE.get(cache_key)
+    if classifier is None:
+        classifier = AnswerClassifier(handler, exp_param_specs, input_type)
+        _CLASSIFIER_CACHE.put(cache_key, classifier)
+    return classifier
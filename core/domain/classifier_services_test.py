@@ -0,0 +1,102 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the answer classifier services."""
+
+from core.domain import classifier_services
+from core.domain import exp_domain
+from core.domain import fs_domain
+from core.domain import param_domain
+import feconf
+import test_utils
+
+
+class AnswerClassifierUnitTests(test_utils.GenericTestBase):
+    """Tests for compiled answer classifiers."""
+
+    def setUp(self):
+        super(AnswerClassifierUnitTests, self).setUp()
+        exploration = exp_domain.Exploration.create_default_exploration(
+            'eid', 'A title', 'A category')
+        self.state = exploration.init_state
+        self.state.update_interaction_id('TextInput')
+        self.state.update_interaction_handlers({
+            feconf.SUBMIT_HANDLER_NAME: [{
+                'definition': {
+                    'rule_type': 'atomic',
+                    'name': 'Equals',
+                    'subject': 'answer',
+                    'inputs': {'x': 'abc'},
+                },
+                'dest': feconf.END_DEST,
+                'feedback': ['Correct'],
+                'param_changes': [],
+            }, {
+                'definition': {
+                    'rule_type': 'atomic',
+                    'name': 'Equals',
+                    'subject': 'answer',
+                    'inputs': {'x': '{{secret}}'},
+                },
+                'dest': feconf.END_DEST,
+                'feedback': ['Also correct'],
+                'param_changes': [],
+            }, {
+                'definition': {'rule_type': 'default'},
+                'dest': exploration.init_state_name,
+                'feedback': [],
+                'param_changes': [],
+            }]
+        })
+        self.exp_param_specs = {
+            'secret': param_domain.ParamSpec('UnicodeString')}
+        self.fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid'))
+
+    def test_classification(self):
+        classifier = classifier_services.get_classifier(
+            self.exp_param_specs, self.state, feconf.SUBMIT_HANDLER_NAME)
+
+        rule_specs = self.state.interaction.handlers[0].rule_specs
+        self.assertEqual(
+            classifier.classify({'secret': 'xyz'}, 'abc', self.fs).to_dict(),
+            rule_specs[0].to_dict())
+        self.assertEqual(
+            classifier.classify({'secret': 'xyz'}, 'xyz', self.fs).to_dict(),
+            rule_specs[1].to_dict())
+        self.assertEqual(
+            classifier.classify({'secret': 'def'}, 'xyz', self.fs).to_dict(),
+            rule_specs[2].to_dict())
+
+    def test_classifiers_are_cached(self):
+        classifier = classifier_services.get_classifier(
+            self.exp_param_specs, self.state, feconf.SUBMIT_HANDLER_NAME)
+        self.assertIs(
+            classifier_services.get_classifier(
+                self.exp_param_specs,
+                exp_domain.State.from_dict(self.state.to_dict()),
+                feconf.SUBMIT_HANDLER_NAME),
+            classifier)
+
+        # Changing the rule specs results in a different classifier.
+        self.state.interaction.handlers[0].rule_specs[0].definition[
+            'inputs']['x'] = 'def'
+        new_classifier = classifier_services.get_classifier(
+            self.exp_param_specs, self.state, feconf.SUBMIT_HANDLER_NAME)
+        self.assertIsNot(new_classifier, classifier)
+        self.assertEqual(
+            new_classifier.classify({'secret': 'xyz'}, 'def', self.fs).dest,
+            feconf.END_DEST)
@@ -104,26 +104,59 @@ class ConfigProperty(object):
 
 
 class ComputedProperty(ConfigProperty):
-    """A property whose default value is computed using a given function."""
+    """A property whose value is computed using a given function.
+
+    The computed value is cached in-process. It is recomputed only when
+    refresh_default_value() or invalidate() is called, or when the value of
+    one of the config properties named in `dependencies` has changed since the
+    value was last computed (which also picks up changes made through other
+    instances). Computed values are not normalized against the schema, so
+    that, e.g., sets of ids can be stored as frozensets.
+    """
 
     def refresh_default_value(self):
         memcache_services.delete_multi([self.name])
-        self._default_value = self.fn(*self.args)
+        dependency_values = self._get_dependency_values()
+        self._default_value = self.fn()
+        self._dependency_values = dependency_values
+
+    def invalidate(self):
+        """Discards the cached value, so that it is recomputed on next use."""
+        self._dependency_values = None
 
-    def __init__(self, name, schema, description, fn, *args):
+    def __init__(self, name, schema, description, fn, dependencies=None):
         self.fn = fn
-        self.args = args
+        self.dependencies = dependencies or []
+        # The values of the dependencies at the time the cached value was
+        # computed, or None if there is no valid cached value.
+        self._dependency_values = None
+
+        self._name = '%s%s' % (COMPUTED_PROPERTY_PREFIX, name)
+        if self._name in Registry._config_registry:
+            raise Exception('Property with name %s already exists' % name)
+
+        self._schema = schema
+        self._description = description
+        self._default_value = None
+
+        Registry._config_registry[self.name] = self
 
-        default_value = self.fn(*self.args)
-        super(ComputedProperty, self).__init__(
-            '%s%s' % (COMPUTED_PROPERTY_PREFIX, name),
-            schema, description, default_value)
+    def _get_dependency_values(self):
+        return tuple(
+            Registry.get_config_property(dependency_name).value
+            for dependency_name in self.dependencies)
+
+    @property
+    def default_value(self):
+        return self.value
 
     @property
     def value(self):
-        """Compute the value on the fly."""
-        self.refresh_default_value()
-        return self.default_value
+        """Returns the cached value, recomputing it if it is stale."""
+        if (self._dependency_values is None or
+                self._dependency_values != self._get_dependency_values()):
+            self.refresh_default_value()
+        return self._default_value
 
 
 class Registry(object):
@@ -156,6 +189,16 @@ class Registry(object):
 
         return schemas_dict
 
+    @classmethod
+    def invalidate_computed_properties_depending_on(cls, name):
+        """Discards the cached values of all computed properties that depend
+        on the config property with the given name.
+        """
+        for instance in cls._config_registry.itervalues():
+            if (isinstance(instance, ComputedProperty) and
+                    name in instance.dependencies):
+                instance.invalidate()
+
     @classmethod
     def get_computed_property_names(cls):
         """Return a list of computed property names."""
@@ -171,11 +214,11 @@ class Registry(object):
 
 
 def update_admin_ids():
-    """Refresh the list of admin user_ids based on the emails entered."""
+    """Returns a frozenset of admin user_ids based on the emails entered."""
     admin_emails_config = Registry.get_config_property(
         'admin_emails')
     if not admin_emails_config:
-        return []
+        return frozenset()
 
     admin_ids = []
     for email in admin_emails_config.value:
@@ -184,15 +227,17 @@ def update_admin_ids():
             admin_ids.append(user_id)
         else:
             raise Exception('Bad admin email: %s' % email)
-    return admin_ids
+    return frozenset(admin_ids)
 
 
 def update_moderator_ids():
-    """Refresh the list of moderator user_ids based on the emails entered."""
+    """Returns a frozenset of moderator user_ids based on the emails
+    entered.
+    """
     moderator_emails_config = Registry.get_config_property(
         'moderator_emails')
     if not moderator_emails_config:
-        return []
+        return frozenset()
 
     moderator_ids = []
     for email in moderator_emails_config.value:
@@ -201,14 +246,15 @@ def update_moderator_ids():
             moderator_ids.append(user_id)
         else:
             raise Exception('Bad moderator email: %s' % email)
-    return moderator_ids
+    return frozenset(moderator_ids)
 
 
 ADMIN_IDS = ComputedProperty(
-    'admin_ids', SET_OF_STRINGS_SCHEMA, 'Admin ids', update_admin_ids)
+    'admin_ids', SET_OF_STRINGS_SCHEMA, 'Admin ids', update_admin_ids,
+    dependencies=['admin_emails'])
 MODERATOR_IDS = ComputedProperty(
     'moderator_ids', SET_OF_STRINGS_SCHEMA, 'Moderator ids',
-    update_moderator_ids)
+    update_moderator_ids, dependencies=['moderator_emails'])
 
 ADMIN_EMAILS = ConfigProperty(
     'admin_emails', SET_OF_STRINGS_SCHEMA, 'Email addresses of admins', [])
@@ -19,6 +19,7 @@
 __author__ = 'Sean Lip'
 
 from core.domain import config_domain
+from core.domain import config_services
 from core.tests import test_utils
 import schema_utils_test
 
@@ -28,9 +29,78 @@ class ConfigPropertyRegistryTests(test_utils.GenericTestBase):
 
     def test_config_property_schemas_are_valid(self):
         # This is the total number of config and computed properties.
-        self.assertEqual(len(config_domain.Registry._config_registry), 16)
+        self.assertEqual(len(config_domain.Registry._config_registry), 17)
 
         for property_name in config_domain.Registry._config_registry:
             schema = config_domain.Registry.get_config_property(
                 property_name).schema
             schema_utils_test.validate_schema(schema)
+
+
+class ComputedPropertyTests(test_utils.GenericTestBase):
+    """Tests for the caching of computed property values."""
+
+    def setUp(self):
+        super(ComputedPropertyTests, self).setUp()
+        self.signup(self.ADMIN_EMAIL, self.ADMIN_USERNAME)
+        self.admin_id = self.get_user_id_from_email(self.ADMIN_EMAIL)
+        self.call_count = 0
+        config_domain.ADMIN_IDS.invalidate()
+
+    def _counting_update_admin_ids(self):
+        self.call_count += 1
+        return config_domain.update_admin_ids()
+
+    def test_value_is_computed_once_until_dependencies_change(self):
+        with self.swap(
+                config_domain.ADMIN_IDS, 'fn',
+                self._counting_update_admin_ids):
+            self.assertEqual(config_domain.ADMIN_IDS.value, frozenset())
+            self.assertEqual(config_domain.ADMIN_IDS.value, frozenset())
+            self.assertEqual(self.call_count, 1)
+
+            config_services.set_property(
+                self.admin_id, config_domain.ADMIN_EMAILS.name,
+                [self.ADMIN_EMAIL])
+            self.assertEqual(
+                config_domain.ADMIN_IDS.value, frozenset([self.admin_id]))
+            self.assertEqual(config_domain.ADMIN_IDS.value, frozenset([
+                self.admin_id]))
+            self.assertEqual(self.call_count, 2)
+
+            # Unrelated config properties do not trigger a recomputation.
+            config_services.set_property(
+                self.admin_id, config_domain.MODERATOR_EMAILS.name,
+                [self.ADMIN_EMAIL])
+            self.assertIn(self.admin_id, config_domain.ADMIN_IDS.value)
+            self.assertEqual(self.call_count, 2)
+
+    def test_changes_made_elsewhere_are_picked_up(self):
+        with self.swap(
+                config_domain.ADMIN_IDS, 'fn',
+                self._counting_update_admin_ids):
+            self.assertEqual(config_domain.ADMIN_IDS.value, frozenset())
+
+            # Simulate a change made via another instance, which does not
+            # invalidate this instance's cached value.
+            with self.swap(
+                    config_domain.ADMIN_IDS, 'invalidate', lambda: None):
+                config_services.set_property(
+                    self.admin_id, config_domain.ADMIN_EMAILS.name,
+                    [self.ADMIN_EMAIL])
+
+            self.assertEqual(
+                config_domain.ADMIN_IDS.value, frozenset([self.admin_id]))
+            self.assertEqual(self.call_count, 2)
+
+    def test_refresh_and_invalidate_recompute_the_value(self):
+        with self.swap(
+                config_domain.ADMIN_IDS, 'fn',
+                self._counting_update_admin_ids):
+            config_domain.ADMIN_IDS.refresh_default_value()
+            config_domain.ADMIN_IDS.value
+            self.assertEqual(self.call_count, 1)
+
+            config_domain.ADMIN_IDS.invalidate()
+            config_domain.ADMIN_IDS.value
+            self.assertEqual(self.call_count, 2)
@@ -50,6 +50,9 @@ def set_property(committer_id, name, value):
     memcache_services.set_multi({
         datastore_item.id: datastore_item.value})
 
+    config_domain.Registry.invalidate_computed_properties_depending_on(
+        config_property.name)
+
 
 def revert_property(committer_id, name):
     """Reverts a property value to the default value."""
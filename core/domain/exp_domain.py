@@ -27,6 +27,7 @@ import logging
 import re
 import string
 
+from core.domain import exp_graph_domain
 from core.domain import fs_domain
 from core.domain import html_cleaner
 from core.domain import interaction_registry
@@ -49,14 +50,6 @@ STATE_PROPERTY_INTERACTION_HANDLERS = 'widget_handlers'
 STATE_PROPERTY_INTERACTION_STICKY = 'widget_sticky'
 
 
-def _is_interaction_terminal(interaction_id):
-    """Returns whether the given interaction id marks the end of an
-    exploration.
-    """
-    return interaction_registry.Registry.get_interaction_by_id(
-        interaction_id).is_terminal
-
-
 class ExplorationChange(object):
     """Domain object class for an exploration change.
 
@@ -740,6 +733,16 @@ class State(object):
 class Exploration(object):
     """Domain object for an Oppia exploration."""
 
+    # The following are class attributes, rather than being set in __init__(),
+    # so that explorations that were pickled before they were introduced can
+    # still be unpickled and used.
+    # An index of the rule specs of this exploration by destination, which is
+    # built lazily by _get_dest_index().
+    _dest_index = None
+    # The names of the states that are shared with the exploration that this
+    # one was cloned from by clone_copy_on_write().
+    _shared_state_names = frozenset()
+
     def __init__(self, exploration_id, title, category, objective,
                  language_code, skill_tags, blurb, author_notes, default_skin,
                  init_state_name, states_dict, param_specs_dict,
@@ -772,6 +775,38 @@ class Exploration(object):
         self.created_on = created_on
         self.last_updated = last_updated
 
+    def clone_copy_on_write(self):
+        """Returns a copy of this exploration that shares its states with this
+        exploration until they are modified.
+
+        Shared states are copied when they are first modified through the
+        returned exploration's methods, so the cost of the clone is
+        proportional to the number of states that are actually changed. States
+        of the clone must only be modified through its methods or through the
+        states returned by get_mutable_state(), never directly through its
+        `states` dict; this exploration is never modified.
+        """
+        clone = copy.copy(self)
+        clone.states = dict(self.states)
+        clone._dest_index = None
+        clone._shared_state_names = set(self.states.keys())
+        return clone
+
+    def get_mutable_state(self, state_name):
+        """Returns the given state, first copying it if it is shared with the
+        exploration that this one was cloned from. This should be used to get
+        a state that is about to be modified.
+        """
+        if state_name in self._shared_state_names:
+            self._shared_state_names.remove(state_name)
+            dests = self._get_rule_spec_dests(state_name)
+            self.states[state_name] = copy.deepcopy(self.states[state_name])
+            if self._dest_index is not None:
+                for dest in dests:
+                    del self._dest_index[dest][state_name]
+                self._index_rule_specs(state_name)
+        return self.states[state_name]
+
     def is_equal_to(self, other):
         simple_props = [
             'id', 'title', 'category', 'objective', 'language_code',
@@ -1011,15 +1046,19 @@ class Exploration(object):
         if strict:
             warnings_list = []
 
-            try:
-                self._verify_all_states_reachable()
-            except utils.ValidationError as e:
-                warnings_list.append(unicode(e))
-
-            try:
-                self._verify_no_dead_ends()
-            except utils.ValidationError as e:
-                warnings_list.append(unicode(e))
+            graph_diagnostics = (
+                exp_graph_domain.ExplorationGraph.from_exploration(
+                    self).get_diagnostics())
+            if graph_diagnostics['unreachable_state_names']:
+                warnings_list.append(
+                    'The following states are not reachable from the initial '
+                    'state: %s' % ', '.join(
+                        graph_diagnostics['unreachable_state_names']))
+            if graph_diagnostics['dead_end_state_names']:
+                warnings_list.append(
+                    'It is impossible to complete the exploration from the '
+                    'following states: %s' % ', '.join(
+                        graph_diagnostics['dead_end_state_names']))
 
             if not self.objective:
                 warnings_list.append(
@@ -1038,75 +1077,6 @@ class Exploration(object):
                     'Please fix the following issues before saving this '
                     'exploration: %s' % warning_str)
 
-    def _verify_all_states_reachable(self):
-        """Verifies that all states are reachable from the initial state."""
-        # This queue stores state names.
-        processed_queue = []
-        curr_queue = [self.init_state_name]
-
-        while curr_queue:
-            curr_state_name = curr_queue[0]
-            curr_queue = curr_queue[1:]
-
-            if curr_state_name in processed_queue:
-                continue
-
-            processed_queue.append(curr_state_name)
-
-            curr_state = self.states[curr_state_name]
-
-            if not _is_interaction_terminal(curr_state.interaction.id):
-                for handler in curr_state.interaction.handlers:
-                    for rule in handler.rule_specs:
-                        dest_state = rule.dest
-                        if (dest_state not in curr_queue and
-                                dest_state not in processed_queue and
-                                dest_state != feconf.END_DEST):
-                            curr_queue.append(dest_state)
-
-        if len(self.states) != len(processed_queue):
-            unseen_states = list(
-                set(self.states.keys()) - set(processed_queue))
-            raise utils.ValidationError(
-                'The following states are not reachable from the initial '
-                'state: %s' % ', '.join(unseen_states))
-
-    def _verify_no_dead_ends(self):
-        """Verifies that all states can reach a terminal state."""
-        # This queue stores state names.
-        processed_queue = []
-        curr_queue = [feconf.END_DEST]
-
-        for (state_name, state) in self.states.iteritems():
-            if _is_interaction_terminal(state.interaction.id):
-                curr_queue.append(state_name)
-
-        while curr_queue:
-            curr_state_name = curr_queue[0]
-            curr_queue = curr_queue[1:]
-
-            if curr_state_name in processed_queue:
-                continue
-
-            if curr_state_name != feconf.END_DEST:
-                processed_queue.append(curr_state_name)
-
-            for (state_name, state) in self.states.iteritems():
-                if (state_name not in curr_queue
-                        and state_name not in processed_queue):
-                    for handler in state.interaction.handlers:
-                        for rule_spec in handler.rule_specs:
-                            if rule_spec.dest == curr_state_name:
-                                curr_queue.append(state_name)
-                                break
-
-        if len(self.states) != len(processed_queue):
-            dead_end_states = list(
-                set(self.states.keys()) - set(processed_queue))
-            raise utils.ValidationError(
-                'It is impossible to complete the exploration from the '
-                'following states: %s' % ', '.join(dead_end_states))
-
     # Derived attributes of an exploration,
     @property
     def init_state(self):
@@ -1180,6 +1150,45 @@ class Exploration(object):
         self.init_state_name = init_state_name
 
     # Methods relating to states.
+    def _index_rule_specs(self, state_name):
+        """Adds the rule specs of the given state to the destination index."""
+        for handler in self.states[state_name].interaction.handlers:
+            for rule_spec in handler.rule_specs:
+                self._dest_index.setdefault(rule_spec.dest, {}).setdefault(
+                    state_name, []).append(rule_spec)
+
+    def _get_dest_index(self):
+        """Returns the destination index of this exploration, building it if
+        necessary.
+
+        The index is a dict that maps each rule spec destination to a dict.
+        The latter maps the name of each state that has rule specs with that
+        destination to the list of those rule specs. It allows renames and
+        deletions of states to update only the rule specs that refer to
+        them.
+        """
+        if self._dest_index is None:
+            self._dest_index = {}
+            for state_name in self.states:
+                self._index_rule_specs(state_name)
+        return self._dest_index
+
+    def invalidate_dest_index(self):
+        """Discards the destination index of this exploration.
+
+        This must be called whenever the rule specs of a state are changed
+        other than by the methods of this class, e.g. by
+        State.update_interaction_handlers().
+        """
+        self._dest_index = None
+
+    def _get_rule_spec_dests(self, state_name):
+        """Returns the set of destinations of the rule specs of a state."""
+        return set([
+            rule_spec.dest
+            for handler in self.states[state_name].interaction.handlers
+            for rule_spec in handler.rule_specs])
+
     def add_states(self, state_names):
         """Adds multiple states to the exploration."""
         for state_name in state_names:
@@ -1188,6 +1197,8 @@ class Exploration(object):
 
         for state_name in state_names:
             self.states[state_name] = State.create_default_state(state_name)
+            if self._dest_index is not None:
+                self._index_rule_specs(state_name)
 
     def rename_state(self, old_state_name, new_state_name):
         """Renames the given state."""
@@ -1202,21 +1213,31 @@ class Exploration(object):
 
         self._require_valid_state_name(new_state_name)
 
-        self.states[new_state_name] = copy.deepcopy(
-            self.states[old_state_name])
-        del self.states[old_state_name]
+        dest_index = self._get_dest_index()
+        for source_state_name in dest_index.get(old_state_name, {}).keys():
+            self.get_mutable_state(source_state_name)
+
+        # Re-key the index entries for the rule specs of the renamed state.
+        for dest in self._get_rule_spec_dests(old_state_name):
+            dest_index[dest][new_state_name] = dest_index[dest].pop(
+                old_state_name)
+
+        self.states[new_state_name] = self.states.pop(old_state_name)
+        if old_state_name in self._shared_state_names:
+            self._shared_state_names.remove(old_state_name)
+            self._shared_state_names.add(new_state_name)
 
         if self.init_state_name == old_state_name:
             self.update_init_state_name(new_state_name)
 
-        # Find all destinations in the exploration which equal the renamed
-        # state, and change the name appropriately.
-        for other_state_name in self.states:
-            other_state = self.states[other_state_name]
-            for handler in other_state.interaction.handlers:
-                for rule in handler.rule_specs:
-                    if rule.dest == old_state_name:
-                        rule.dest = new_state_name
+        # Change all destinations in the exploration which equal the renamed
+        # state to the new name.
+        for (source_state_name, rule_specs) in dest_index.pop(
+                old_state_name, {}).iteritems():
+            for rule_spec in rule_specs:
+                rule_spec.dest = new_state_name
+            dest_index.setdefault(new_state_name, {}).setdefault(
+                source_state_name, []).extend(rule_specs)
 
     def delete_state(self, state_name):
         """Deletes the given state."""
@@ -1227,16 +1248,26 @@ class Exploration(object):
         if self.init_state_name == state_name:
             raise ValueError('Cannot delete initial state of an exploration.')
 
-        # Find all destinations in the exploration which equal the deleted
-        # state, and change them to loop back to their containing state.
-        for other_state_name in self.states:
-            other_state = self.states[other_state_name]
-            for handler in other_state.interaction.handlers:
-                for rule in handler.rule_specs:
-                    if rule.dest == state_name:
-                        rule.dest = other_state_name
+        dest_index = self._get_dest_index()
+        for source_state_name in dest_index.get(state_name, {}).keys():
+            if source_state_name != state_name:
+                self.get_mutable_state(source_state_name)
+
+        for dest in self._get_rule_spec_dests(state_name):
+            del dest_index[dest][state_name]
 
         del self.states[state_name]
+        if state_name in self._shared_state_names:
+            self._shared_state_names.remove(state_name)
+
+        # Change all destinations in the exploration which equal the deleted
+        # state to loop back to their containing state.
+        for (source_state_name, rule_specs) in dest_index.pop(
+                state_name, {}).iteritems():
+            for rule_spec in rule_specs:
+                rule_spec.dest = source_state_name
+            dest_index.setdefault(source_state_name, {}).setdefault(
+                source_state_name, []).extend(rule_specs)
 
     def export_state_to_frontend_dict(self, state_name):
         """Gets a state dict with rule descriptions."""
@@ -1343,38 +1374,39 @@ class Exploration(object):
                 exploration_dict)
             exploration_schema_version = 4
 
-        exploration = cls.create_default_exploration(
-            exploration_id, title, category,
-            objective=exploration_dict['objective'],
-            language_code=exploration_dict['language_code'])
-        exploration.skill_tags = exploration_dict['skill_tags']
-        exploration.blurb = exploration_dict['blurb']
-        exploration.author_notes = exploration_dict['author_notes']
-
-        exploration.param_specs = {
-            ps_name: param_domain.ParamSpec.from_dict(ps_val) for
-            (ps_name, ps_val) in exploration_dict['param_specs'].iteritems()
-        }
-
-        init_state_name = exploration_dict['init_state_name']
-        exploration.rename_state(exploration.init_state_name, init_state_name)
-        exploration.add_states([
-            state_name for state_name in exploration_dict['states']
-            if state_name != init_state_name])
-
+        exploration = cls(
+            exploration_id, title, category, exploration_dict['objective'],
+            exploration_dict['language_code'], exploration_dict['skill_tags'],
+            exploration_dict['blurb'], exploration_dict['author_notes'],
+            exploration_dict['default_skin'],
+            exploration_dict['init_state_name'], {},
+            exploration_dict['param_specs'],
+            exploration_dict['param_changes'], 0)
+
+        # Sanitize all the HTML in the exploration in a single batch.
+        html_list = []
+        for sdict in exploration_dict['states'].itervalues():
+            html_list.extend([item['value'] for item in sdict['content']])
+            for handler in sdict['interaction']['handlers']:
+                for rule_spec in handler['rule_specs']:
+                    html_list.extend(rule_spec['feedback'])
+        cleaned_html = dict(zip(html_list, html_cleaner.clean_many(html_list)))
+
+        # The states are built directly from their dicts, rather than by
+        # adding default states to the exploration and then updating them.
         for (state_name, sdict) in exploration_dict['states'].iteritems():
-            state = exploration.states[state_name]
+            cls._require_valid_state_name(state_name)
 
-            state.content = [
-                Content(item['type'], html_cleaner.clean(item['value']))
+            content = [
+                Content(item['type'], cleaned_html[item['value']])
                 for item in sdict['content']
             ]
 
-            state.param_changes = [param_domain.ParamChange(
+            param_changes = [param_domain.ParamChange(
                 pc['name'], pc['generator_id'], pc['customization_args']
             ) for pc in sdict['param_changes']]
 
-            for pc in state.param_changes:
+            for pc in param_changes:
                 if pc.name not in exploration.param_specs:
                     raise Exception('Parameter %s was used in a state but not '
                                     'declared in the exploration param_specs.'
@@ -1387,23 +1419,17 @@ class Exploration(object):
                     'rule_specs': [{
                         'definition': rule_spec['definition'],
                         'dest': rule_spec['dest'],
-                        'feedback': [html_cleaner.clean(feedback)
+                        'feedback': [cleaned_html[feedback]
                                      for feedback in rule_spec['feedback']],
                         'param_changes': rule_spec.get('param_changes', []),
                     } for rule_spec in handler['rule_specs']],
                 }, InteractionInstance._get_obj_type(idict['id']))
                 for handler in idict['handlers']]
 
-            state.interaction = InteractionInstance(
-                idict['id'], idict['customization_args'],
-                interaction_handlers)
-
-            exploration.states[state_name] = state
-
-        exploration.default_skin = exploration_dict['default_skin']
-        exploration.param_changes = [
-            param_domain.ParamChange.from_dict(pc)
-            for pc in exploration_dict['param_changes']]
+            exploration.states[state_name] = State(
+                content, param_changes, InteractionInstance(
+                    idict['id'], idict['customization_args'],
+                    interaction_handlers))
 
         return exploration
 
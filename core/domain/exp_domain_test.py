@@ -586,6 +586,60 @@ class StateOperationsUnitTests(test_utils.GenericTestBase):
         with self.assertRaisesRegexp(ValueError, 'fake state does not exist'):
             exploration.delete_state('fake state')
 
+    def _get_dests(self, exploration):
+        return {
+            state_name: [
+                rule_spec.dest for handler in state.interaction.handlers
+                for rule_spec in handler.rule_specs]
+            for (state_name, state) in exploration.states.iteritems()}
+
+    def test_rename_and_delete_state_update_destinations(self):
+        """Test that renaming or deleting a state updates the destinations of
+        the rule specs that refer to it.
+        """
+        exploration = exp_domain.Exploration.create_default_exploration(
+            'eid', 'A title', 'A category')
+        init_state_name = exploration.init_state_name
+        exploration.add_states(['A', 'B'])
+        exploration.states[init_state_name].interaction.handlers[
+            0].rule_specs[0].dest = 'A'
+        exploration.states['B'].interaction.handlers[
+            0].rule_specs[0].dest = 'A'
+
+        state_a = exploration.states['A']
+        exploration.rename_state('A', 'C')
+        self.assertIs(exploration.states['C'], state_a)
+        self.assertEqual(self._get_dests(exploration), {
+            init_state_name: ['C'], 'B': ['C'], 'C': ['C']})
+
+        exploration.add_states(['D'])
+        exploration.rename_state('C', 'A')
+        exploration.rename_state('D', 'E')
+        self.assertEqual(self._get_dests(exploration), {
+            init_state_name: ['A'], 'A': ['A'], 'B': ['A'], 'E': ['E']})
+
+        exploration.delete_state('A')
+        self.assertEqual(self._get_dests(exploration), {
+            init_state_name: [init_state_name], 'B': ['B'], 'E': ['E']})
+
+        exploration.states['B'].update_interaction_id('TextInput')
+        exploration.states['B'].update_interaction_handlers({
+            'submit': [{
+                'definition': {'rule_type': 'default'},
+                'dest': 'E',
+                'feedback': [],
+                'param_changes': [],
+            }]
+        })
+        exploration.invalidate_dest_index()
+        exploration.rename_state('E', 'F')
+        self.assertEqual(self._get_dests(exploration), {
+            init_state_name: [init_state_name], 'B': ['F'], 'F': ['F']})
+
+        exploration.delete_state('F')
+        self.assertEqual(self._get_dests(exploration), {
+            init_state_name: [init_state_name], 'B': ['B']})
+
     def test_state_operations(self):
         """Test adding, updating and checking existence of states."""
         exploration = exp_domain.Exploration.create_default_exploration(
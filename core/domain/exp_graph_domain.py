@@ -0,0 +1,125 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Domain object for the graph formed by the states of an exploration."""
+
+import collections
+
+from core.domain import interaction_registry
+import feconf
+
+
+class ExplorationGraph(object):
+    """The directed graph whose nodes are the states of an exploration (plus
+    feconf.END_DEST), and which has an edge from each state to the
+    destination of each of its rule specs.
+
+    The adjacency lists are built once, on construction, so each of the
+    analyses below runs in time linear in the number of states and rule
+    specs. The state names and destinations passed in are assumed to be
+    valid, i.e. every destination is either a state name or
+    feconf.END_DEST.
+    """
+
+    def __init__(self, init_state_name, states):
+        """Args:
+          - init_state_name: str. The name of the initial state.
+          - states: dict. A dict mapping state names to State domain objects.
+        """
+        self.init_state_name = init_state_name
+        self.state_names = states.keys()
+
+        self._terminal_state_names = set()
+        # Maps each state name to the list of distinct destinations of its
+        # rule specs.
+        self._dests = {}
+        # Maps each state name, and feconf.END_DEST, to the list of distinct
+        # names of states that have a rule spec leading to it.
+        self._sources = collections.defaultdict(list)
+
+        for (state_name, state) in states.iteritems():
+            if (state.interaction.id is not None and
+                    interaction_registry.Registry.get_interaction_by_id(
+                        state.interaction.id).is_terminal):
+                self._terminal_state_names.add(state_name)
+
+            dests = set()
+            for handler in state.interaction.handlers:
+                for rule_spec in handler.rule_specs:
+                    dests.add(rule_spec.dest)
+            self._dests[state_name] = list(dests)
+            for dest in dests:
+                self._sources[dest].append(state_name)
+
+    @classmethod
+    def from_exploration(cls, exploration):
+        return cls(exploration.init_state_name, exploration.states)
+
+    def _get_visited_nodes(self, start_nodes, get_neighbors):
+        """Returns the set of nodes reachable from the given start nodes by a
+        breadth-first search that follows get_neighbors(node).
+        """
+        visited = set(start_nodes)
+        queue = collections.deque(start_nodes)
+        while queue:
+            for neighbor in get_neighbors(queue.popleft()):
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        return visited
+
+    def get_unreachable_state_names(self):
+        """Returns a sorted list of the names of states that cannot be
+        reached from the initial state. Rule specs of terminal states are not
+        followed, since the exploration ends at those states.
+        """
+        def _get_dests(state_name):
+            if (state_name == feconf.END_DEST or
+                    state_name in self._terminal_state_names):
+                return []
+            return self._dests[state_name]
+
+        reachable = self._get_visited_nodes(
+            [self.init_state_name], _get_dests)
+        return sorted([
+            state_name for state_name in self.state_names
+            if state_name not in reachable])
+
+    def get_dead_end_state_names(self):
+        """Returns a sorted list of the names of states from which neither
+        feconf.END_DEST nor a terminal state can be reached.
+        """
+        can_finish = self._get_visited_nodes(
+            [feconf.END_DEST] + list(self._terminal_state_names),
+            lambda node: self._sources.get(node, []))
+        return sorted([
+            state_name for state_name in self.state_names
+            if state_name not in can_finish])
+
+    def get_diagnostics(self):
+        """Returns a dict describing the structural problems of the graph.
+
+        The dict has the following keys, each of which maps to a sorted list
+        of state names (that is empty if there are no such states):
+          - 'unreachable_state_names': states that cannot be reached from the
+              initial state.
+          - 'dead_end_state_names': states from which the exploration cannot
+              be completed.
+        """
+        return {
+            'unreachable_state_names': self.get_unreachable_state_names(),
+            'dead_end_state_names': self.get_dead_end_state_names(),
+        }
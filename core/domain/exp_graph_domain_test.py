@@ -0,0 +1,104 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the exploration graph domain object."""
+
+from core.domain import exp_domain
+from core.domain import exp_graph_domain
+from core.tests import test_utils
+import feconf
+import utils
+
+
+class ExplorationGraphUnitTests(test_utils.GenericTestBase):
+    """Test the exploration graph domain object."""
+
+    def _set_dest(self, exploration, state_name, dest):
+        exploration.states[state_name].interaction.handlers[0].rule_specs[
+            0].dest = dest
+
+    def _get_exploration(self):
+        """Returns an exploration with the following rule spec destinations:
+        init -> A -> END, B -> B, C -> A, and a terminal state D that is not
+        reachable.
+        """
+        exploration = exp_domain.Exploration.create_default_exploration(
+            'eid', 'A title', 'A category', objective='An objective')
+        exploration.add_states(['A', 'B', 'C', 'D'])
+        for state in exploration.states.values():
+            state.update_interaction_id('TextInput')
+        self._set_dest(exploration, exploration.init_state_name, 'A')
+        self._set_dest(exploration, 'A', feconf.END_DEST)
+        self._set_dest(exploration, 'C', 'A')
+        exploration.states['D'].update_interaction_id('EndExploration')
+        return exploration
+
+    def test_get_diagnostics(self):
+        graph = exp_graph_domain.ExplorationGraph.from_exploration(
+            self._get_exploration())
+        self.assertEqual(graph.get_diagnostics(), {
+            'unreachable_state_names': ['B', 'C', 'D'],
+            'dead_end_state_names': ['B'],
+        })
+
+    def test_rule_specs_of_terminal_states_are_not_followed(self):
+        exploration = self._get_exploration()
+        self._set_dest(exploration, exploration.init_state_name, 'D')
+        self._set_dest(exploration, 'D', 'A')
+
+        graph = exp_graph_domain.ExplorationGraph.from_exploration(
+            exploration)
+        self.assertEqual(
+            graph.get_unreachable_state_names(), ['A', 'B', 'C'])
+        self.assertEqual(graph.get_dead_end_state_names(), ['B'])
+
+    def test_diagnostics_for_a_long_chain_of_states(self):
+        exploration = exp_domain.Exploration.create_default_exploration(
+            'eid', 'A title', 'A category', objective='An objective')
+        state_names = ['State %s' % ind for ind in range(500)]
+        exploration.add_states(state_names)
+        for state in exploration.states.values():
+            state.update_interaction_id('TextInput')
+        self._set_dest(
+            exploration, exploration.init_state_name, state_names[0])
+        for ind in range(len(state_names) - 1):
+            self._set_dest(exploration, state_names[ind], state_names[ind + 1])
+
+        graph = exp_graph_domain.ExplorationGraph.from_exploration(
+            exploration)
+        self.assertEqual(graph.get_unreachable_state_names(), [])
+        self.assertEqual(
+            graph.get_dead_end_state_names(),
+            sorted([exploration.init_state_name] + state_names))
+
+        self._set_dest(exploration, state_names[-1], feconf.END_DEST)
+        graph = exp_graph_domain.ExplorationGraph.from_exploration(
+            exploration)
+        self.assertEqual(graph.get_dead_end_state_names(), [])
+
+    def test_strict_validation_reports_graph_diagnostics(self):
+        exploration = self._get_exploration()
+        with self.assertRaisesRegexp(
+                utils.ValidationError,
+                'The following states are not reachable from the initial '
+                'state: B, C, D.*It is impossible to complete the '
+                'exploration from the following states: B'):
+            exploration.validate(strict=True)
+
+        self._set_dest(exploration, 'A', 'B')
+        self._set_dest(exploration, 'B', 'C')
+        self._set_dest(exploration, 'C', 'D')
+        exploration.validate(strict=True)
@@ -21,6 +21,8 @@ __author__ = 'Frederik Creemers'
 import copy
 
 from core import jobs
+from core.domain import exp_graph_domain
+from core.domain import fs_domain
 from core.platform import models
 (base_models, exp_models,) = models.Registry.import_models([
     models.NAMES.base_model, models.NAMES.exploration])
@@ -75,7 +77,12 @@ class IndexAllExplorationsJobManager(jobs.BaseMapReduceJobManager):
 
 
 class ExplorationValidityJobManager(jobs.BaseMapReduceJobManager):
-    """Job that checks (non-strict) validation status of all explorations."""
+    """Job that checks (non-strict) validation status of all explorations.
+
+    For explorations that pass this validation, it also reports the
+    structural problems of the exploration graph that strict validation would
+    reject.
+    """
 
     @classmethod
     def entity_classes_to_map_over(cls):
@@ -89,6 +96,15 @@ class ExplorationValidityJobManager(jobs.BaseMapReduceJobManager):
             exploration.validate(strict=False)
         except utils.ValidationError as e:
             yield (item.id, unicode(e).encode('utf-8'))
+            return
+
+        graph_diagnostics = exp_graph_domain.ExplorationGraph.from_exploration(
+            exploration).get_diagnostics()
+        for (diagnostic_name, state_names) in sorted(
+                graph_diagnostics.iteritems()):
+            if state_names:
+                yield (item.id, (u'%s: %s' % (
+                    diagnostic_name, ', '.join(state_names))).encode('utf-8'))
 
     @staticmethod
     def reduce(key, values):
@@ -150,6 +166,48 @@ class InteractionMigrationJobManager(jobs.BaseMapReduceJobManager):
         yield (key, values)
 
 
+class ExplorationSnapshotDeltaEncodingOneOffJob(jobs.BaseMapReduceJobManager):
+    """Job that re-encodes the existing snapshots of each exploration as
+    deltas against periodic keyframes, in the same way as the snapshots of
+    new commits are stored.
+    """
+
+    @classmethod
+    def entity_classes_to_map_over(cls):
+        return [exp_models.ExplorationModel]
+
+    @staticmethod
+    def map(item):
+        num_reencoded_snapshots = (
+            exp_models.ExplorationModel.delta_encode_snapshots(
+                item.id, item.version))
+        yield ('num_reencoded_snapshots', num_reencoded_snapshots)
+
+    @staticmethod
+    def reduce(key, values):
+        yield (key, sum([int(value) for value in values]))
+
+
+class ExplorationFileIndexCreationOneOffJob(jobs.BaseMapReduceJobManager):
+    """Job that creates the file index of each exploration whose files were
+    saved before file indexes were introduced.
+    """
+
+    @classmethod
+    def entity_classes_to_map_over(cls):
+        return [exp_models.ExplorationModel]
+
+    @staticmethod
+    def map(item):
+        if not item.deleted and fs_domain.ExplorationFileSystem(
+                item.id).ensure_file_index_exists():
+            yield ('num_file_indexes_created', 1)
+
+    @staticmethod
+    def reduce(key, values):
+        yield (key, len(values))
+
+
 class SearchRankerRealtimeModel(
         jobs.BaseRealtimeDatastoreClassForContinuousComputations):
     pass
@@ -23,11 +23,13 @@ __author__ = 'Frederik Creemers'
 from core import jobs_registry
 from core.domain import exp_domain
 from core.domain import exp_jobs
+from core.domain import fs_domain
 from core.domain import rights_manager
 from core.platform import models
 from core.tests import test_utils
-(job_models, exp_models,) = models.Registry.import_models([
-   models.NAMES.job, models.NAMES.exploration])
+import feconf
+(job_models, exp_models, file_models) = models.Registry.import_models([
+   models.NAMES.job, models.NAMES.exploration, models.NAMES.file])
 search_services = models.Registry.import_search_services()
 
 
@@ -234,6 +236,112 @@ class ExpSummariesCreationOneOffJobTest(test_utils.GenericTestBase):
                         getattr(expected_job_output[exp_id], prop))
 
 
+class ExplorationSnapshotDeltaEncodingOneOffJobTest(
+        test_utils.GenericTestBase):
+    """Tests for the migration of snapshots to delta encoding."""
+
+    EXP_ID = 'exp_id'
+
+    def test_existing_snapshots_are_reencoded(self):
+        from core.domain import exp_services
+        with self.swap(
+                exp_models.ExplorationModel, 'DELTA_ENCODE_SNAPSHOTS', False):
+            self.save_new_valid_exploration(self.EXP_ID, 'owner_id')
+            for ind in range(3):
+                exp_services.update_exploration(
+                    'owner_id', self.EXP_ID, [{
+                        'cmd': 'edit_exploration_property',
+                        'property_name': 'title',
+                        'new_value': 'Title %s' % ind,
+                    }], 'Changed title.')
+
+        snapshot_ids = [
+            '%s-%s' % (self.EXP_ID, version) for version in range(1, 5)]
+        self.assertEqual([
+            model.keyframe_version for model in
+            exp_models.ExplorationSnapshotContentModel.get_multi(
+                snapshot_ids)], [None, None, None, None])
+
+        job_id = (
+            exp_jobs.ExplorationSnapshotDeltaEncodingOneOffJob.create_new())
+        exp_jobs.ExplorationSnapshotDeltaEncodingOneOffJob.enqueue(job_id)
+        self.assertEqual(self.count_jobs_in_taskqueue(), 1)
+        self.process_and_flush_pending_tasks()
+
+        self.assertEqual([
+            model.keyframe_version for model in
+            exp_models.ExplorationSnapshotContentModel.get_multi(
+                snapshot_ids)], [None, 1, 1, 1])
+        for ind in range(3):
+            self.assertEqual(
+                exp_models.ExplorationModel.get_version(
+                    self.EXP_ID, ind + 2).title,
+                'Title %s' % ind)
+
+        # Later commits are delta-encoded against the same keyframe.
+        exp_services.update_exploration(
+            'owner_id', self.EXP_ID, [{
+                'cmd': 'edit_exploration_property',
+                'property_name': 'title',
+                'new_value': 'New title',
+            }], 'Changed title.')
+        self.assertEqual(
+            exp_models.ExplorationSnapshotContentModel.get(
+                '%s-5' % self.EXP_ID).keyframe_version, 1)
+
+
+class ExplorationFileIndexCreationOneOffJobTest(test_utils.GenericTestBase):
+    """Tests for the creation of the file indexes of explorations."""
+
+    EXP_ID = 'exp_id'
+
+    def test_file_indexes_are_created_for_legacy_explorations(self):
+        self.save_new_valid_exploration(self.EXP_ID, 'owner_id')
+        metadata = file_models.FileMetadataModel.create(
+            self.EXP_ID, 'assets/abc.png')
+        metadata.size = 1
+        metadata.commit('owner_id', fs_domain.CHANGE_LIST_SAVE)
+        self.assertIsNone(
+            file_models.FileIndexModel.get(self.EXP_ID, strict=False))
+
+        job_id = exp_jobs.ExplorationFileIndexCreationOneOffJob.create_new()
+        exp_jobs.ExplorationFileIndexCreationOneOffJob.enqueue(job_id)
+        self.assertEqual(self.count_jobs_in_taskqueue(), 1)
+        self.process_and_flush_pending_tasks()
+
+        self.assertEqual(
+            file_models.FileIndexModel.get(self.EXP_ID).filepaths,
+            ['assets/abc.png'])
+
+
+class ExplorationValidityJobManagerTest(test_utils.GenericTestBase):
+    """Tests for the exploration validity job."""
+
+    def test_graph_diagnostics_are_reported(self):
+        from core.domain import exp_services
+        self.save_new_valid_exploration('valid_exp_id', 'owner_id')
+
+        exploration = exp_domain.Exploration.create_default_exploration(
+            'exp_id', 'A title', 'A category')
+        exploration.states[exploration.init_state_name].update_interaction_id(
+            'TextInput')
+        exploration.states[exploration.init_state_name].interaction.handlers[
+            0].rule_specs[0].dest = feconf.END_DEST
+        exploration.add_states(['Unused state'])
+        exploration.states['Unused state'].update_interaction_id('TextInput')
+        exp_services.save_new_exploration('owner_id', exploration)
+
+        job_id = exp_jobs.ExplorationValidityJobManager.create_new()
+        exp_jobs.ExplorationValidityJobManager.enqueue(job_id)
+        self.process_and_flush_pending_tasks()
+
+        output = exp_jobs.ExplorationValidityJobManager.get_output(job_id)
+        self.assertEqual(len(output), 1)
+        self.assertIn('exp_id', output[0])
+        self.assertIn('dead_end_state_names: Unused state', output[0])
+        self.assertIn('unreachable_state_names: Unused state', output[0])
+
+
 class OneOffReindexExplorationsJobTest(test_utils.GenericTestBase):
 
     EXP_ID = 'exp_id'
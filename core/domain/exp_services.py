@@ -24,17 +24,23 @@ storage model to be changed without affecting this module and others above it.
 
 __author__ = 'Sean Lip'
 
-import copy
+import cPickle
 import datetime
+import hashlib
+import json
 import logging
 import os
 import StringIO
+import time
 import zipfile
 
+from core import counters
 from core.domain import event_services
 from core.domain import exp_domain
 from core.domain import fs_domain
+from core.domain import recent_updates_services
 from core.domain import rights_manager
+from core.domain import rule_domain
 from core.platform import models
 import feconf
 memcache_services = models.Registry.import_memcache_services()
@@ -49,6 +55,19 @@ CMD_CREATE_NEW = 'create_new'
 #Name for the exploration search index
 SEARCH_INDEX_EXPLORATIONS = 'explorations'
 
+# An in-process cache of read-only exploration domain objects, keyed by
+# (exploration_id, version). Entries are only served while the version stamp
+# for the exploration is present in memcache; this stamp is updated whenever
+# the exploration is created, saved, reverted or deleted.
+_EXPLORATION_CACHE = utils.LRUCache(
+    feconf.EXPLORATION_CACHE_MAX_ENTRIES,
+    max_size_bytes=feconf.EXPLORATION_CACHE_MAX_SIZE_BYTES)
+
+# The value stored in memcache, in place of an exploration or exploration
+# summary, for ids that have no corresponding undeleted entity.
+_MISSING_ENTITY_MEMCACHE_VALUE = 'missing-entity'
+
+
 
 # Repository GET methods.
 def _get_exploration_memcache_key(exploration_id, version=None):
@@ -59,6 +78,123 @@ def _get_exploration_memcache_key(exploration_id, version=None):
         return 'exploration:%s' % exploration_id
 
 
+def _get_exploration_summary_memcache_key(exploration_id):
+    """Returns a memcache key for an exploration summary."""
+    return 'exploration-summary:%s' % exploration_id
+
+
+def _get_exploration_metadata_memcache_key(exploration_id):
+    """Returns a memcache key for the metadata of an exploration."""
+    return 'exploration-metadata:%s' % exploration_id
+
+
+def _get_exploration_version_stamp_memcache_key(exploration_id):
+    """Returns the memcache key for the latest version number of an
+    exploration.
+    """
+    return 'exploration-version-stamp:%s' % exploration_id
+
+
+# A hash identifying the code that the learner view data of explorations is
+# computed with. This is computed once per instance; see
+# _get_player_payload_code_version().
+_player_payload_code_version = None
+
+
+def _get_player_payload_code_version():
+    """Returns a hash identifying the code that the learner view data of
+    explorations is computed with, so that stored data computed by other code
+    is not served.
+
+    The hash covers the deployed app version, which changes on every deploy,
+    and the descriptions of all rules, which are included in the data and
+    which can change without the app version changing on a development
+    server.
+    """
+    global _player_payload_code_version
+    if _player_payload_code_version is None:
+        _player_payload_code_version = hashlib.sha1('%s:%s' % (
+            os.environ.get('CURRENT_VERSION_ID', ''),
+            rule_domain.Registry.get_descriptions_hash())).hexdigest()
+    return _player_payload_code_version
+
+
+def _get_player_payload_memcache_key(exploration_id, version):
+    """Returns the memcache key for the learner view data of a version of an
+    exploration.
+    """
+    return 'player-payload:%s:%s:%s' % (
+        exploration_id, version, _get_player_payload_code_version())
+
+
+def _get_exploration_from_local_cache(exploration_id, version=None):
+    """Returns the in-process cached exploration with the given id and
+    version (or the latest version, if version is None), or None if it is
+    missing or may be stale.
+    """
+    stamp_key = _get_exploration_version_stamp_memcache_key(exploration_id)
+    latest_version = memcache_services.get_multi([stamp_key]).get(stamp_key)
+
+    exploration = None
+    if latest_version is not None and (
+            version is None or int(version) <= latest_version):
+        exploration = _EXPLORATION_CACHE.get(
+            (exploration_id, int(version or latest_version)))
+
+    if exploration is None:
+        counters.EXPLORATION_CACHE_MISS.inc()
+    else:
+        counters.EXPLORATION_CACHE_HIT.inc()
+    return exploration
+
+
+def _add_exploration_to_local_cache(exploration, is_latest_version):
+    """Adds a read-only exploration to the in-process cache.
+
+    If this is the latest version of the exploration, the version stamp in
+    memcache is also populated, unless it is already present (in which case
+    it may have been set by a more recent commit).
+    """
+    cache_key = (exploration.id, exploration.version)
+    evicted_keys = _EXPLORATION_CACHE.put(
+        cache_key, exploration, size_bytes=len(
+            cPickle.dumps(exploration, cPickle.HIGHEST_PROTOCOL)))
+    counters.EXPLORATION_CACHE_EVICTION.inc(
+        increment=len([key for key in evicted_keys if key != cache_key]))
+
+    if is_latest_version:
+        memcache_services.add_multi({
+            _get_exploration_version_stamp_memcache_key(exploration.id): (
+                exploration.version)
+        })
+
+
+def _invalidate_exploration_caches(exploration_id, new_version=None):
+    """Clears the cached copies of the latest version of an exploration.
+
+    This evicts the exploration from the in-process cache of this instance
+    and from memcache. The version stamp in memcache is set to new_version,
+    so that other instances stop serving their in-process copies of the
+    previous version. If new_version is None (e.g. because the exploration
+    was deleted), the version stamp is removed instead.
+    """
+    for cache_key in _EXPLORATION_CACHE.keys():
+        if cache_key[0] == exploration_id:
+            _EXPLORATION_CACHE.delete(cache_key)
+
+    stamp_key = _get_exploration_version_stamp_memcache_key(exploration_id)
+    if new_version is None:
+        memcache_services.delete_multi([
+            _get_exploration_memcache_key(exploration_id),
+            _get_exploration_metadata_memcache_key(exploration_id),
+            stamp_key])
+    else:
+        memcache_services.delete_multi([
+            _get_exploration_memcache_key(exploration_id),
+            _get_exploration_metadata_memcache_key(exploration_id)])
+        memcache_services.set_multi({stamp_key: new_version})
+
+
 def get_exploration_from_model(exploration_model):
     return exp_domain.Exploration(
         exploration_model.id, exploration_model.title,
@@ -83,15 +219,36 @@ def get_exploration_summary_from_model(exp_summary_model):
         exp_summary_model.exploration_model_last_updated)
 
 
-def get_exploration_by_id(exploration_id, strict=True, version=None):
-    """Returns a domain object representing an exploration."""
+def get_exploration_by_id(
+        exploration_id, strict=True, version=None, readonly=False):
+    """Returns a domain object representing an exploration.
+
+    If readonly is True, the returned domain object may be shared with other
+    requests served by this instance, and so it must not be modified. This
+    allows it to be served from the in-process exploration cache, which only
+    requires fetching a small version stamp from memcache instead of fetching
+    and unpickling the whole exploration.
+    """
+    if readonly:
+        cached_exploration = _get_exploration_from_local_cache(
+            exploration_id, version=version)
+        if cached_exploration is not None:
+            return cached_exploration
+
     exploration_memcache_key = _get_exploration_memcache_key(
         exploration_id, version=version)
     memcached_exploration = memcache_services.get_multi(
         [exploration_memcache_key]).get(exploration_memcache_key)
 
+    if memcached_exploration == _MISSING_ENTITY_MEMCACHE_VALUE:
+        if not strict:
+            counters.MISSING_EXPLORATION_CACHE_HIT.inc()
+            return None
+        # Let the datastore raise the appropriate error.
+        memcached_exploration = None
+
     if memcached_exploration is not None:
-        return memcached_exploration
+        exploration = memcached_exploration
     else:
         exploration_model = exp_models.ExplorationModel.get(
             exploration_id, strict=strict, version=version)
@@ -99,21 +256,220 @@ def get_exploration_by_id(exploration_id, strict=True, version=None):
             exploration = get_exploration_from_model(exploration_model)
             memcache_services.set_multi({
                 exploration_memcache_key: exploration})
-            return exploration
         else:
             return None
 
+    if readonly:
+        _add_exploration_to_local_cache(
+            exploration, is_latest_version=(version is None))
+    return exploration
+
+
+def _get_load_lease_memcache_key(memcache_key):
+    """Returns the memcache key of the lease held by a request that is loading
+    the value for the given memcache key from the datastore.
+    """
+    return 'load-lease:%s' % memcache_key
+
+
+def _load_with_leases(entity_ids, memcache_key_fn, load_fn):
+    """Loads the values for the given ids, which are not in memcache, while
+    ensuring that concurrent requests (on any instance) do not all load the
+    same ids from the datastore.
+
+    For each id, this request tries to add a short-lived lease to memcache.
+    It calls load_fn (which must add the values it loads to memcache) for the
+    ids whose leases it obtained, and then polls memcache for the values of
+    the other ids, which are being loaded by other requests. Ids whose values
+    do not appear in time, or whose leases disappear without the values
+    appearing (e.g. because the request holding the lease failed, or memcache
+    is unavailable), are passed to load_fn as well.
+
+    Returns a dict mapping those of the given ids that have a value to that
+    value.
+    """
+    memcache_keys = {
+        entity_id: memcache_key_fn(entity_id) for entity_id in entity_ids}
+    lease_keys = {
+        entity_id: _get_load_lease_memcache_key(memcache_key)
+        for (entity_id, memcache_key) in memcache_keys.iteritems()}
+    unleased_keys = set(memcache_services.add_multi({
+        lease_key: True for lease_key in lease_keys.values()
+    }, time=feconf.EXPLORATION_LOAD_LEASE_TTL_SECS))
+
+    leased_ids = [
+        entity_id for entity_id in entity_ids
+        if lease_keys[entity_id] not in unleased_keys]
+    waiting_ids = [
+        entity_id for entity_id in entity_ids
+        if lease_keys[entity_id] in unleased_keys]
+
+    result = {}
+    if leased_ids:
+        try:
+            result.update(load_fn(leased_ids))
+        finally:
+            memcache_services.delete_multi([
+                lease_keys[entity_id] for entity_id in leased_ids])
+
+    ids_to_load = []
+    num_polls = int(
+        feconf.EXPLORATION_LOAD_LEASE_MAX_WAIT_SECS /
+        feconf.EXPLORATION_LOAD_LEASE_POLL_INTERVAL_SECS)
+    for _ in range(num_polls):
+        if not waiting_ids:
+            break
+        time.sleep(feconf.EXPLORATION_LOAD_LEASE_POLL_INTERVAL_SECS)
+
+        memcached_values = memcache_services.get_multi(
+            [memcache_keys[entity_id] for entity_id in waiting_ids] +
+            [lease_keys[entity_id] for entity_id in waiting_ids])
+        still_waiting_ids = []
+        for entity_id in waiting_ids:
+            value = memcached_values.get(memcache_keys[entity_id])
+            if value == _MISSING_ENTITY_MEMCACHE_VALUE:
+                continue
+            elif value is not None:
+                result[entity_id] = value
+            elif lease_keys[entity_id] in memcached_values:
+                still_waiting_ids.append(entity_id)
+            else:
+                ids_to_load.append(entity_id)
+        waiting_ids = still_waiting_ids
+
+    ids_to_load.extend(waiting_ids)
+    if ids_to_load:
+        counters.EXPLORATION_LOAD_LEASE_FALLBACKS.inc(
+            increment=len(ids_to_load))
+        result.update(load_fn(ids_to_load))
+    return result
+
+
+def _get_multi_with_caching(
+        entity_ids, memcache_key_fn, model_class, domain_object_fn):
+    """Returns a dict mapping those of the given ids that correspond to an
+    undeleted entity of the given model class to the corresponding domain
+    object.
+
+    Domain objects are looked up in memcache first, under the keys returned by
+    memcache_key_fn. Ids that are missing from memcache are loaded from the
+    datastore in batches, and concurrent loads of the same id by different
+    requests are coordinated by leases in memcache (see _load_with_leases()).
+    Loaded domain objects are added to memcache, as is the fact that an id has
+    no entity, so that later lookups of missing ids do not reach the
+    datastore either.
+    """
+    memcache_keys = [memcache_key_fn(entity_id) for entity_id in entity_ids]
+    memcached_values = memcache_services.get_multi(memcache_keys)
+
+    result = {}
+    uncached_ids = []
+    for entity_id, memcache_key in zip(entity_ids, memcache_keys):
+        value = memcached_values.get(memcache_key)
+        if value is None:
+            uncached_ids.append(entity_id)
+        elif value == _MISSING_ENTITY_MEMCACHE_VALUE:
+            counters.MISSING_EXPLORATION_CACHE_HIT.inc()
+        else:
+            result[entity_id] = value
+
+    def _load_from_datastore(ids_to_load):
+        loaded_objects = {}
+        for ind in range(
+                0, len(ids_to_load), feconf.MAX_ENTITIES_PER_DATASTORE_GET):
+            ids_in_batch = ids_to_load[
+                ind : ind + feconf.MAX_ENTITIES_PER_DATASTORE_GET]
+            for entity_id, model in zip(
+                    ids_in_batch, model_class.get_multi(ids_in_batch)):
+                if model is not None:
+                    loaded_objects[entity_id] = domain_object_fn(model)
+
+        if loaded_objects:
+            memcache_services.set_multi({
+                memcache_key_fn(entity_id): domain_object
+                for (entity_id, domain_object) in loaded_objects.iteritems()})
+        missing_ids = [
+            entity_id for entity_id in ids_to_load
+            if entity_id not in loaded_objects]
+        if missing_ids:
+            # Use add rather than set, so that an entity that was created
+            # since the datastore read above is not masked.
+            memcache_services.add_multi({
+                memcache_key_fn(entity_id): _MISSING_ENTITY_MEMCACHE_VALUE
+                for entity_id in missing_ids
+            }, time=feconf.MISSING_EXPLORATION_MEMCACHE_TTL_SECS)
+        return loaded_objects
+
+    if uncached_ids:
+        result.update(_load_with_leases(
+            uncached_ids, memcache_key_fn, _load_from_datastore))
+    return result
+
 
 def get_exploration_summary_by_id(exploration_id):
-    """Returns a domain object representing an exploration summary."""
-    # TODO(msl): Maybe use memcache similarly to get_exploration_by_id.
-    exp_summary_model = exp_models.ExpSummaryModel.get(
-        exploration_id)
-    if exp_summary_model:
-        exp_summary = get_exploration_summary_from_model(exp_summary_model)
-        return exp_summary
-    else:
-        return None
+    """Returns a domain object representing an exploration summary, or None
+    if there is no summary for the given exploration id.
+    """
+    return get_multiple_exploration_summaries_by_id(
+        [exploration_id]).get(exploration_id)
+
+
+def get_multiple_exploration_summaries_by_id(exp_ids):
+    """Returns a dict of domain objects representing the summaries of the
+    explorations with the given ids, keyed by exploration id. Ids with no
+    corresponding summary are not included in the returned dict.
+    """
+    return _get_multi_with_caching(
+        list(set(exp_ids)), _get_exploration_summary_memcache_key,
+        exp_models.ExpSummaryModel, get_exploration_summary_from_model)
+
+
+def _get_exploration_metadata_from_summary_model(exp_summary_model):
+    return {
+        'title': exp_summary_model.title,
+        'category': exp_summary_model.category,
+        'version': exp_summary_model.version,
+        'last_updated': exp_summary_model.exploration_model_last_updated,
+    }
+
+
+def get_multiple_exploration_metadata_by_id(exp_ids):
+    """Returns a dict mapping those of the given ids that correspond to an
+    undeleted exploration to a dict with the keys 'title', 'category',
+    'version' and 'last_updated' of the latest version of that exploration.
+
+    Use this instead of fetching explorations when only these fields are
+    needed. The metadata is read from the exploration summaries and cached in
+    memcache on its own, so the states of the explorations are not loaded.
+    Explorations that do not have a summary yet are loaded in full instead.
+    """
+    exp_ids = list(set(exp_ids))
+    result = _get_multi_with_caching(
+        exp_ids, _get_exploration_metadata_memcache_key,
+        exp_models.ExpSummaryModel,
+        _get_exploration_metadata_from_summary_model)
+
+    ids_without_summaries = [
+        exp_id for exp_id in exp_ids if exp_id not in result]
+    if ids_without_summaries:
+        for exploration in get_multiple_explorations_by_id(
+                ids_without_summaries, strict=False).values():
+            result[exploration.id] = {
+                'title': exploration.title,
+                'category': exploration.category,
+                'version': exploration.version,
+                'last_updated': exploration.last_updated,
+            }
+    return result
+
+
+def get_exploration_metadata_by_id(exploration_id):
+    """Returns the metadata of an exploration, as described in
+    get_multiple_exploration_metadata_by_id(), or None if there is no
+    undeleted exploration with the given id.
+    """
+    return get_multiple_exploration_metadata_by_id(
+        [exploration_id]).get(exploration_id)
 
 
 def get_multiple_explorations_by_id(exp_ids, strict=True):
@@ -121,47 +477,60 @@ def get_multiple_explorations_by_id(exp_ids, strict=True):
     given ids as keys. If an exp_id is not present it is not included in the
     return dict.
     """
-    exp_ids = set(exp_ids)
-    result = {}
-    uncached = []
-    memcache_keys = [_get_exploration_memcache_key(i) for i in exp_ids]
-    cache_result = memcache_services.get_multi(memcache_keys)
-
-    for exp_obj in cache_result.itervalues():
-        result[exp_obj.id] = exp_obj
-
-    for _id in exp_ids:
-        if _id not in result:
-            uncached.append(_id)
-
-    db_exp_models = exp_models.ExplorationModel.get_multi(uncached)
-    db_results_dict = {}
-    not_found = []
-    for i, eid in enumerate(uncached):
-        model = db_exp_models[i]
-        if model:
-            exploration = get_exploration_from_model(model)
-            db_results_dict[eid] = exploration
-        else:
-            logging.info('Tried to fetch exploration with id %s, but no such '
-                         'exploration exists in the datastore' % eid)
-            not_found.append(eid)
+    result = _get_multi_with_caching(
+        list(set(exp_ids)), _get_exploration_memcache_key,
+        exp_models.ExplorationModel, get_exploration_from_model)
+
+    not_found = [eid for eid in set(exp_ids) if eid not in result]
+    for eid in not_found:
+        logging.info('Tried to fetch exploration with id %s, but no such '
+                     'exploration exists in the datastore' % eid)
 
     if strict and not_found:
         raise ValueError(
             'Couldn\'t find explorations with the following ids:\n%s'
             % '\n'.join(not_found))
 
-    cache_update = {
-        eid: db_results_dict[eid] for eid in db_results_dict.iterkeys()
-        if db_results_dict[eid] is not None
-    }
+    return result
 
-    if cache_update:
-        memcache_services.set_multi(cache_update)
 
-    result.update(db_results_dict)
-    return result
+def get_player_payload_json(exploration):
+    """Returns the JSON encoding, using utils.JSONEncoderForHTML, of the dict
+    returned by exploration.to_player_dict().
+
+    Apart from the code that computes it, this only depends on the id and
+    version of the exploration, so it is computed at most once per version
+    and deployment: the result is stored in memcache and in the datastore,
+    and subsequently served from there.
+    """
+    memcache_key = _get_player_payload_memcache_key(
+        exploration.id, exploration.version)
+    payload = memcache_services.get_multi([memcache_key]).get(memcache_key)
+    if payload is not None:
+        return payload
+
+    code_version = _get_player_payload_code_version()
+    payload = exp_models.ExplorationPlayerPayloadModel.get_payload(
+        exploration.id, exploration.version, code_version)
+    if payload is None:
+        payload = json.dumps(
+            exploration.to_player_dict(), cls=utils.JSONEncoderForHTML)
+        exp_models.ExplorationPlayerPayloadModel.create(
+            exploration.id, exploration.version, code_version, payload)
+
+    memcache_services.set_multi({memcache_key: payload})
+    return payload
+
+
+def _delete_player_payloads(exploration_id, latest_version):
+    """Deletes the stored learner view data of all versions of an
+    exploration, up to and including latest_version.
+    """
+    exp_models.ExplorationPlayerPayloadModel.delete_all_for_exploration(
+        exploration_id)
+    memcache_services.delete_multi([
+        _get_player_payload_memcache_key(exploration_id, version)
+        for version in range(1, latest_version + 1)])
 
 
 def get_new_exploration_id():
@@ -188,19 +557,17 @@ def get_exploration_titles_and_categories(exp_ids):
     Any invalid exp_ids will not be included in the return dict. No error will
     be raised.
     """
-    explorations = [
-        (get_exploration_from_model(e) if e else None)
-        for e in exp_models.ExplorationModel.get_multi(exp_ids)]
+    exp_metadata = get_multiple_exploration_metadata_by_id(exp_ids)
 
     result = {}
-    for ind, exploration in enumerate(explorations):
-        if exploration is None:
+    for exp_id in exp_ids:
+        if exp_id not in exp_metadata:
             logging.error(
                 'Could not find exploration corresponding to id')
         else:
-            result[exploration.id] = {
-                'title': exploration.title,
-                'category': exploration.category,
+            result[exp_id] = {
+                'title': exp_metadata[exp_id]['title'],
+                'category': exp_metadata[exp_id]['category'],
             }
     return result
 
@@ -222,9 +589,8 @@ def get_exploration_summaries_matching_ids(exp_ids):
     summary domain objects (or None if the corresponding summary does not
     exist).
     """
-    return [
-        (get_exploration_summary_from_model(model) if model else None)
-        for model in exp_models.ExpSummaryModel.get_multi(exp_ids)]
+    exp_summaries = get_multiple_exploration_summaries_by_id(exp_ids)
+    return [exp_summaries.get(exp_id) for exp_id in exp_ids]
 
 
 def get_exploration_summaries_matching_query(query_string, cursor=None):
@@ -237,23 +603,23 @@ def get_exploration_summaries_matching_query(query_string, cursor=None):
     a search cursor.
     """
     MAX_ITERATIONS = 10
-    summary_models = []
+    exp_summaries = []
 
     for i in range(MAX_ITERATIONS):
-        remaining_to_fetch = feconf.GALLERY_PAGE_SIZE - len(summary_models)
+        remaining_to_fetch = feconf.GALLERY_PAGE_SIZE - len(exp_summaries)
 
         exp_ids, search_cursor = search_explorations(
             query_string, remaining_to_fetch, cursor=cursor)
 
         invalid_exp_ids = []
-        for ind, model in enumerate(
-                exp_models.ExpSummaryModel.get_multi(exp_ids)):
-            if model is not None:
-                summary_models.append(model)
+        exp_summaries_by_id = get_multiple_exploration_summaries_by_id(exp_ids)
+        for exp_id in exp_ids:
+            if exp_id in exp_summaries_by_id:
+                exp_summaries.append(exp_summaries_by_id[exp_id])
             else:
-                invalid_exp_ids.append(exp_ids[ind])
+                invalid_exp_ids.append(exp_id)
 
-        if len(summary_models) == feconf.GALLERY_PAGE_SIZE or (
+        if len(exp_summaries) == feconf.GALLERY_PAGE_SIZE or (
                 search_cursor is None):
             break
         else:
@@ -261,16 +627,13 @@ def get_exploration_summaries_matching_query(query_string, cursor=None):
                 'Search index contains stale exploration ids: %s' %
                 ', '.join(invalid_exp_ids))
 
-    if (len(summary_models) < feconf.GALLERY_PAGE_SIZE
+    if (len(exp_summaries) < feconf.GALLERY_PAGE_SIZE
             and search_cursor is not None):
         logging.error(
             'Could not fulfill search request for query string %s; at least '
             '%s retries were needed.' % (query_string, MAX_ITERATIONS))
 
-    return ([
-        get_exploration_summary_from_model(summary_model)
-        for summary_model in summary_models
-    ], search_cursor)
+    return (exp_summaries, search_cursor)
 
 
 def get_non_private_exploration_summaries():
@@ -309,14 +672,19 @@ def count_explorations():
 
 
 # Methods for exporting states and explorations to other formats.
-def export_to_zip_file(exploration_id, version=None):
-    """Returns a ZIP archive of the exploration."""
-    exploration = get_exploration_by_id(exploration_id, version=version)
-    yaml_repr = exploration.to_yaml()
+def write_zip_file(exploration_id, output_file, version=None):
+    """Writes a ZIP archive of the exploration to the given file-like object.
 
-    o = StringIO.StringIO()
-    with zipfile.ZipFile(o, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr('%s.yaml' % exploration.title, yaml_repr)
+    The YAML representation of the exploration and its assets are compressed
+    and written one at a time, so output_file need only support write() and
+    tell() (see utils.WriteOnlyStream); it does not need to be seekable.
+    """
+    exploration = get_exploration_by_id(
+        exploration_id, version=version, readonly=True)
+
+    with zipfile.ZipFile(
+            output_file, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('%s.yaml' % exploration.title, exploration.to_yaml())
 
         fs = fs_domain.AbstractFileSystem(
             fs_domain.ExplorationFileSystem(exploration_id))
@@ -333,6 +701,11 @@ def export_to_zip_file(exploration_id, version=None):
             unicode_filepath = str_filepath.decode('utf-8')
             zf.writestr(unicode_filepath, file_contents)
 
+
+def export_to_zip_file(exploration_id, version=None):
+    """Returns a ZIP archive of the exploration."""
+    o = StringIO.StringIO()
+    write_zip_file(exploration_id, o, version=version)
     return o.getvalue()
 
 
@@ -349,69 +722,203 @@ def export_states_to_yaml(exploration_id, version=None, width=80):
 
 
 # Repository SAVE and DELETE methods.
-def apply_change_list(exploration_id, change_list):
-    """Applies a changelist to a pristine exploration and returns the result.
+def _apply_change(exploration, change):
+    """Applies an ExplorationChange object to the given exploration."""
+    if change.cmd == 'add_state':
+        exploration.add_states([change.state_name])
+    elif change.cmd == 'rename_state':
+        exploration.rename_state(
+            change.old_state_name, change.new_state_name)
+    elif change.cmd == 'delete_state':
+        exploration.delete_state(change.state_name)
+    elif change.cmd == 'edit_state_property':
+        state = exploration.get_mutable_state(change.state_name)
+        if (change.property_name ==
+                exp_domain.STATE_PROPERTY_PARAM_CHANGES):
+            state.update_param_changes(change.new_value)
+        elif change.property_name == exp_domain.STATE_PROPERTY_CONTENT:
+            state.update_content(change.new_value)
+        elif (change.property_name ==
+                exp_domain.STATE_PROPERTY_INTERACTION_ID):
+            state.update_interaction_id(change.new_value)
+        elif (change.property_name ==
+                exp_domain.STATE_PROPERTY_INTERACTION_CUST_ARGS):
+            state.update_interaction_customization_args(
+                change.new_value)
+        elif (change.property_name ==
+                exp_domain.STATE_PROPERTY_INTERACTION_HANDLERS):
+            state.update_interaction_handlers(change.new_value)
+            exploration.invalidate_dest_index()
+    elif change.cmd == 'edit_exploration_property':
+        if change.property_name == 'title':
+            exploration.update_title(change.new_value)
+        elif change.property_name == 'category':
+            exploration.update_category(change.new_value)
+        elif change.property_name == 'objective':
+            exploration.update_objective(change.new_value)
+        elif change.property_name == 'language_code':
+            exploration.update_language_code(change.new_value)
+        elif change.property_name == 'skill_tags':
+            exploration.update_skill_tags(change.new_value)
+        elif change.property_name == 'blurb':
+            exploration.update_blurb(change.new_value)
+        elif change.property_name == 'author_notes':
+            exploration.update_author_notes(change.new_value)
+        elif change.property_name == 'param_specs':
+            exploration.update_param_specs(change.new_value)
+        elif change.property_name == 'param_changes':
+            exploration.update_param_changes(change.new_value)
+        elif change.property_name == 'default_skin_id':
+            exploration.update_default_skin_id(change.new_value)
+        elif change.property_name == 'init_state_name':
+            exploration.update_init_state_name(change.new_value)
+
+
+class _ChangeListSummaryBuilder(object):
+    """Builds the summary of a change list described in
+    get_summary_of_change_list(), one change at a time.
+    """
 
-    Each entry in change_list is a dict that represents an ExplorationChange
-    object.
+    def __init__(self, base_state_names):
+        """Args:
+          - base_state_names: list of str. The names of the states of the
+              exploration that the change list is applied to.
+        """
+        self._exploration_property_changes = {}
+        self._state_property_changes = {}
+        self._changed_states = []
+        self._added_states = []
+        self._deleted_states = []
+        self._original_state_names = {
+            state_name: state_name for state_name in base_state_names
+        }
+
+    def add_change(self, change):
+        """Updates the summary with an ExplorationChange object."""
+        state_property_changes = self._state_property_changes
+        original_state_names = self._original_state_names
+
+        if change.cmd == 'add_state':
+            if change.state_name in self._changed_states:
+                return
+            elif change.state_name in self._deleted_states:
+                self._changed_states.append(change.state_name)
+                del state_property_changes[change.state_name]
+                self._deleted_states.remove(change.state_name)
+            else:
+                self._added_states.append(change.state_name)
+                original_state_names[change.state_name] = change.state_name
+        elif change.cmd == 'rename_state':
+            orig_state_name = original_state_names[change.old_state_name]
+            original_state_names[change.new_state_name] = orig_state_name
+
+            if orig_state_name in self._changed_states:
+                return
+
+            if orig_state_name not in state_property_changes:
+                state_property_changes[orig_state_name] = {}
+            if 'name' not in state_property_changes[orig_state_name]:
+                state_property_changes[orig_state_name]['name'] = {
+                    'old_value': change.old_state_name
+                }
+            state_property_changes[orig_state_name]['name']['new_value'] = (
+                change.new_state_name)
+        elif change.cmd == 'delete_state':
+            orig_state_name = original_state_names[change.state_name]
+            if orig_state_name in self._changed_states:
+                return
+            elif orig_state_name in self._added_states:
+                self._added_states.remove(orig_state_name)
+            else:
+                self._deleted_states.append(orig_state_name)
+        elif change.cmd == 'edit_state_property':
+            orig_state_name = original_state_names[change.state_name]
+            if orig_state_name in self._changed_states:
+                return
+
+            property_name = change.property_name
+
+            if orig_state_name not in state_property_changes:
+                state_property_changes[orig_state_name] = {}
+            if property_name not in state_property_changes[orig_state_name]:
+                state_property_changes[orig_state_name][property_name] = {
+                    'old_value': change.old_value
+                }
+            state_property_changes[orig_state_name][property_name][
+                'new_value'] = change.new_value
+        elif change.cmd == 'edit_exploration_property':
+            property_name = change.property_name
+
+            if property_name not in self._exploration_property_changes:
+                self._exploration_property_changes[property_name] = {
+                    'old_value': change.old_value
+                }
+            self._exploration_property_changes[property_name]['new_value'] = (
+                change.new_value)
+
+    def get_summary(self):
+        """Returns the summary of the changes added so far."""
+        unchanged_exploration_properties = []
+        for property_name in self._exploration_property_changes:
+            property_changes = self._exploration_property_changes[
+                property_name]
+            if property_changes['old_value'] == property_changes['new_value']:
+                unchanged_exploration_properties.append(property_name)
+        for property_name in unchanged_exploration_properties:
+            del self._exploration_property_changes[property_name]
+
+        unchanged_state_names = []
+        for state_name in self._state_property_changes:
+            unchanged_state_properties = []
+            changes = self._state_property_changes[state_name]
+            for property_name in changes:
+                if (changes[property_name]['old_value'] ==
+                        changes[property_name]['new_value']):
+                    unchanged_state_properties.append(property_name)
+            for property_name in unchanged_state_properties:
+                del changes[property_name]
+
+            if len(changes) == 0:
+                unchanged_state_names.append(state_name)
+        for state_name in unchanged_state_names:
+            del self._state_property_changes[state_name]
+
+        return {
+            'exploration_property_changes': self._exploration_property_changes,
+            'state_property_changes': self._state_property_changes,
+            'changed_states': self._changed_states,
+            'added_states': self._added_states,
+            'deleted_states': self._deleted_states,
+        }
+
+
+def _apply_change_list(exploration_id, change_list, include_summary):
+    """Applies a changelist to a pristine exploration.
 
     Returns:
-      the resulting exploration domain object.
+      a 2-tuple consisting of the resulting exploration domain object and,
+      if include_summary is True, the summary of the change list (as returned
+      by get_summary_of_change_list()), or None otherwise.
     """
-    exploration = get_exploration_by_id(exploration_id)
+    # Only the states that are changed are copied from the (read-only)
+    # cached exploration.
+    exploration = get_exploration_by_id(
+        exploration_id, readonly=True).clone_copy_on_write()
+    summary_builder = (
+        _ChangeListSummaryBuilder(exploration.states.keys())
+        if include_summary else None)
     try:
         changes = [exp_domain.ExplorationChange(change_dict)
                    for change_dict in change_list]
 
         for change in changes:
-            if change.cmd == 'add_state':
-                exploration.add_states([change.state_name])
-            elif change.cmd == 'rename_state':
-                exploration.rename_state(
-                    change.old_state_name, change.new_state_name)
-            elif change.cmd == 'delete_state':
-                exploration.delete_state(change.state_name)
-            elif change.cmd == 'edit_state_property':
-                state = exploration.states[change.state_name]
-                if (change.property_name ==
-                        exp_domain.STATE_PROPERTY_PARAM_CHANGES):
-                    state.update_param_changes(change.new_value)
-                elif change.property_name == exp_domain.STATE_PROPERTY_CONTENT:
-                    state.update_content(change.new_value)
-                elif (change.property_name ==
-                        exp_domain.STATE_PROPERTY_INTERACTION_ID):
-                    state.update_interaction_id(change.new_value)
-                elif (change.property_name ==
-                        exp_domain.STATE_PROPERTY_INTERACTION_CUST_ARGS):
-                    state.update_interaction_customization_args(
-                        change.new_value)
-                elif (change.property_name ==
-                        exp_domain.STATE_PROPERTY_INTERACTION_HANDLERS):
-                    state.update_interaction_handlers(change.new_value)
-            elif change.cmd == 'edit_exploration_property':
-                if change.property_name == 'title':
-                    exploration.update_title(change.new_value)
-                elif change.property_name == 'category':
-                    exploration.update_category(change.new_value)
-                elif change.property_name == 'objective':
-                    exploration.update_objective(change.new_value)
-                elif change.property_name == 'language_code':
-                    exploration.update_language_code(change.new_value)
-                elif change.property_name == 'skill_tags':
-                    exploration.update_skill_tags(change.new_value)
-                elif change.property_name == 'blurb':
-                    exploration.update_blurb(change.new_value)
-                elif change.property_name == 'author_notes':
-                    exploration.update_author_notes(change.new_value)
-                elif change.property_name == 'param_specs':
-                    exploration.update_param_specs(change.new_value)
-                elif change.property_name == 'param_changes':
-                    exploration.update_param_changes(change.new_value)
-                elif change.property_name == 'default_skin_id':
-                    exploration.update_default_skin_id(change.new_value)
-                elif change.property_name == 'init_state_name':
-                    exploration.update_init_state_name(change.new_value)
-        return exploration
+            _apply_change(exploration, change)
+            if summary_builder is not None:
+                summary_builder.add_change(change)
+
+        return (
+            exploration,
+            summary_builder.get_summary() if summary_builder else None)
 
     except Exception as e:
         logging.error(
@@ -421,6 +928,31 @@ def apply_change_list(exploration_id, change_list):
         raise
 
 
+def apply_change_list(exploration_id, change_list):
+    """Applies a changelist to a pristine exploration and returns the result.
+
+    Each entry in change_list is a dict that represents an ExplorationChange
+    object.
+
+    Returns:
+      the resulting exploration domain object. Its unchanged states may be
+      shared with other explorations (see Exploration.clone_copy_on_write()).
+    """
+    return _apply_change_list(exploration_id, change_list, False)[0]
+
+
+def apply_change_list_and_get_summary(exploration_id, change_list):
+    """Applies a changelist to a pristine exploration, in the same way as
+    apply_change_list(), and summarizes it in the same pass, in the same way
+    as get_summary_of_change_list().
+
+    Returns:
+      a 2-tuple consisting of the resulting exploration domain object and the
+      summary dict.
+    """
+    return _apply_change_list(exploration_id, change_list, True)
+
+
 def get_summary_of_change_list(base_exploration, change_list):
     """Applies a changelist to a pristine exploration and returns a summary.
 
@@ -448,113 +980,12 @@ def get_summary_of_change_list(base_exploration, change_list):
     # TODO(sll): This really needs tests, especially the diff logic. Probably
     # worth comparing with the actual changed exploration.
 
-    # Ensure that the original exploration does not get altered.
-    exploration = copy.deepcopy(base_exploration)
-
-    changes = [
-        exp_domain.ExplorationChange(change_dict)
-        for change_dict in change_list]
-
-    exploration_property_changes = {}
-    state_property_changes = {}
-    changed_states = []
-    added_states = []
-    deleted_states = []
-
-    original_state_names = {
-        state_name: state_name for state_name in exploration.states.keys()
-    }
-
-    for change in changes:
-        if change.cmd == 'add_state':
-            if change.state_name in changed_states:
-                continue
-            elif change.state_name in deleted_states:
-                changed_states.append(change.state_name)
-                del state_property_changes[change.state_name]
-                deleted_states.remove(change.state_name)
-            else:
-                added_states.append(change.state_name)
-                original_state_names[change.state_name] = change.state_name
-        elif change.cmd == 'rename_state':
-            orig_state_name = original_state_names[change.old_state_name]
-            original_state_names[change.new_state_name] = orig_state_name
-
-            if orig_state_name in changed_states:
-                continue
-
-            if orig_state_name not in state_property_changes:
-                state_property_changes[orig_state_name] = {}
-            if 'name' not in state_property_changes[orig_state_name]:
-                state_property_changes[orig_state_name]['name'] = {
-                    'old_value': change.old_state_name
-                }
-            state_property_changes[orig_state_name]['name']['new_value'] = (
-                change.new_state_name)
-        elif change.cmd == 'delete_state':
-            orig_state_name = original_state_names[change.state_name]
-            if orig_state_name in changed_states:
-                continue
-            elif orig_state_name in added_states:
-                added_states.remove(orig_state_name)
-            else:
-                deleted_states.append(orig_state_name)
-        elif change.cmd == 'edit_state_property':
-            orig_state_name = original_state_names[change.state_name]
-            if orig_state_name in changed_states:
-                continue
-
-            property_name = change.property_name
-
-            if orig_state_name not in state_property_changes:
-                state_property_changes[orig_state_name] = {}
-            if property_name not in state_property_changes[orig_state_name]:
-                state_property_changes[orig_state_name][property_name] = {
-                    'old_value': change.old_value
-                }
-            state_property_changes[orig_state_name][property_name][
-                'new_value'] = change.new_value
-        elif change.cmd == 'edit_exploration_property':
-            property_name = change.property_name
-
-            if property_name not in exploration_property_changes:
-                exploration_property_changes[property_name] = {
-                    'old_value': change.old_value
-                }
-            exploration_property_changes[property_name]['new_value'] = (
-                change.new_value)
-
-    unchanged_exploration_properties = []
-    for property_name in exploration_property_changes:
-        if (exploration_property_changes[property_name]['old_value'] ==
-                exploration_property_changes[property_name]['new_value']):
-            unchanged_exploration_properties.append(property_name)
-    for property_name in unchanged_exploration_properties:
-        del exploration_property_changes[property_name]
-
-    unchanged_state_names = []
-    for state_name in state_property_changes:
-        unchanged_state_properties = []
-        changes = state_property_changes[state_name]
-        for property_name in changes:
-            if (changes[property_name]['old_value'] ==
-                    changes[property_name]['new_value']):
-                unchanged_state_properties.append(property_name)
-        for property_name in unchanged_state_properties:
-            del changes[property_name]
-
-        if len(changes) == 0:
-            unchanged_state_names.append(state_name)
-    for state_name in unchanged_state_names:
-        del state_property_changes[state_name]
-
-    return {
-        'exploration_property_changes': exploration_property_changes,
-        'state_property_changes': state_property_changes,
-        'changed_states': changed_states,
-        'added_states': added_states,
-        'deleted_states': deleted_states,
-    }
+    # Only the state names of the original exploration are needed, so it does
+    # not need to be copied.
+    summary_builder = _ChangeListSummaryBuilder(base_exploration.states.keys())
+    for change_dict in change_list:
+        summary_builder.add_change(exp_domain.ExplorationChange(change_dict))
+    return summary_builder.get_summary()
 
 
 def _save_exploration(
@@ -566,7 +997,8 @@ def _save_exploration(
     """
     if change_list is None:
         change_list = []
-    exploration_rights = rights_manager.get_exploration_rights(exploration.id)
+    exploration_rights = rights_manager.get_exploration_rights(
+        exploration.id, readonly=True)
     if exploration_rights.status != rights_manager.EXPLORATION_STATUS_PRIVATE:
         exploration.validate(strict=True)
     else:
@@ -606,8 +1038,12 @@ def _save_exploration(
 
     exploration_model.commit(
         committer_id, commit_message, change_list)
-    memcache_services.delete(_get_exploration_memcache_key(exploration.id))
+    _invalidate_exploration_caches(
+        exploration.id, new_version=exploration_model.version)
     event_services.ExplorationContentChangeEventHandler.record(exploration.id)
+    recent_updates_services.record_exploration_commit(
+        exploration.id, exploration_model.title, committer_id, commit_message,
+        exploration_model.last_updated)
     index_explorations_given_ids([exploration.id])
 
     exploration.version += 1
@@ -642,7 +1078,11 @@ def _create_exploration(
         param_changes=exploration.param_change_dicts,
     )
     model.commit(committer_id, commit_message, commit_cmds)
+    _invalidate_exploration_caches(exploration.id, new_version=model.version)
     event_services.ExplorationContentChangeEventHandler.record(exploration.id)
+    recent_updates_services.record_exploration_commit(
+        exploration.id, model.title, committer_id, commit_message,
+        model.last_updated)
     exploration.version += 1
     create_exploration_summary(exploration.id)
 
@@ -674,16 +1114,28 @@ def delete_exploration(committer_id, exploration_id, force_deletion=False):
         exploration_id)
     exploration_rights_model.delete(
         committer_id, '', force_deletion=force_deletion)
+    rights_manager.invalidate_exploration_rights_caches(exploration_id)
 
     exploration_model = exp_models.ExplorationModel.get(exploration_id)
     exploration_model.delete(
         committer_id, feconf.COMMIT_MESSAGE_EXPLORATION_DELETED,
         force_deletion=force_deletion)
 
+    # The ids of deleted explorations may be reused, and the versions of the
+    # new exploration would then clash with those of the deleted one.
+    _delete_player_payloads(exploration_id, exploration_model.version)
+
+    if force_deletion:
+        recent_updates_services.delete_activity_feed(exploration_id)
+    else:
+        recent_updates_services.record_exploration_commit(
+            exploration_id, exploration_model.title, committer_id,
+            feconf.COMMIT_MESSAGE_EXPLORATION_DELETED,
+            exploration_model.last_updated, is_deleted=True)
+
     # This must come after the exploration is retrieved. Otherwise the memcache
     # key will be reinstated.
-    exploration_memcache_key = _get_exploration_memcache_key(exploration_id)
-    memcache_services.delete(exploration_memcache_key)
+    _invalidate_exploration_caches(exploration_id)
 
     #delete the exploration from search.
     delete_documents_from_search_index([exploration_id])
@@ -693,44 +1145,59 @@ def delete_exploration(committer_id, exploration_id, force_deletion=False):
 
 
 # Operations on exploration snapshots.
+def _get_changelist_summary_memcache_key(
+        exploration_id, version_number, change_list):
+    """Returns a memcache key for the auto-generated summary of a change list
+    that was applied to the given version of an exploration.
+    """
+    return 'changelist-summary:%s:%s:%s' % (
+        exploration_id, version_number,
+        hashlib.md5(json.dumps(change_list, sort_keys=True)).hexdigest())
+
+
 def _get_simple_changelist_summary(
         exploration_id, version_number, change_list):
     """Returns an auto-generated changelist summary for the history logs."""
-    # TODO(sll): Get this from memcache where possible. It won't change, so we
-    # can keep it there indefinitely.
-
-    base_exploration = get_exploration_by_id(
-        exploration_id, version=version_number)
     if (len(change_list) == 1 and change_list[0]['cmd'] in
             ['create_new', 'AUTO_revert_version_number']):
         # An automatic summary is not needed here, because the original commit
         # message is sufficiently descriptive.
         return ''
-    else:
-        full_summary = get_summary_of_change_list(
-            base_exploration, change_list)
-
-        short_summary_fragments = []
-        if full_summary['added_states']:
-            short_summary_fragments.append(
-                'added \'%s\'' % '\', \''.join(full_summary['added_states']))
-        if full_summary['deleted_states']:
-            short_summary_fragments.append(
-                'deleted \'%s\'' % '\', \''.join(
-                    full_summary['deleted_states']))
-        if (full_summary['changed_states'] or
-                full_summary['state_property_changes']):
-            affected_states = (
-                full_summary['changed_states'] +
-                full_summary['state_property_changes'].keys())
-            short_summary_fragments.append(
-                'edited \'%s\'' % '\', \''.join(affected_states))
-        if full_summary['exploration_property_changes']:
-            short_summary_fragments.append(
-                'edited exploration properties %s' % ', '.join(
-                    full_summary['exploration_property_changes'].keys()))
-
-        return '; '.join(short_summary_fragments)
+
+    # The summary never changes, so it is kept in memcache indefinitely.
+    memcache_key = _get_changelist_summary_memcache_key(
+        exploration_id, version_number, change_list)
+    summary = memcache_services.get_multi([memcache_key]).get(memcache_key)
+    if summary is not None:
+        return summary
+
+    base_exploration = get_exploration_by_id(
+        exploration_id, version=version_number, readonly=True)
+    full_summary = get_summary_of_change_list(base_exploration, change_list)
+
+    short_summary_fragments = []
+    if full_summary['added_states']:
+        short_summary_fragments.append(
+            'added \'%s\'' % '\', \''.join(full_summary['added_states']))
+    if full_summary['deleted_states']:
+        short_summary_fragments.append(
+            'deleted \'%s\'' % '\', \''.join(
+                full_summary['deleted_states']))
+    if (full_summary['changed_states'] or
+            full_summary['state_property_changes']):
+        affected_states = (
+            full_summary['changed_states'] +
+            full_summary['state_property_changes'].keys())
+        short_summary_fragments.append(
+            'edited \'%s\'' % '\', \''.join(affected_states))
+    if full_summary['exploration_property_changes']:
+        short_summary_fragments.append(
+            'edited exploration properties %s' % ', '.join(
+                full_summary['exploration_property_changes'].keys()))
+
+    summary = '; '.join(short_summary_fragments)
+    memcache_services.set_multi({memcache_key: summary})
+    return summary
 
 
 def get_exploration_snapshots_metadata(exploration_id):
@@ -850,12 +1317,18 @@ def _save_exploration_summary(exp_summary):
     )
 
     exp_summary_model.put()
+    memcache_services.delete_multi([
+        _get_exploration_summary_memcache_key(exp_summary.id),
+        _get_exploration_metadata_memcache_key(exp_summary.id)])
 
 
 def delete_exploration_summary(exploration_id, force_deletion=False):
     """Delete an exploration summary model."""
 
     exp_models.ExpSummaryModel.get(exploration_id).delete()
+    memcache_services.delete_multi([
+        _get_exploration_summary_memcache_key(exploration_id),
+        _get_exploration_metadata_memcache_key(exploration_id)])
 
 
 def revert_exploration(
@@ -879,16 +1352,20 @@ def revert_exploration(
     # change.
     exploration = get_exploration_by_id(
         exploration_id, version=revert_to_version)
-    exploration_rights = rights_manager.get_exploration_rights(exploration.id)
+    exploration_rights = rights_manager.get_exploration_rights(
+        exploration.id, readonly=True)
     if exploration_rights.status != rights_manager.EXPLORATION_STATUS_PRIVATE:
         exploration.validate(strict=True)
     else:
         exploration.validate()
 
-    exploration_model.revert(
-        committer_id, 'Reverted exploration to version %s' % revert_to_version,
-        revert_to_version)
-    memcache_services.delete(_get_exploration_memcache_key(exploration_id))
+    commit_message = 'Reverted exploration to version %s' % revert_to_version
+    exploration_model.revert(committer_id, commit_message, revert_to_version)
+    _invalidate_exploration_caches(
+        exploration_id, new_version=exploration_model.version)
+    recent_updates_services.record_exploration_commit(
+        exploration_id, exploration_model.title, committer_id, commit_message,
+        exploration_model.last_updated)
 
     update_exploration_summary(exploration_id)
 
@@ -1046,20 +1523,17 @@ def _exp_rights_to_search_dict(rights):
     return doc
 
 
-def _should_index(exp):
-    rights = rights_manager.get_exploration_rights(exp.id)
+def _should_index(rights):
     return rights.status != rights_manager.EXPLORATION_STATUS_PRIVATE
 
 
-def _get_search_rank(exp_id):
+def _get_search_rank(exploration, rights):
     """Returns an integer determining the document's rank in search.
 
     Featured explorations get a ranking bump, and so do explorations that
     have been more recently updated.
     """
     # TODO(sll): Improve this calculation.
-    exploration = get_exploration_by_id(exp_id)
-    rights = rights_manager.get_exploration_rights(exp_id)
     rank = (
         3000 if rights.status == rights_manager.EXPLORATION_STATUS_PUBLICIZED
         else 0)
@@ -1071,8 +1545,7 @@ def _get_search_rank(exp_id):
     return rank
 
 
-def _exp_to_search_dict(exp):
-    rights = rights_manager.get_exploration_rights(exp.id)
+def _exp_to_search_dict(exp, rights):
     doc = {
         'id': exp.id,
         'language_code': exp.language_code,
@@ -1082,7 +1555,7 @@ def _exp_to_search_dict(exp):
         'blurb': exp.blurb,
         'objective': exp.objective,
         'author_notes': exp.author_notes,
-        'rank': _get_search_rank(exp.id),
+        'rank': _get_search_rank(exp, rights),
     }
     doc.update(_exp_rights_to_search_dict(rights))
     return doc
@@ -1098,9 +1571,15 @@ def clear_search_index():
 def index_explorations_given_ids(exp_ids):
     # We pass 'strict=False' so as not to index deleted explorations.
     exploration_models = get_multiple_explorations_by_id(exp_ids, strict=False)
+    explorations = exploration_models.values()
+    # The rights of all the explorations are fetched with a single
+    # get_multi() call.
+    multi_rights = rights_manager.get_multi_exploration_rights(
+        [exp.id for exp in explorations], readonly=True)
     search_services.add_documents_to_index([
-        _exp_to_search_dict(exp) for exp in exploration_models.values()
-        if _should_index(exp)
+        _exp_to_search_dict(exp, rights)
+        for (exp, rights) in zip(explorations, multi_rights)
+        if rights is not None and _should_index(rights)
     ], SEARCH_INDEX_EXPLORATIONS)
 
 
@@ -1115,7 +1594,7 @@ def patch_exploration_search_document(exp_id, update):
 
 
 def update_exploration_status_in_search(exp_id):
-    rights = rights_manager.get_exploration_rights(exp_id)
+    rights = rights_manager.get_exploration_rights(exp_id, readonly=True)
     if rights.status == rights_manager.EXPLORATION_STATUS_PRIVATE:
         delete_documents_from_search_index([exp_id])
     else:
@@ -17,10 +17,13 @@
 __author__ = 'Sean Lip'
 
 import datetime
+import json
 import os
 import StringIO
+import time
 import zipfile
 
+from core import counters
 from core.domain import config_services
 from core.domain import event_services
 from core.domain import exp_domain
@@ -34,6 +37,7 @@ from core.platform import models
 (base_models, exp_models) = models.Registry.import_models([
     models.NAMES.base_model, models.NAMES.exploration
 ])
+memcache_services = models.Registry.import_memcache_services()
 search_services = models.Registry.import_search_services()
 taskqueue_services = models.Registry.import_taskqueue_services()
 transaction_services = models.Registry.import_transaction_services()
@@ -321,6 +325,285 @@ class ExplorationCreateAndDeleteUnitTests(ExplorationServicesUnitTests):
         self.assertEqual(retrieved_exp_summary.category, 'A new category')
 
 
+class ExplorationCacheUnitTests(ExplorationServicesUnitTests):
+    """Test the in-process cache of read-only explorations."""
+
+    def test_readonly_explorations_are_served_from_local_cache(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+
+        exploration = exp_services.get_exploration_by_id(
+            self.EXP_ID, readonly=True)
+        self.assertIs(
+            exp_services.get_exploration_by_id(self.EXP_ID, readonly=True),
+            exploration)
+        self.assertIs(
+            exp_services.get_exploration_by_id(
+                self.EXP_ID, version=exploration.version, readonly=True),
+            exploration)
+
+        # Callers that may modify the exploration get their own copy.
+        self.assertIsNot(
+            exp_services.get_exploration_by_id(self.EXP_ID), exploration)
+
+    def test_local_cache_is_invalidated_when_exploration_is_updated(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+        old_exploration = exp_services.get_exploration_by_id(
+            self.EXP_ID, readonly=True)
+
+        exp_services.update_exploration(
+            self.OWNER_ID, self.EXP_ID, [{
+                'cmd': 'edit_exploration_property',
+                'property_name': 'title',
+                'new_value': 'A new title'
+            }], 'Change title')
+
+        new_exploration = exp_services.get_exploration_by_id(
+            self.EXP_ID, readonly=True)
+        self.assertEqual(new_exploration.title, 'A new title')
+        self.assertEqual(
+            new_exploration.version, old_exploration.version + 1)
+
+        # Older versions are still available.
+        self.assertEqual(
+            exp_services.get_exploration_by_id(
+                self.EXP_ID, version=old_exploration.version,
+                readonly=True).title,
+            'A title')
+
+    def test_local_cache_is_invalidated_when_exploration_is_deleted(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+        exp_services.get_exploration_by_id(self.EXP_ID, readonly=True)
+
+        exp_services.delete_exploration(self.OWNER_ID, self.EXP_ID)
+        with self.assertRaises(Exception):
+            exp_services.get_exploration_by_id(self.EXP_ID, readonly=True)
+
+    def test_local_cache_is_not_used_without_version_stamp(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+        exploration = exp_services.get_exploration_by_id(
+            self.EXP_ID, readonly=True)
+
+        # This simulates the version stamp being evicted from memcache.
+        exp_services.memcache_services.delete(
+            exp_services._get_exploration_version_stamp_memcache_key(
+                self.EXP_ID))
+        self.assertIsNot(
+            exp_services.get_exploration_by_id(self.EXP_ID, readonly=True),
+            exploration)
+
+
+class PlayerPayloadUnitTests(ExplorationServicesUnitTests):
+    """Test the caching of the learner view data of explorations."""
+
+    def test_player_payload_is_stored_and_deleted(self):
+        exploration = self.save_new_valid_exploration(
+            self.EXP_ID, self.OWNER_ID)
+        payload = exp_services.get_player_payload_json(exploration)
+        self.assertEqual(
+            json.loads(payload),
+            json.loads(json.dumps(exploration.to_player_dict())))
+        self.assertEqual(
+            exp_models.ExplorationPlayerPayloadModel.get_payload(
+                self.EXP_ID, 1,
+                exp_services._get_player_payload_code_version()),
+            payload)
+
+        # A new exploration with the same id does not reuse the payload of
+        # the deleted one.
+        exp_services.delete_exploration(
+            self.OWNER_ID, self.EXP_ID, force_deletion=True)
+        self.assertIsNone(
+            exp_models.ExplorationPlayerPayloadModel.get_payload(
+                self.EXP_ID, 1,
+                exp_services._get_player_payload_code_version()))
+        exploration = self.save_new_valid_exploration(
+            self.EXP_ID, self.OWNER_ID, title='Another title')
+        self.assertEqual(
+            json.loads(exp_services.get_player_payload_json(
+                exploration))['title'],
+            'Another title')
+
+    def test_player_payload_is_recomputed_when_rule_descriptions_change(
+            self):
+        exploration = self.save_new_valid_exploration(
+            self.EXP_ID, self.OWNER_ID)
+        original_to_player_dict = exp_domain.Exploration.to_player_dict
+        player_dicts = []
+
+        def _to_player_dict(exploration):
+            player_dicts.append(original_to_player_dict(exploration))
+            return player_dicts[-1]
+
+        with self.swap(
+                exp_domain.Exploration, 'to_player_dict', _to_player_dict):
+            exp_services.get_player_payload_json(exploration)
+            exp_services.get_player_payload_json(exploration)
+            self.assertEqual(len(player_dicts), 1)
+
+            with self.swap(
+                    rule_domain.Registry, 'get_descriptions_hash',
+                    classmethod(lambda cls: 'new_descriptions_hash')):
+                with self.swap(
+                        exp_services, '_player_payload_code_version', None):
+                    exp_services.get_player_payload_json(exploration)
+            self.assertEqual(len(player_dicts), 2)
+
+
+class ExplorationBulkLoadingUnitTests(ExplorationServicesUnitTests):
+    """Test the caching of explorations and summaries loaded in bulk."""
+
+    def _get_num_missing_entity_cache_hits(self):
+        return counters.MISSING_EXPLORATION_CACHE_HIT.value
+
+    def test_missing_explorations_are_remembered_until_created(self):
+        initial_hits = self._get_num_missing_entity_cache_hits()
+        self.assertEqual(
+            exp_services.get_multiple_explorations_by_id(
+                [self.EXP_ID], strict=False), {})
+        self.assertEqual(
+            self._get_num_missing_entity_cache_hits(), initial_hits)
+
+        self.assertEqual(
+            exp_services.get_multiple_explorations_by_id(
+                [self.EXP_ID], strict=False), {})
+        self.assertIsNone(
+            exp_services.get_exploration_by_id(self.EXP_ID, strict=False))
+        self.assertEqual(
+            self._get_num_missing_entity_cache_hits(), initial_hits + 2)
+        with self.assertRaises(Exception):
+            exp_services.get_exploration_by_id(self.EXP_ID)
+
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+        result = exp_services.get_multiple_explorations_by_id([self.EXP_ID])
+        self.assertEqual(result[self.EXP_ID].title, 'A title')
+        self.assertEqual(
+            exp_services.get_exploration_summary_by_id(self.EXP_ID).title,
+            'A title')
+
+    def test_explorations_are_loaded_in_batches(self):
+        exp_ids = ['%s%s' % (self.EXP_ID, ind) for ind in range(5)]
+        for exp_id in exp_ids:
+            self.save_new_valid_exploration(exp_id, self.OWNER_ID)
+
+        with self.swap(feconf, 'MAX_ENTITIES_PER_DATASTORE_GET', 2):
+            explorations = exp_services.get_multiple_explorations_by_id(
+                exp_ids + ['doesnt_exist'], strict=False)
+            exp_summaries = (
+                exp_services.get_multiple_exploration_summaries_by_id(
+                    exp_ids + ['doesnt_exist']))
+
+        self.assertEqual(sorted(explorations.keys()), exp_ids)
+        self.assertEqual(sorted(exp_summaries.keys()), exp_ids)
+        for exp_id in exp_ids:
+            self.assertEqual(explorations[exp_id].id, exp_id)
+            self.assertEqual(exp_summaries[exp_id].id, exp_id)
+
+    def test_requests_wait_for_explorations_loaded_by_other_requests(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+        exp_summary = exp_services.get_exploration_summary_by_id(self.EXP_ID)
+        summary_memcache_key = (
+            exp_services._get_exploration_summary_memcache_key(self.EXP_ID))
+        lease_memcache_key = exp_services._get_load_lease_memcache_key(
+            summary_memcache_key)
+
+        def _fail(unused_exp_summary_model):
+            raise Exception('The summary should not be loaded.')
+
+        def _add_summary_to_memcache(unused_secs):
+            memcache_services.set_multi({summary_memcache_key: exp_summary})
+
+        # Another request holds the lease on the summary, and adds it to
+        # memcache while this request waits.
+        memcache_services.delete(summary_memcache_key)
+        memcache_services.set_multi({lease_memcache_key: True})
+        with self.swap(
+                exp_services, 'get_exploration_summary_from_model', _fail):
+            with self.swap(time, 'sleep', _add_summary_to_memcache):
+                self.assertEqual(
+                    exp_services.get_exploration_summary_by_id(
+                        self.EXP_ID).title,
+                    'A title')
+
+        def _release_lease(unused_secs):
+            memcache_services.delete(lease_memcache_key)
+
+        # If the lease is released without the summary being added to
+        # memcache, this request loads the summary itself.
+        memcache_services.delete(summary_memcache_key)
+        memcache_services.set_multi({lease_memcache_key: True})
+        with self.swap(time, 'sleep', _release_lease):
+            self.assertEqual(
+                exp_services.get_exploration_summary_by_id(self.EXP_ID).title,
+                'A title')
+
+    def test_cached_summaries_are_invalidated_on_update_and_deletion(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+        self.assertEqual(
+            exp_services.get_exploration_summary_by_id(self.EXP_ID).title,
+            'A title')
+
+        exp_services.update_exploration(
+            self.OWNER_ID, self.EXP_ID, [{
+                'cmd': 'edit_exploration_property',
+                'property_name': 'title',
+                'new_value': 'A new title'
+            }], 'Change title')
+        self.assertEqual(
+            exp_services.get_exploration_summary_by_id(self.EXP_ID).title,
+            'A new title')
+        self.assertEqual(
+            exp_services.get_exploration_summaries_matching_ids(
+                [self.EXP_ID, 'doesnt_exist'])[0].title,
+            'A new title')
+
+        exp_services.delete_exploration(self.OWNER_ID, self.EXP_ID)
+        self.assertIsNone(
+            exp_services.get_exploration_summary_by_id(self.EXP_ID))
+        self.assertEqual(
+            exp_services.get_exploration_summaries_matching_ids(
+                [self.EXP_ID]), [None])
+
+    def test_exploration_metadata_is_read_without_loading_states(self):
+        self.save_new_default_exploration(self.EXP_ID, self.OWNER_ID)
+
+        def _fail(unused_exploration_model):
+            raise Exception('The exploration should not be loaded.')
+
+        with self.swap(exp_services, 'get_exploration_from_model', _fail):
+            exp_metadata = exp_services.get_exploration_metadata_by_id(
+                self.EXP_ID)
+        self.assertEqual(exp_metadata['title'], 'A title')
+        self.assertEqual(exp_metadata['category'], 'A category')
+        self.assertEqual(exp_metadata['version'], 1)
+
+        exp_services.update_exploration(
+            self.OWNER_ID, self.EXP_ID, [{
+                'cmd': 'edit_exploration_property',
+                'property_name': 'title',
+                'new_value': 'A new title'
+            }], 'Change title')
+        with self.swap(exp_services, 'get_exploration_from_model', _fail):
+            exp_metadata = exp_services.get_exploration_metadata_by_id(
+                self.EXP_ID)
+        self.assertEqual(exp_metadata['title'], 'A new title')
+        self.assertEqual(exp_metadata['version'], 2)
+        self.assertEqual(
+            exp_metadata['last_updated'],
+            exp_models.ExplorationModel.get(self.EXP_ID).last_updated)
+
+        # Explorations without a summary are loaded in full instead.
+        exp_models.ExpSummaryModel.get(self.EXP_ID).delete()
+        exp_services._invalidate_exploration_caches(self.EXP_ID)
+        self.assertEqual(
+            exp_services.get_multiple_exploration_metadata_by_id(
+                [self.EXP_ID, 'doesnt_exist']).keys(), [self.EXP_ID])
+
+        exp_services.create_exploration_summary(self.EXP_ID)
+        exp_services.delete_exploration(self.OWNER_ID, self.EXP_ID)
+        self.assertIsNone(
+            exp_services.get_exploration_metadata_by_id(self.EXP_ID))
+
+
 class LoadingAndDeletionOfDemosTest(ExplorationServicesUnitTests):
 
     def test_loading_and_validation_and_deletion_of_demo_explorations(self):
@@ -515,6 +798,27 @@ states:
             zf.open('A title.yaml').read(), self.SAMPLE_YAML_CONTENT)
         self.assertEqual(zf.open('assets/abc.png').read(), raw_image)
 
+    def test_write_zip_file_to_unseekable_stream(self):
+        """Test writing a zip file to a stream that does not support seek()."""
+        self.save_new_valid_exploration(
+            self.EXP_ID, self.OWNER_ID, objective='The objective')
+        with open(os.path.join(feconf.TESTS_DATA_DIR, 'img.png')) as f:
+            raw_image = f.read()
+        fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem(self.EXP_ID))
+        fs.commit(self.OWNER_ID, 'abc.png', raw_image)
+
+        chunks = []
+        exp_services.write_zip_file(
+            self.EXP_ID, utils.WriteOnlyStream(chunks.append))
+        zf = zipfile.ZipFile(StringIO.StringIO(''.join(chunks)))
+
+        self.assertEqual(zf.namelist(), ['A title.yaml', 'assets/abc.png'])
+        self.assertEqual(
+            zf.open('A title.yaml').read(),
+            exp_services.get_exploration_by_id(self.EXP_ID).to_yaml())
+        self.assertEqual(zf.open('assets/abc.png').read(), raw_image)
+
     def test_export_by_versions(self):
         """Test export_to_zip_file() for different versions."""
         exploration = self.save_new_valid_exploration(
@@ -992,6 +1296,83 @@ class UpdateStateTests(ExplorationServicesUnitTests):
                 '')
 
 
+class ChangeListApplicationTests(ExplorationServicesUnitTests):
+    """Test applying and summarizing change lists."""
+
+    def setUp(self):
+        super(ChangeListApplicationTests, self).setUp()
+        exploration = self.save_new_valid_exploration(
+            self.EXP_ID, self.OWNER_ID)
+        exp_services.update_exploration(self.OWNER_ID, self.EXP_ID, [{
+            'cmd': 'add_state',
+            'state_name': 'Other state',
+        }], '')
+        self.init_state_name = exploration.init_state_name
+
+        self.change_list = [{
+            'cmd': 'add_state',
+            'state_name': 'New state',
+        }, {
+            'cmd': 'rename_state',
+            'old_state_name': 'New state',
+            'new_state_name': 'Renamed state',
+        }, {
+            'cmd': 'edit_state_property',
+            'state_name': self.init_state_name,
+            'property_name': exp_domain.STATE_PROPERTY_CONTENT,
+            'new_value': [{'type': 'text', 'value': '<b>New content</b>'}],
+        }, {
+            'cmd': 'edit_exploration_property',
+            'property_name': 'title',
+            'new_value': 'New title',
+        }]
+
+    def test_apply_change_list_and_get_summary(self):
+        cached_exploration = exp_services.get_exploration_by_id(
+            self.EXP_ID, readonly=True)
+        original_content = cached_exploration.init_state.content[0].value
+
+        (exploration, summary) = (
+            exp_services.apply_change_list_and_get_summary(
+                self.EXP_ID, self.change_list))
+
+        self.assertEqual(exploration.title, 'New title')
+        self.assertEqual(
+            sorted(exploration.states.keys()),
+            sorted([self.init_state_name, 'Other state', 'Renamed state']))
+        self.assertEqual(
+            exploration.init_state.content[0].value, '<b>New content</b>')
+
+        # The cached exploration is unchanged, and the state that was not
+        # edited is shared rather than copied.
+        self.assertEqual(cached_exploration.title, 'A title')
+        self.assertEqual(
+            sorted(cached_exploration.states.keys()),
+            sorted([self.init_state_name, 'Other state']))
+        self.assertEqual(
+            cached_exploration.init_state.content[0].value, original_content)
+        self.assertIs(
+            exploration.states['Other state'],
+            cached_exploration.states['Other state'])
+
+        self.assertEqual(summary, exp_services.get_summary_of_change_list(
+            cached_exploration, self.change_list))
+        self.assertEqual(summary['added_states'], ['New state'])
+
+    def test_simple_changelist_summary_is_cached(self):
+        summary = exp_services._get_simple_changelist_summary(
+            self.EXP_ID, 2, self.change_list)
+
+        def _raise_error(*unused_args, **unused_kwargs):
+            raise Exception('The exploration should not be loaded.')
+
+        with self.swap(exp_services, 'get_exploration_by_id', _raise_error):
+            self.assertEqual(
+                exp_services._get_simple_changelist_summary(
+                    self.EXP_ID, 2, self.change_list),
+                summary)
+
+
 class CommitMessageHandlingTests(ExplorationServicesUnitTests):
     """Test the handling of commit messages."""
 
@@ -1299,6 +1680,41 @@ class ExplorationSnapshotUnitTests(ExplorationServicesUnitTests):
             snapshots_metadata[-2]['created_on'])
 
 
+    def test_snapshots_are_delta_encoded_against_keyframes(self):
+        self.save_new_valid_exploration(self.EXP_ID, self.OWNER_ID)
+        with self.swap(feconf, 'SNAPSHOT_KEYFRAME_INTERVAL', 3):
+            for ind in range(6):
+                exp_services.update_exploration(
+                    self.OWNER_ID, self.EXP_ID, [{
+                        'cmd': 'edit_exploration_property',
+                        'property_name': 'title',
+                        'new_value': 'Title %s' % ind,
+                    }], 'Changed title.')
+
+        snapshot_models = exp_models.ExplorationSnapshotContentModel.get_multi(
+            ['%s-%s' % (self.EXP_ID, version) for version in range(1, 8)])
+        self.assertEqual(
+            [model.keyframe_version for model in snapshot_models],
+            [None, 1, 1, None, 4, 4, None])
+        self.assertIsNone(snapshot_models[1].content)
+        self.assertEqual(
+            snapshot_models[1].delta['set']['title'], 'Title 0')
+
+        self.assertEqual(
+            exp_models.ExplorationModel.get_version(self.EXP_ID, 1).title,
+            'A title')
+        for ind in range(6):
+            self.assertEqual(
+                exp_models.ExplorationModel.get_version(
+                    self.EXP_ID, ind + 2).title,
+                'Title %s' % ind)
+
+        # Reverting to a version stored as a delta restores its content.
+        exp_services.revert_exploration(self.OWNER_ID, self.EXP_ID, 7, 3)
+        self.assertEqual(
+            exp_services.get_exploration_by_id(self.EXP_ID).title, 'Title 1')
+
+
 class ExplorationCommitLogUnitTests(ExplorationServicesUnitTests):
     """Test methods relating to the exploration commit log."""
 
@@ -18,6 +18,7 @@
 
 __author__ = 'Koji Ashida'
 
+from core.domain import recent_updates_services
 from core.domain import subscription_services
 from core.domain import user_services
 from core.platform import models
@@ -113,6 +114,9 @@ def create_message(
         if updated_subject and updated_subject != thread.subject:
             thread.subject = updated_subject
     thread.put()
+    recent_updates_services.record_feedback_message(
+        thread.exploration_id, thread_id, author_id, thread.subject,
+        msg.created_on)
 
     if author_id:
         subscription_services.subscribe_to_thread(author_id, thread_id)
@@ -18,6 +18,7 @@
 
 __author__ = 'Sean Lip'
 
+import hashlib
 import logging
 import os
 
@@ -25,11 +26,70 @@ from core.platform import models
 (file_models,) = models.Registry.import_models([
     models.NAMES.file
 ])
+transaction_services = models.Registry.import_transaction_services()
 import feconf
 import utils
 
 CHANGE_LIST_SAVE = [{'cmd': 'save'}]
 
+# An in-process cache of the contents of small file blobs, keyed by blob hash.
+# Blobs are immutable, so entries never become stale.
+_FILE_BLOB_CACHE = utils.LRUCache(
+    feconf.FILE_BLOB_CACHE_MAX_ENTRIES,
+    max_size_bytes=feconf.FILE_BLOB_CACHE_MAX_SIZE_BYTES)
+
+
+def _split_into_chunks(raw_bytes):
+    """Splits a bytestring into chunks for the blob store. There is always at
+    least one chunk, even if the bytestring is empty.
+    """
+    chunk_size = feconf.FILE_BLOB_CHUNK_SIZE_BYTES
+    return [
+        raw_bytes[ind:ind + chunk_size]
+        for ind in range(0, max(len(raw_bytes), 1), chunk_size)]
+
+
+def _put_blob(blob_hash, chunks):
+    """Stores a blob with the given chunks, unless it already exists.
+
+    Blobs are immutable and keyed by their hash, so this is idempotent and
+    does not need to be done in a transaction. Keeping it out of the
+    transaction that commits the file version that refers to the blob keeps
+    that transaction small, however large the blob is, and avoids contention
+    on blobs that are shared between explorations. The FileBlobModel is
+    written after the other chunks, so a blob that exists is complete.
+    """
+    if file_models.FileBlobModel.get(blob_hash, strict=False) is not None:
+        return
+
+    if len(chunks) > 1:
+        file_models.FileBlobChunkModel.put_multi([
+            file_models.FileBlobChunkModel.create(blob_hash, ind, chunk)
+            for (ind, chunk) in enumerate(chunks) if ind > 0])
+    file_models.FileBlobModel.create(
+        blob_hash, sum([len(chunk) for chunk in chunks]), len(chunks),
+        chunks[0]).put()
+
+
+def _get_blob_contents(blob_hash):
+    """Returns the contents of the given blob."""
+    contents = _FILE_BLOB_CACHE.get(blob_hash)
+    if contents is not None:
+        return contents
+
+    blob = file_models.FileBlobModel.get(blob_hash)
+    if blob.num_chunks == 1:
+        contents = blob.content
+    else:
+        contents = ''.join([blob.content] + [
+            chunk.content for chunk in
+            file_models.FileBlobChunkModel.get_chunks(
+                blob_hash, blob.num_chunks)])
+
+    if len(contents) <= feconf.FILE_BLOB_CACHE_MAX_BLOB_SIZE_BYTES:
+        _FILE_BLOB_CACHE.put(blob_hash, contents, size_bytes=len(contents))
+    return contents
+
 
 class FileMetadata(object):
     """A class representing the metadata of a file."""
@@ -44,11 +104,14 @@ class FileMetadata(object):
 class FileStreamWithMetadata(object):
     """A class that wraps a file stream, but adds extra attributes to it."""
 
-    def __init__(self, content, version, metadata):
-        """The args are a file content blob and a metadata model object."""
+    def __init__(self, content, version, metadata, content_hash=None):
+        """The args are a file content blob, its version, a metadata model
+        object and, optionally, a hash that identifies the content.
+        """
         self._content = content
         self._version = version
         self._metadata = FileMetadata(metadata)
+        self._content_hash = content_hash
 
     def read(self):
         """Emulates stream.read(). Returns all bytes and emulates EOF."""
@@ -64,6 +127,10 @@ class FileStreamWithMetadata(object):
     def version(self):
         return self._version
 
+    @property
+    def content_hash(self):
+        return self._content_hash
+
 
 class ExplorationFileSystem(object):
     """A datastore-backed read-write file system for a single exploration.
@@ -116,25 +183,90 @@ class ExplorationFileSystem(object):
             return file_models.FileModel.get_version(
                 self._exploration_id, 'assets/%s' % filepath, version)
 
+    def _get_file_contents_and_hash(self, data):
+        """Returns a 2-tuple with the contents of the given FileModel version
+        and the hash of the blob holding them.
+        """
+        if data.blob_hash is None:
+            return (data.content, hashlib.sha256(data.content).hexdigest())
+        return (_get_blob_contents(data.blob_hash), data.blob_hash)
+
+    def ensure_file_index_exists(self):
+        """Creates the file index for this exploration if it does not exist.
+
+        Explorations whose files were saved before the file index was
+        introduced do not have one, so it is built from their file metadata
+        models. The query for these cannot run in a transaction, since it is
+        not an ancestor query, but the index is only created (in a
+        transaction) if no other request has created it in the meantime, so
+        that a concurrent update of the index is never overwritten.
+
+        Returns:
+            True if the file index was created by this call.
+        """
+        if file_models.FileIndexModel.get(
+                self._exploration_id, strict=False) is not None:
+            return False
+
+        filepaths = file_models.FileMetadataModel.get_undeleted_filepaths(
+            self._exploration_id)
+
+        def _create_file_index_if_missing():
+            if file_models.FileIndexModel.get(
+                    self._exploration_id, strict=False) is not None:
+                return False
+            file_models.FileIndexModel.create(
+                self._exploration_id, filepaths).put()
+            return True
+
+        return transaction_services.run_in_transaction(
+            _create_file_index_if_missing)
+
+    def _update_file_index(self, filepath, is_deleted):
+        """Adds the given file to, or removes it from, the file index of this
+        exploration. This should be called in the same transaction as the
+        corresponding change to the file models.
+        """
+        file_index = file_models.FileIndexModel.get(self._exploration_id)
+        index_filepath = 'assets/%s' % filepath
+        if is_deleted and index_filepath in file_index.filepaths:
+            file_index.filepaths.remove(index_filepath)
+        elif not is_deleted and index_filepath not in file_index.filepaths:
+            file_index.filepaths.append(index_filepath)
+        else:
+            return
+        file_index.put()
+
     def _save_file(self, user_id, filepath, raw_bytes):
         """Create or update a file."""
         if len(raw_bytes) > feconf.MAX_FILE_SIZE_BYTES:
             raise Exception('The maximum allowed file size is 1 MB.')
 
-        metadata = self._get_file_metadata(filepath, None)
-        if not metadata:
-            metadata = file_models.FileMetadataModel.create(
-                self._exploration_id, 'assets/%s' % filepath)
-        metadata.size = len(raw_bytes)
+        # File contents are stored once per distinct bytestring, in the blob
+        # store, and file versions refer to them by hash.
+        blob_hash = hashlib.sha256(raw_bytes).hexdigest()
+        _put_blob(blob_hash, _split_into_chunks(raw_bytes))
 
-        data = self._get_file_data(filepath, None)
-        if not data:
-            data = file_models.FileModel.create(
-                self._exploration_id, 'assets/%s' % filepath)
-        data.content = raw_bytes
+        def _save_file_transactional():
+            metadata = self._get_file_metadata(filepath, None)
+            if not metadata:
+                metadata = file_models.FileMetadataModel.create(
+                    self._exploration_id, 'assets/%s' % filepath)
+            metadata.size = len(raw_bytes)
+
+            data = self._get_file_data(filepath, None)
+            if not data:
+                data = file_models.FileModel.create(
+                    self._exploration_id, 'assets/%s' % filepath)
+            data.content = None
+            data.blob_hash = blob_hash
 
-        data.commit(user_id, CHANGE_LIST_SAVE)
-        metadata.commit(user_id, CHANGE_LIST_SAVE)
+            data.commit(user_id, CHANGE_LIST_SAVE)
+            metadata.commit(user_id, CHANGE_LIST_SAVE)
+            self._update_file_index(filepath, False)
+
+        self.ensure_file_index_exists()
+        transaction_services.run_in_transaction(_save_file_transactional)
 
     def get(self, filepath, version=None, mode=None):
         """Gets a file as an unencoded stream of raw bytes.
@@ -151,7 +283,10 @@ class ExplorationFileSystem(object):
             if data:
                 if version is None:
                     version = data.version
-                return FileStreamWithMetadata(data.content, version, metadata)
+                (content, content_hash) = self._get_file_contents_and_hash(
+                    data)
+                return FileStreamWithMetadata(
+                    content, version, metadata, content_hash=content_hash)
             else:
                 logging.error(
                     'Metadata and data for file %s (version %s) are out of '
@@ -160,6 +295,23 @@ class ExplorationFileSystem(object):
         else:
             return None
 
+    def get_content_hash(self, filepath, version=None):
+        """Returns the SHA-256 hex digest of the contents of a file, or None if
+        the file does not exist.
+
+        For files whose contents are in the blob store, this does not read
+        the contents.
+        """
+        metadata = self._get_file_metadata(filepath, version)
+        if not metadata:
+            return None
+        data = self._get_file_data(filepath, version)
+        if not data:
+            return None
+        if data.blob_hash is None:
+            return hashlib.sha256(data.content).hexdigest()
+        return data.blob_hash
+
     def commit(self, user_id, filepath, raw_bytes):
         """Saves a raw bytestring as a file in the database."""
         self._save_file(user_id, filepath, raw_bytes)
@@ -167,13 +319,19 @@ class ExplorationFileSystem(object):
     def delete(self, user_id, filepath):
         """Marks the current version of a file as deleted."""
 
-        metadata = self._get_file_metadata(filepath, None)
-        if metadata:
-            metadata.delete(user_id, '')
+        def _delete_file_transactional():
+            metadata = self._get_file_metadata(filepath, None)
+            if metadata:
+                metadata.delete(user_id, '')
+
+            data = self._get_file_data(filepath, None)
+            if data:
+                data.delete(user_id, '')
+
+            self._update_file_index(filepath, True)
 
-        data = self._get_file_data(filepath, None)
-        if data:
-            data.delete(user_id, '')
+        self.ensure_file_index_exists()
+        transaction_services.run_in_transaction(_delete_file_transactional)
 
     def isfile(self, filepath):
         """Checks the existence of a file."""
@@ -194,18 +352,25 @@ class ExplorationFileSystem(object):
         # The trailing slash is necessary to prevent non-identical directory
         # names with the same prefix from matching, e.g. /abcd/123.png should
         # not match a query for files under /abc/.
-        prefix = '%s' % utils.vfs_construct_path(
-            '/', self._exploration_id, 'assets', dir_name)
+        prefix = utils.vfs_construct_path('assets', dir_name)
         if not prefix.endswith('/'):
             prefix += '/'
 
-        result = set()
-        metadata_models = file_models.FileMetadataModel.get_undeleted()
-        for metadata_model in metadata_models:
-            filepath = metadata_model.id
-            if filepath.startswith(prefix):
-                result.add('/'.join(filepath.split('/')[3:]))
-        return sorted(list(result))
+        file_index = file_models.FileIndexModel.get(
+            self._exploration_id, strict=False)
+        if file_index is not None:
+            filepaths = file_index.filepaths
+        else:
+            # Explorations whose files were saved before the file index was
+            # introduced have no index until a file is next saved or
+            # deleted, or ExplorationFileIndexCreationOneOffJob is run. Their
+            # files are listed using an (eventually consistent) query.
+            filepaths = file_models.FileMetadataModel.get_undeleted_filepaths(
+                self._exploration_id)
+
+        return sorted([
+            filepath[len('assets/'):] for filepath in filepaths
+            if filepath.startswith(prefix)])
 
 
 class DiskBackedFileSystem(object):
@@ -237,6 +402,10 @@ class DiskBackedFileSystem(object):
             os.path.join(self._root, filepath), raw_bytes=True, mode=mode)
         return FileStreamWithMetadata(content, None, None)
 
+    def get_content_hash(self, filepath, version=None):
+        """Returns the SHA-256 hex digest of the contents of a file."""
+        return hashlib.sha256(self.get(filepath).read()).hexdigest()
+
     def commit(self, user_id, filepath, raw_bytes):
         raise NotImplementedError
 
@@ -278,6 +447,13 @@ class AbstractFileSystem(object):
         self._check_filepath(filepath)
         return self._impl.get(filepath, version=version, mode=mode)
 
+    def get_content_hash(self, filepath, version=None):
+        """Returns a hash of the file content, or None if the file does not
+        exist. This is cheaper than reading the content.
+        """
+        self._check_filepath(filepath)
+        return self._impl.get_content_hash(filepath, version=version)
+
     def get(self, filepath, version=None, mode='r'):
         """Returns a bytestring with the file content, but no metadata."""
         file_stream = self.open(filepath, version=version, mode=mode)
@@ -18,7 +18,11 @@
 
 __author__ = 'Sean Lip'
 
+import hashlib
+
 from core.domain import fs_domain
+from core.platform import models
+(file_models,) = models.Registry.import_models([models.NAMES.file])
 import feconf
 import test_utils
 
@@ -73,6 +77,44 @@ class ExplorationFileSystemUnitTests(test_utils.GenericTestBase):
             fs_domain.ExplorationFileSystem('eid2'))
         self.assertEqual(new_fs.listdir('assets'), [])
 
+    def test_listdir_after_deleting_files(self):
+        fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid'))
+        fs.commit(self.user_id, 'abc.png', 'file_contents')
+        fs.commit(self.user_id, 'abc/abcd.png', 'file_contents_2')
+        fs.delete(self.user_id, 'abc/abcd.png')
+        self.assertEqual(fs.listdir(''), ['abc.png'])
+        self.assertEqual(fs.listdir('abc'), [])
+
+        fs.commit(self.user_id, 'abc/abcd.png', 'file_contents_3')
+        self.assertEqual(fs.listdir(''), ['abc.png', 'abc/abcd.png'])
+
+    def test_listdir_for_files_saved_without_a_file_index(self):
+        for (exploration_id, filepath) in [
+                ('eid', 'assets/abc.png'), ('eid', 'assets/abc/abcd.png'),
+                ('eid', 'assets/deleted.png'), ('eid2', 'assets/abc.png'),
+                ('eid0', 'assets/abc.png')]:
+            metadata = file_models.FileMetadataModel.create(
+                exploration_id, filepath)
+            metadata.size = 1
+            metadata.commit(self.user_id, fs_domain.CHANGE_LIST_SAVE)
+        file_models.FileMetadataModel.get_model(
+            'eid', 'assets/deleted.png').delete(self.user_id, '')
+        self.assertIsNone(file_models.FileIndexModel.get('eid', strict=False))
+
+        fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid'))
+        self.assertEqual(fs.listdir(''), ['abc.png', 'abc/abcd.png'])
+        # Listing the files does not create the index.
+        self.assertIsNone(file_models.FileIndexModel.get('eid', strict=False))
+
+        fs.commit(self.user_id, 'bcd.png', 'file_contents')
+        self.assertEqual(
+            sorted(file_models.FileIndexModel.get('eid').filepaths),
+            ['assets/abc.png', 'assets/abc/abcd.png', 'assets/bcd.png'])
+        self.assertEqual(
+            fs.listdir(''), ['abc.png', 'abc/abcd.png', 'bcd.png'])
+
     def test_versioning(self):
         fs = fs_domain.AbstractFileSystem(
             fs_domain.ExplorationFileSystem('eid'))
@@ -94,6 +136,59 @@ class ExplorationFileSystemUnitTests(test_utils.GenericTestBase):
         self.assertEqual(old_file_stream.version, 1)
         self.assertEqual(old_file_stream.metadata.size, len('file_contents'))
 
+    def test_identical_files_share_a_blob(self):
+        fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid'))
+        fs.commit(self.user_id, 'abc.png', 'file_contents')
+        fs.commit(self.user_id, 'abc.png', 'file_contents_2')
+        fs2 = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid2'))
+        fs2.commit(self.user_id, 'def.png', 'file_contents')
+
+        blob_hash = hashlib.sha256('file_contents').hexdigest()
+        blob = file_models.FileBlobModel.get(blob_hash)
+        self.assertEqual(blob.size, len('file_contents'))
+
+        data = file_models.FileModel.get_model('eid2', 'assets/def.png')
+        self.assertIsNone(data.content)
+        self.assertEqual(data.blob_hash, blob_hash)
+
+        self.assertEqual(fs.get('abc.png', 1), 'file_contents')
+        self.assertEqual(fs.get('abc.png'), 'file_contents_2')
+        self.assertEqual(fs2.get('def.png'), 'file_contents')
+
+    def test_large_files_are_chunked(self):
+        fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid'))
+        with self.swap(feconf, 'FILE_BLOB_CHUNK_SIZE_BYTES', 4):
+            fs.commit(self.user_id, 'abc.png', 'file_contents')
+            fs.commit(self.user_id, 'empty.png', '')
+
+            self.assertEqual(fs.get('abc.png'), 'file_contents')
+            self.assertEqual(fs.get('empty.png'), '')
+
+        blob = file_models.FileBlobModel.get(
+            hashlib.sha256('file_contents').hexdigest())
+        self.assertEqual(blob.num_chunks, 4)
+        self.assertEqual(blob.content, 'file')
+
+    def test_files_saved_before_the_blob_store_are_readable(self):
+        metadata = file_models.FileMetadataModel.create(
+            'eid', 'assets/abc.png')
+        metadata.size = len('file_contents')
+        metadata.commit(self.user_id, fs_domain.CHANGE_LIST_SAVE)
+        data = file_models.FileModel.create('eid', 'assets/abc.png')
+        data.content = 'file_contents'
+        data.commit(self.user_id, fs_domain.CHANGE_LIST_SAVE)
+
+        fs = fs_domain.AbstractFileSystem(
+            fs_domain.ExplorationFileSystem('eid'))
+        self.assertEqual(fs.get('abc.png'), 'file_contents')
+
+        fs.commit(self.user_id, 'abc.png', 'file_contents_2')
+        self.assertEqual(fs.get('abc.png'), 'file_contents_2')
+        self.assertEqual(fs.get('abc.png', 1), 'file_contents')
+
     def test_independence_of_file_systems(self):
         fs = fs_domain.AbstractFileSystem(
             fs_domain.ExplorationFileSystem('eid'))
@@ -20,8 +20,11 @@ __author__ = 'Sean Lip'
 
 import bleach
 from core.domain import rte_component_registry
+import feconf
+import hashlib
 import logging
 import urlparse
+import utils
 
 
 def filter_a(name, value):
@@ -60,20 +63,88 @@ ATTRS_WHITELIST = {
 }
 
 
+# A 2-tuple consisting of the dict returned by the last call to
+# rte_component_registry.Registry.get_tag_list_with_attrs(), and the whitelist
+# computed from it.
+_WHITELIST_CACHE = (None, None)
+
+# Maps a hash of each recently sanitized piece of HTML to the sanitized HTML.
+# This is cleared whenever the whitelist changes.
+_CLEANED_HTML_CACHE = utils.LRUCache(
+    feconf.HTML_CLEANER_CACHE_MAX_ENTRIES,
+    max_size_bytes=feconf.HTML_CLEANER_CACHE_MAX_SIZE_CHARS)
+
+
+def _get_whitelist():
+    """Returns a 2-tuple consisting of the list of allowed tag names and the
+    dict mapping each allowed tag name to its allowed attrs.
+
+    The whitelist is only recomputed when the registry of RTE components is
+    refreshed.
+    """
+    global _WHITELIST_CACHE
+
+    oppia_custom_tags = (
+        rte_component_registry.Registry.get_tag_list_with_attrs())
+    (cached_custom_tags, whitelist) = _WHITELIST_CACHE
+    if oppia_custom_tags is not cached_custom_tags:
+        core_tags = ATTRS_WHITELIST.copy()
+        core_tags.update(oppia_custom_tags)
+        whitelist = (core_tags.keys(), core_tags)
+        _WHITELIST_CACHE = (oppia_custom_tags, whitelist)
+        _CLEANED_HTML_CACHE.clear()
+    return whitelist
+
+
+def _get_cache_key(user_submitted_html):
+    """Returns the key of a piece of HTML in the cache of sanitized HTML."""
+    if isinstance(user_submitted_html, unicode):
+        user_submitted_html = user_submitted_html.encode('utf-8')
+    return hashlib.sha1(user_submitted_html).digest()
+
+
+def _clean_with_whitelist(user_submitted_html, tag_names, attrs):
+    """Sanitizes a piece of HTML against the given whitelist, reusing the
+    result of an earlier call for the same HTML where possible.
+
+    The whitelist should be the one returned by _get_whitelist(), since the
+    cached results are only cleared when that changes.
+    """
+    cache_key = _get_cache_key(user_submitted_html)
+    cleaned_html = _CLEANED_HTML_CACHE.get(cache_key)
+    if cleaned_html is None:
+        # TODO(sll): Alert the caller if the input was changed due to this
+        # call.
+        # TODO(sll): Add a log message if bad HTML is detected.
+        cleaned_html = bleach.clean(
+            user_submitted_html, tags=tag_names, attributes=attrs, strip=True)
+        _CLEANED_HTML_CACHE.put(
+            cache_key, cleaned_html, size_bytes=len(cleaned_html))
+    return cleaned_html
+
+
 def clean(user_submitted_html):
     """Cleans a piece of user submitted HTML.
 
     This only allows HTML from a restricted set of tags, attrs and styles. It
-    strips out unrecognized tags.
+    strips out unrecognized tags. Recently cleaned HTML is cached in-process,
+    so cleaning the same HTML again does not re-parse it.
     """
-    oppia_custom_tags = (
-        rte_component_registry.Registry.get_tag_list_with_attrs())
+    (tag_names, attrs) = _get_whitelist()
+    return _clean_with_whitelist(user_submitted_html, tag_names, attrs)
 
-    core_tags = ATTRS_WHITELIST.copy()
-    core_tags.update(oppia_custom_tags)
-    tag_names = core_tags.keys()
 
-    # TODO(sll): Alert the caller if the input was changed due to this call.
-    # TODO(sll): Add a log message if bad HTML is detected.
-    return bleach.clean(
-        user_submitted_html, tags=tag_names, attributes=core_tags, strip=True)
+def clean_many(user_submitted_html_list):
+    """Cleans a list of pieces of user submitted HTML, in the same way as
+    clean(), and returns the list of cleaned pieces of HTML.
+
+    The whitelist is only computed once, and each distinct piece of HTML is
+    only cleaned once, so this is faster than calling clean() for each item
+    when sanitizing, e.g., all the HTML in an exploration.
+    """
+    (tag_names, attrs) = _get_whitelist()
+    cleaned_html = {}
+    for html in user_submitted_html_list:
+        if html not in cleaned_html:
+            cleaned_html[html] = _clean_with_whitelist(html, tag_names, attrs)
+    return [cleaned_html[html] for html in user_submitted_html_list]
@@ -19,6 +19,7 @@
 __author__ = 'Sean Lip'
 
 from core.domain import html_cleaner
+from core.domain import rte_component_registry
 import test_utils
 
 
@@ -100,3 +101,38 @@ class HtmlCleanerUnitTests(test_utils.GenericTestBase):
             self.assertEqual(
                 html_cleaner.clean(datum[0]), datum[1],
                 '\n\nOriginal text: %s' % datum[0])
+
+    def test_clean_many(self):
+        html_list = [
+            '<a href="http://www.google.com">Hello</a>',
+            '<incomplete-bad-tag>Text',
+            '<a href="http://www.google.com">Hello</a>',
+        ]
+        self.assertEqual(
+            html_cleaner.clean_many(html_list),
+            [html_cleaner.clean(html) for html in html_list])
+        self.assertEqual(html_cleaner.clean_many([]), [])
+
+    def test_cleaned_html_is_cached_until_registry_refresh(self):
+        html = '<div>Cached</div><complete-bad-tag></complete-bad-tag>'
+        cleaned_html = html_cleaner.clean(html)
+
+        clean_calls = []
+        original_clean = html_cleaner.bleach.clean
+
+        def mock_clean(*args, **kwargs):
+            clean_calls.append(args[0])
+            return original_clean(*args, **kwargs)
+
+        with self.swap(html_cleaner.bleach, 'clean', mock_clean):
+            self.assertEqual(html_cleaner.clean(html), cleaned_html)
+            self.assertEqual(
+                html_cleaner.clean_many([html, html]),
+                [cleaned_html, cleaned_html])
+            self.assertEqual(clean_calls, [])
+
+            # Refreshing the registry of RTE components may change the
+            # whitelist, so the HTML is sanitized again.
+            rte_component_registry.Registry._refresh()
+            self.assertEqual(html_cleaner.clean(html), cleaned_html)
+            self.assertEqual(clean_calls, [html])
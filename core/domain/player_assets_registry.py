@@ -0,0 +1,154 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Registry for the precompiled assets of the learner view page."""
+
+import itertools
+
+from core.domain import dependency_registry
+from core.domain import interaction_registry
+from core.domain import rte_component_registry
+from core.domain import skins_services
+import feconf
+import utils
+
+
+class Registry(object):
+    """Registry of the extension assets (interaction, RTE component, skin
+    and dependency templates) that the learner view page includes.
+
+    The templates of all extensions are read from disk once, by compile_all(),
+    which is called when an instance is warmed up. The assets for the set of
+    interactions used by a particular exploration are then assembled into a
+    bundle, which is cached for the other explorations that use the same set
+    of interactions.
+    """
+
+    # A dict containing the compiled assets of all extensions, or None if they
+    # have not been compiled yet.
+    _compiled_assets = None
+    # Maps frozensets of interaction ids to the corresponding bundles.
+    _bundles = utils.LRUCache(feconf.PLAYER_ASSET_BUNDLE_CACHE_MAX_ENTRIES)
+
+    @classmethod
+    def compile_all(cls):
+        """Reads the templates of all extensions, and discards any bundles
+        that were assembled from previously compiled templates.
+        """
+        interactions = interaction_registry.Registry.get_all_interactions()
+        dependency_ids = set(itertools.chain.from_iterable(
+            interaction.dependency_ids for interaction in interactions))
+
+        skins = {}
+        for skin_id in skins_services.Registry.get_all_skin_ids():
+            skins[skin_id] = {
+                'templates': skins_services.Registry.get_skin_templates(
+                    [skin_id]),
+                'js_url': skins_services.Registry.get_skin_js_url(skin_id),
+                'tag': skins_services.Registry.get_skin_tag(skin_id),
+            }
+
+        compiled_assets = {
+            'dependency_html': {
+                dependency_id: (
+                    dependency_registry.Registry.get_dependency_html(
+                        dependency_id))
+                for dependency_id in dependency_ids
+            },
+            'interactions': {
+                interaction.id: {
+                    'dependency_ids': interaction.dependency_ids,
+                    'html': interaction.html_body,
+                } for interaction in interactions
+            },
+            'interaction_specs': (
+                interaction_registry.Registry.get_all_specs()),
+            'rte_components_html': (
+                rte_component_registry.Registry
+                .get_html_for_all_components()),
+            'skins': skins,
+        }
+
+        cls._compiled_assets = compiled_assets
+        cls._bundles.clear()
+
+    @classmethod
+    def _get_compiled_assets(cls):
+        if cls._compiled_assets is None:
+            cls.compile_all()
+        return cls._compiled_assets
+
+    @classmethod
+    def get_interaction_specs(cls):
+        """Returns a dict containing the full specs of each interaction, as
+        returned by interaction_registry.Registry.get_all_specs(). It must not
+        be modified.
+        """
+        return cls._get_compiled_assets()['interaction_specs']
+
+    @classmethod
+    def get_skin_assets(cls, skin_id):
+        """Returns a dict with the following keys, for the given skin:
+          - 'templates': the HTML templates of the skin.
+          - 'js_url': the URL of the skin's directive JS code.
+          - 'tag': the HTML tag used to load the skin template.
+
+        Raises a KeyError if the skin does not exist.
+        """
+        return cls._get_compiled_assets()['skins'][skin_id]
+
+    @classmethod
+    def get_bundle(cls, interaction_ids):
+        """Returns the assets needed by a learner view page for an
+        exploration that uses the given interactions, as a dict with the
+        following keys:
+          - 'additional_angular_modules': a de-duplicated list of the
+              additional angular modules that the page needs to load.
+          - 'dependencies_html': the HTML that loads the dependencies of the
+              interactions.
+          - 'interaction_templates': the HTML bodies of all RTE components
+              and of the given interactions.
+
+        The returned dict must not be modified. Raises a KeyError if any of
+        the interactions does not exist.
+        """
+        bundle_key = frozenset(interaction_ids)
+        bundle = cls._bundles.get(bundle_key)
+        if bundle is not None:
+            return bundle
+
+        compiled_assets = cls._get_compiled_assets()
+        interactions = compiled_assets['interactions']
+        dependency_ids = set(itertools.chain.from_iterable(
+            interactions[interaction_id]['dependency_ids']
+            for interaction_id in bundle_key))
+        additional_angular_modules = set(itertools.chain.from_iterable(
+            dependency_registry.Registry.get_angular_modules(dependency_id)
+            for dependency_id in dependency_ids))
+
+        bundle = {
+            'additional_angular_modules': list(additional_angular_modules),
+            'dependencies_html': '\n'.join([
+                compiled_assets['dependency_html'][dependency_id]
+                for dependency_id in dependency_ids]),
+            'interaction_templates': (
+                compiled_assets['rte_components_html'] +
+                ' \n'.join([
+                    interactions[interaction_id]['html']
+                    for interaction_id in sorted(bundle_key)])),
+        }
+        cls._bundles.put(bundle_key, bundle)
+        return bundle
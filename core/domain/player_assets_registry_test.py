@@ -0,0 +1,71 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the registry of precompiled learner view page assets."""
+
+from core.domain import dependency_registry
+from core.domain import interaction_registry
+from core.domain import player_assets_registry
+from core.domain import rte_component_registry
+from core.domain import skins_services
+from core.tests import test_utils
+import utils
+
+
+class PlayerAssetsRegistryTests(test_utils.GenericTestBase):
+    """Tests for the registry of precompiled learner view page assets."""
+
+    def test_bundle_matches_uncompiled_assets(self):
+        interaction_ids = ['CodeRepl', 'TextInput']
+        bundle = player_assets_registry.Registry.get_bundle(interaction_ids)
+
+        dependencies_html, additional_angular_modules = (
+            dependency_registry.Registry.get_deps_html_and_angular_modules(
+                interaction_registry.Registry.get_deduplicated_dependency_ids(
+                    interaction_ids)))
+        self.assertEqual(
+            sorted(bundle['additional_angular_modules']),
+            sorted(additional_angular_modules))
+        self.assertEqual(
+            sorted(bundle['dependencies_html'].split('\n')),
+            sorted(dependencies_html.split('\n')))
+        self.assertEqual(
+            bundle['interaction_templates'],
+            rte_component_registry.Registry.get_html_for_all_components() +
+            interaction_registry.Registry.get_interaction_html(
+                interaction_ids))
+
+        skin_assets = player_assets_registry.Registry.get_skin_assets(
+            'conversation_v1')
+        self.assertEqual(
+            skin_assets['tag'],
+            skins_services.Registry.get_skin_tag('conversation_v1'))
+
+    def test_no_files_are_read_after_compilation(self):
+        player_assets_registry.Registry.compile_all()
+
+        def _raise_error(*unused_args, **unused_kwargs):
+            raise Exception('No files should be read.')
+
+        with self.swap(utils, 'get_file_contents', _raise_error):
+            bundle = player_assets_registry.Registry.get_bundle(
+                ['MultipleChoiceInput', 'TextInput'])
+            self.assertIs(
+                player_assets_registry.Registry.get_bundle(
+                    ['TextInput', 'MultipleChoiceInput']),
+                bundle)
+            player_assets_registry.Registry.get_skin_assets('conversation_v1')
+            player_assets_registry.Registry.get_interaction_specs()
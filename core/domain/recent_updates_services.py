@@ -0,0 +1,204 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Services for the feeds of recent updates shown on user dashboards.
+
+Each activity has a small feed holding its last commit and the last message
+in each of its most recently updated feedback threads. The feeds are written
+when the updates happen, so building the list of recent updates for a user
+only requires reading and merging the feeds of the activities that the user
+subscribes to.
+"""
+
+import heapq
+import itertools
+
+from core.platform import models
+(user_models,) = models.Registry.import_models([models.NAMES.user])
+transaction_services = models.Registry.import_transaction_services()
+import feconf
+import utils
+
+
+def _get_activity_id_from_thread_id(thread_id):
+    """Returns the id of the activity to which a feedback thread belongs."""
+    return thread_id.split('.')[0]
+
+
+def record_exploration_commit(
+        exploration_id, exploration_title, committer_id, commit_message,
+        last_updated, is_deleted=False):
+    """Records a commit to an exploration in the exploration's feed.
+
+    The commit replaces the one currently in the feed, unless the latter is
+    more recent. Here, last_updated is the datetime of the commit, and
+    is_deleted should be True if the commit deleted the exploration.
+    """
+    commit_update = {
+        'author_id': committer_id,
+        'last_updated_ms': utils.get_time_in_millisecs(last_updated),
+        'subject': (
+            feconf.COMMIT_MESSAGE_EXPLORATION_DELETED if is_deleted
+            else commit_message),
+    }
+
+    def _update_feed():
+        feed_model = user_models.ActivityRecentUpdatesModel.get(
+            exploration_id, strict=False)
+        if feed_model is None:
+            feed_model = user_models.ActivityRecentUpdatesModel(
+                id=exploration_id)
+        elif (feed_model.last_commit is not None and
+                feed_model.last_commit['last_updated_ms'] >
+                commit_update['last_updated_ms']):
+            return
+
+        feed_model.activity_title = exploration_title
+        feed_model.activity_deleted = is_deleted
+        feed_model.last_commit = commit_update
+        feed_model.put()
+
+    transaction_services.run_in_transaction(_update_feed)
+
+
+def record_feedback_message(
+        exploration_id, thread_id, author_id, thread_subject, created_on):
+    """Records a feedback message in the feed of the exploration to which its
+    thread belongs.
+
+    The message replaces the one currently recorded for the thread, unless the
+    latter is more recent. Here, created_on is the datetime at which the
+    message was created.
+    """
+    feedback_update = {
+        'thread_id': thread_id,
+        'author_id': author_id,
+        'last_updated_ms': utils.get_time_in_millisecs(created_on),
+        'subject': thread_subject,
+    }
+
+    def _update_feed():
+        feed_model = user_models.ActivityRecentUpdatesModel.get(
+            exploration_id, strict=False)
+        if feed_model is None:
+            feed_model = user_models.ActivityRecentUpdatesModel(
+                id=exploration_id)
+
+        feedback_updates = []
+        for update in feed_model.feedback_updates:
+            if update['thread_id'] != thread_id:
+                feedback_updates.append(update)
+            elif (update['last_updated_ms'] >
+                    feedback_update['last_updated_ms']):
+                return
+        feedback_updates.append(feedback_update)
+        feedback_updates.sort(
+            key=lambda update: update['last_updated_ms'], reverse=True)
+
+        feed_model.feedback_updates = feedback_updates[
+            :feconf.MAX_FEEDBACK_UPDATES_PER_ACTIVITY]
+        feed_model.put()
+
+    transaction_services.run_in_transaction(_update_feed)
+
+
+def delete_activity_feed(activity_id):
+    """Deletes the feed of an activity, if it exists."""
+    feed_model = user_models.ActivityRecentUpdatesModel.get(
+        activity_id, strict=False)
+    if feed_model is not None:
+        feed_model.delete()
+
+
+def _get_subscribed_updates(
+        feed_model, is_activity_subscribed, subscribed_thread_ids):
+    """Returns the updates in an activity's feed that a user with the given
+    subscriptions should see, sorted by decreasing 'last_updated_ms'.
+
+    A user who subscribes to an activity sees its commits and, unless it has
+    been deleted, all of its feedback threads.
+    """
+    updates = []
+    if is_activity_subscribed and feed_model.last_commit is not None:
+        updates.append({
+            'type': feconf.UPDATE_TYPE_EXPLORATION_COMMIT,
+            'activity_id': feed_model.id,
+            'activity_title': feed_model.activity_title,
+            'author_id': feed_model.last_commit['author_id'],
+            'last_updated_ms': feed_model.last_commit['last_updated_ms'],
+            'subject': feed_model.last_commit['subject'],
+        })
+
+    include_all_threads = (
+        is_activity_subscribed and not feed_model.activity_deleted)
+    for update in feed_model.feedback_updates:
+        if include_all_threads or update['thread_id'] in subscribed_thread_ids:
+            updates.append({
+                'type': feconf.UPDATE_TYPE_FEEDBACK_MESSAGE,
+                'activity_id': feed_model.id,
+                'activity_title': feed_model.activity_title,
+                'author_id': update['author_id'],
+                'last_updated_ms': update['last_updated_ms'],
+                'subject': update['subject'],
+            })
+
+    return sorted(
+        updates, key=lambda update: update['last_updated_ms'], reverse=True)
+
+
+def get_recent_updates(user_id):
+    """Returns a list of the most recent updates to the activities and
+    feedback threads that the given user subscribes to, sorted by decreasing
+    'last_updated_ms' and truncated to feconf.DEFAULT_QUERY_LIMIT entries.
+
+    Each entry is a dict with keys 'type', 'activity_id', 'activity_title',
+    'last_updated_ms', 'author_id' and 'subject'. Here, 'type' is either
+    feconf.UPDATE_TYPE_EXPLORATION_COMMIT or
+    feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'activity_id' is the id of the
+    exploration being committed to or to which the feedback thread belongs,
+    and 'activity_title' is the corresponding title.
+    """
+    subscriptions_model = user_models.UserSubscriptionsModel.get(
+        user_id, strict=False)
+    if subscriptions_model is None:
+        return []
+
+    subscribed_activity_ids = set(subscriptions_model.activity_ids)
+    subscribed_thread_ids = set(subscriptions_model.feedback_thread_ids)
+    activity_ids = sorted(subscribed_activity_ids | set([
+        _get_activity_id_from_thread_id(thread_id)
+        for thread_id in subscribed_thread_ids]))
+    feed_models = user_models.ActivityRecentUpdatesModel.get_multi(
+        activity_ids)
+
+    # Each list of updates is already sorted, so they are merged lazily and
+    # only the updates that are returned are compared. heapq.merge() sorts in
+    # increasing order, hence the negated timestamps; the other tuple entries
+    # break ties without comparing the update dicts.
+    sorted_update_lists = []
+    for (feed_ind, feed_model) in enumerate(feed_models):
+        if feed_model is None:
+            continue
+        updates = _get_subscribed_updates(
+            feed_model, feed_model.id in subscribed_activity_ids,
+            subscribed_thread_ids)
+        sorted_update_lists.append([
+            (-update['last_updated_ms'], feed_ind, update_ind, update)
+            for (update_ind, update) in enumerate(updates)])
+
+    return [
+        update for (_, _, _, update) in itertools.islice(
+            heapq.merge(*sorted_update_lists), feconf.DEFAULT_QUERY_LIMIT)]
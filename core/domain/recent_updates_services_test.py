@@ -0,0 +1,94 @@
+# coding: utf-8
+#
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the feeds of recent updates."""
+
+import datetime
+
+from core.domain import recent_updates_services
+from core.domain import subscription_services
+from core.tests import test_utils
+import feconf
+
+
+class RecentUpdatesServicesUnitTests(test_utils.GenericTestBase):
+    """Tests for recording and merging recent updates."""
+
+    USER_ID = 'user_id'
+
+    def _get_datetime(self, minutes):
+        return datetime.datetime(2014, 1, 1) + datetime.timedelta(
+            minutes=minutes)
+
+    def _get_update_summaries(self):
+        return [
+            (update['type'], update['activity_id'], update['subject'])
+            for update in recent_updates_services.get_recent_updates(
+                self.USER_ID)]
+
+    def test_updates_of_several_activities_are_merged(self):
+        recent_updates_services.record_exploration_commit(
+            'eid1', 'Title 1', 'author', 'Commit 1', self._get_datetime(1))
+        recent_updates_services.record_exploration_commit(
+            'eid2', 'Title 2', 'author', 'Commit 2', self._get_datetime(3))
+        recent_updates_services.record_feedback_message(
+            'eid1', 'eid1.thread1', 'author', 'Thread 1',
+            self._get_datetime(4))
+        recent_updates_services.record_feedback_message(
+            'eid2', 'eid2.thread2', 'author', 'Thread 2',
+            self._get_datetime(2))
+        recent_updates_services.record_feedback_message(
+            'eid2', 'eid2.thread3', 'author', 'Thread 3',
+            self._get_datetime(5))
+
+        self.assertEqual(self._get_update_summaries(), [])
+
+        # Subscribing to a thread does not show the commits to its activity.
+        subscription_services.subscribe_to_activity(self.USER_ID, 'eid1')
+        subscription_services.subscribe_to_thread(self.USER_ID, 'eid2.thread2')
+        self.assertEqual(self._get_update_summaries(), [
+            (feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'eid1', 'Thread 1'),
+            (feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'eid2', 'Thread 2'),
+            (feconf.UPDATE_TYPE_EXPLORATION_COMMIT, 'eid1', 'Commit 1'),
+        ])
+
+        # Out-of-order updates do not replace more recent ones.
+        recent_updates_services.record_exploration_commit(
+            'eid1', 'Old title', 'author', 'Old commit', self._get_datetime(0))
+        recent_updates_services.record_feedback_message(
+            'eid1', 'eid1.thread1', 'author', 'Old subject',
+            self._get_datetime(0))
+        self.assertEqual(self._get_update_summaries(), [
+            (feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'eid1', 'Thread 1'),
+            (feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'eid2', 'Thread 2'),
+            (feconf.UPDATE_TYPE_EXPLORATION_COMMIT, 'eid1', 'Commit 1'),
+        ])
+
+    def test_least_recently_updated_threads_are_dropped(self):
+        subscription_services.subscribe_to_activity(self.USER_ID, 'eid')
+        with self.swap(feconf, 'MAX_FEEDBACK_UPDATES_PER_ACTIVITY', 2):
+            for (minutes, thread_id) in [(1, 'a'), (2, 'b'), (3, 'c')]:
+                recent_updates_services.record_feedback_message(
+                    'eid', 'eid.%s' % thread_id, 'author',
+                    'Thread %s' % thread_id, self._get_datetime(minutes))
+            # A new message revives a thread that was dropped.
+            recent_updates_services.record_feedback_message(
+                'eid', 'eid.a', 'author', 'Thread a', self._get_datetime(4))
+
+        self.assertEqual(self._get_update_summaries(), [
+            (feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'eid', 'Thread a'),
+            (feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'eid', 'Thread c'),
+        ])
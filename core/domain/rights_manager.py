@@ -19,7 +19,9 @@
 __author__ = 'Sean Lip'
 
 
+import copy
 import logging
+import threading
 
 from core.domain import config_domain
 from core.domain import event_services
@@ -28,7 +30,9 @@ from core.domain import subscription_services
 from core.domain import user_services
 from core.platform import models
 current_user_services = models.Registry.import_current_user_services()
+memcache_services = models.Registry.import_memcache_services()
 (exp_models,) = models.Registry.import_models([models.NAMES.exploration])
+import feconf
 import utils
 
 
@@ -148,6 +152,116 @@ def _get_exploration_rights_from_model(exploration_rights_model):
     )
 
 
+# A request-scoped cache of ExplorationRights domain objects, keyed by
+# exploration id. It is only active between calls to begin_request_scope() and
+# end_request_scope(), which are made by the base controller around each
+# request; outside a request (e.g. in tasks and one-off jobs), rights are
+# always read from memcache or the datastore.
+_request_scope = threading.local()
+
+
+def begin_request_scope():
+    """Starts caching exploration rights for the duration of a request."""
+    _request_scope.exploration_rights = {}
+
+
+def end_request_scope():
+    """Discards the exploration rights cached during the current request."""
+    _request_scope.exploration_rights = None
+
+
+def _get_request_cache():
+    """Returns the dict of exploration rights cached for the current request,
+    or None if no request scope is active.
+    """
+    return getattr(_request_scope, 'exploration_rights', None)
+
+
+def _get_exploration_rights_memcache_key(exploration_id):
+    """Returns the memcache key for the rights of an exploration."""
+    return 'exploration-rights:%s' % exploration_id
+
+
+def _get_exploration_rights_multi(exploration_ids):
+    """Returns a list of ExplorationRights domain objects, one for each of the
+    given exploration ids, with None for explorations that do not exist.
+
+    Each set of rights is looked up first in the request-scoped cache, then in
+    memcache (if enabled), and finally in the datastore. All datastore reads
+    are done using a single get_multi() call. The returned objects are shared
+    with the caches and must not be modified.
+    """
+    request_cache = _get_request_cache()
+    results = {}
+
+    uncached_ids = []
+    for exploration_id in exploration_ids:
+        if request_cache is not None and exploration_id in request_cache:
+            results[exploration_id] = request_cache[exploration_id]
+        elif exploration_id not in uncached_ids:
+            uncached_ids.append(exploration_id)
+
+    if uncached_ids and feconf.CACHE_EXPLORATION_RIGHTS_IN_MEMCACHE:
+        memcache_keys = [
+            _get_exploration_rights_memcache_key(exploration_id)
+            for exploration_id in uncached_ids]
+        memcached_rights = memcache_services.get_multi(memcache_keys)
+        for exploration_id, memcache_key in zip(uncached_ids, memcache_keys):
+            if memcache_key in memcached_rights:
+                results[exploration_id] = memcached_rights[memcache_key]
+        uncached_ids = [
+            exploration_id for exploration_id in uncached_ids
+            if exploration_id not in results]
+
+    if uncached_ids:
+        memcache_update = {}
+        rights_models = exp_models.ExplorationRightsModel.get_multi(
+            uncached_ids)
+        for exploration_id, model in zip(uncached_ids, rights_models):
+            if model is None:
+                results[exploration_id] = None
+            else:
+                results[exploration_id] = _get_exploration_rights_from_model(
+                    model)
+                memcache_update[_get_exploration_rights_memcache_key(
+                    exploration_id)] = results[exploration_id]
+
+        # Use add rather than set, so that a concurrent write of newer rights
+        # is not overwritten by this (possibly stale) read.
+        if memcache_update and feconf.CACHE_EXPLORATION_RIGHTS_IN_MEMCACHE:
+            memcache_services.add_multi(memcache_update)
+
+    if request_cache is not None:
+        request_cache.update(results)
+
+    return [results[exploration_id] for exploration_id in exploration_ids]
+
+
+def _update_exploration_rights_caches(exploration_rights):
+    """Replaces the cached copies of an exploration's rights after they have
+    been committed to the datastore.
+    """
+    exploration_rights = copy.deepcopy(exploration_rights)
+    request_cache = _get_request_cache()
+    if request_cache is not None:
+        request_cache[exploration_rights.id] = exploration_rights
+    if feconf.CACHE_EXPLORATION_RIGHTS_IN_MEMCACHE:
+        memcache_services.set_multi({
+            _get_exploration_rights_memcache_key(exploration_rights.id): (
+                exploration_rights)})
+
+
+def invalidate_exploration_rights_caches(exploration_id):
+    """Removes the cached rights for an exploration. This should be called
+    when the rights model of the exploration is deleted.
+    """
+    request_cache = _get_request_cache()
+    if request_cache is not None:
+        request_cache.pop(exploration_id, None)
+    memcache_services.delete(
+        _get_exploration_rights_memcache_key(exploration_id))
+
+
 def _save_exploration_rights(
         committer_id, exploration_rights, commit_message, commit_cmds):
     """Saves an ExplorationRights domain object to the datastore."""
@@ -165,6 +279,7 @@ def _save_exploration_rights(
     model.viewable_if_private = exploration_rights.viewable_if_private
 
     model.commit(committer_id, commit_message, commit_cmds)
+    _update_exploration_rights_caches(exploration_rights)
 
     # update summary of changed exploration (note that exploration rights id
     # is the same as exploration id)
@@ -187,31 +302,59 @@ def create_new_exploration_rights(exploration_id, committer_id):
         status=exploration_rights.status,
         viewable_if_private=exploration_rights.viewable_if_private,
     ).commit(committer_id, 'Created new exploration', commit_cmds)
+    _update_exploration_rights_caches(exploration_rights)
 
     subscription_services.subscribe_to_activity(
         committer_id, exploration_id)
 
 
-def get_exploration_rights(exploration_id):
-    """Retrieves the rights for this exploration from the datastore."""
-    model = exp_models.ExplorationRightsModel.get(exploration_id)
-    if model is None:
-        raise Exception('This exploration does not exist.')
-    return _get_exploration_rights_from_model(model)
+def get_exploration_rights(exploration_id, readonly=False):
+    """Retrieves the rights for this exploration.
+
+    The result is read from the request-scoped cache or memcache where
+    possible, and from the datastore otherwise. The returned object is a copy
+    and may be modified freely by the caller, unless readonly is True, in
+    which case it may be shared with the request-scoped cache and must not be
+    modified.
+    """
+    exploration_rights = _get_exploration_rights_multi([exploration_id])[0]
+    if exploration_rights is None:
+        raise exp_models.ExplorationRightsModel.EntityNotFoundError(
+            'Entity for class ExplorationRightsModel with id %s not found' %
+            exploration_id)
+    return (
+        exploration_rights if readonly
+        else copy.deepcopy(exploration_rights))
+
+
+def get_multi_exploration_rights(exploration_ids, readonly=False):
+    """Retrieves the rights for several explorations at once.
+
+    Returns a list with one entry per exploration id, in the same order. The
+    entry is None if no (undeleted) exploration with that id exists. As in
+    get_exploration_rights(), the returned objects must not be modified if
+    readonly is True.
+    """
+    multi_exploration_rights = _get_exploration_rights_multi(exploration_ids)
+    if readonly:
+        return multi_exploration_rights
+    return [
+        copy.deepcopy(exploration_rights) for exploration_rights in
+        multi_exploration_rights]
 
 
 def is_exploration_private(exploration_id):
-    exploration_rights = get_exploration_rights(exploration_id)
+    exploration_rights = get_exploration_rights(exploration_id, readonly=True)
     return exploration_rights.status == EXPLORATION_STATUS_PRIVATE
 
 
 def is_exploration_public(exploration_id):
-    exploration_rights = get_exploration_rights(exploration_id)
+    exploration_rights = get_exploration_rights(exploration_id, readonly=True)
     return exploration_rights.status == EXPLORATION_STATUS_PUBLIC
 
 
 def is_exploration_cloned(exploration_id):
-    exploration_rights = get_exploration_rights(exploration_id)
+    exploration_rights = get_exploration_rights(exploration_id, readonly=True)
     return bool(exploration_rights.cloned_from)
 
 
@@ -225,13 +368,47 @@ class Actor(object):
     def is_admin(self):
         return self.user_id in config_domain.ADMIN_IDS.value
 
+    def check_permission_multi(self, permission_name, exploration_ids):
+        """Checks a permission for each of several explorations.
+
+        The rights for all the explorations are fetched together, using at
+        most one datastore get_multi() call, before the individual checks are
+        made. This is intended for listings such as the gallery and the
+        dashboard.
+
+        Args:
+        - permission_name: str. The name of an exploration-specific
+            permission-checking method of this class, such as 'can_play' or
+            'can_edit'.
+        - exploration_ids: list of str. The exploration ids to check.
+
+        Returns:
+          A list of booleans, one for each of the given exploration ids, in
+          the same order.
+        """
+        if not permission_name.startswith('can_'):
+            raise Exception('Invalid permission name: %s' % permission_name)
+        check_permission = getattr(self, permission_name)
+
+        is_new_scope = _get_request_cache() is None
+        if is_new_scope:
+            begin_request_scope()
+        try:
+            _get_exploration_rights_multi(exploration_ids)
+            return [
+                check_permission(exploration_id)
+                for exploration_id in exploration_ids]
+        finally:
+            if is_new_scope:
+                end_request_scope()
+
     def is_moderator(self):
         return (self.is_admin() or
                 self.user_id in config_domain.MODERATOR_IDS.value)
 
     def is_owner(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -245,7 +422,7 @@ class Actor(object):
         in the owner/editor list for the exploration.
         """
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -255,7 +432,7 @@ class Actor(object):
 
     def has_explicit_viewing_rights(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -267,7 +444,7 @@ class Actor(object):
     def can_play(self, exploration_id):
         """Whether the user can play the reader view of this exploration."""
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -285,7 +462,7 @@ class Actor(object):
     def can_edit(self, exploration_id):
         # TODO(sll): Add a check here for whether a user is banned or not,
         # rather than having this check in the controller.
-        exp_rights = get_exploration_rights(exploration_id)
+        exp_rights = get_exploration_rights(exploration_id, readonly=True)
         return (
             self.has_explicit_editing_rights(exploration_id) or (
                 self.is_moderator() and
@@ -298,7 +475,7 @@ class Actor(object):
 
     def can_delete(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -328,7 +505,7 @@ class Actor(object):
             return True
 
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -341,7 +518,7 @@ class Actor(object):
 
     def can_unpublish(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -353,7 +530,7 @@ class Actor(object):
 
     def can_modify_roles(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -363,7 +540,7 @@ class Actor(object):
 
     def can_release_ownership(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -373,7 +550,7 @@ class Actor(object):
 
     def can_submit_change_for_review(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -389,7 +566,7 @@ class Actor(object):
 
     def can_publicize(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -399,7 +576,7 @@ class Actor(object):
 
     def can_unpublicize(self, exploration_id):
         try:
-            exp_rights = get_exploration_rights(exploration_id)
+            exp_rights = get_exploration_rights(exploration_id, readonly=True)
         except Exception:
             return False
 
@@ -19,6 +19,7 @@ __author__ = 'Sean Lip'
 from core.domain import exp_domain
 from core.domain import exp_services
 from core.domain import rights_manager
+import feconf
 import test_utils
 
 
@@ -322,3 +323,118 @@ class ExplorationRightsTests(test_utils.GenericTestBase):
             self.user_id_b).can_change_private_viewability(self.EXP_ID))
         self.assertTrue(rights_manager.Actor(
             self.user_id_admin).can_change_private_viewability(self.EXP_ID))
+
+
+class ExplorationRightsCacheTests(test_utils.GenericTestBase):
+    """Test the caching of exploration rights for permission checks."""
+
+    EXP_ID_1 = 'exp_id_1'
+    EXP_ID_2 = 'exp_id_2'
+
+    def setUp(self):
+        super(ExplorationRightsCacheTests, self).setUp()
+        self.signup('a@example.com', 'A')
+        self.signup('b@example.com', 'B')
+        self.user_id_a = self.get_user_id_from_email('a@example.com')
+        self.user_id_b = self.get_user_id_from_email('b@example.com')
+
+        for exp_id in [self.EXP_ID_1, self.EXP_ID_2]:
+            exp_services.save_new_exploration(
+                self.user_id_a,
+                exp_domain.Exploration.create_default_exploration(
+                    exp_id, 'A title', 'A category'))
+
+        self.datastore_reads = []
+        self.original_get_rights_from_model = (
+            rights_manager._get_exploration_rights_from_model)
+
+    def tearDown(self):
+        rights_manager.end_request_scope()
+        super(ExplorationRightsCacheTests, self).tearDown()
+
+    def _counting_get_rights_from_model(self, model):
+        self.datastore_reads.append(model.id)
+        return self.original_get_rights_from_model(model)
+
+    def _swap_in_read_counter(self):
+        return self.swap(
+            rights_manager, '_get_exploration_rights_from_model',
+            self._counting_get_rights_from_model)
+
+    def test_rights_are_read_once_per_request(self):
+        with self._swap_in_read_counter(), self.swap(
+                feconf, 'CACHE_EXPLORATION_RIGHTS_IN_MEMCACHE', False):
+            rights_manager.begin_request_scope()
+            actor = rights_manager.Actor(self.user_id_b)
+            self.assertFalse(actor.can_play(self.EXP_ID_1))
+            self.assertFalse(actor.can_edit(self.EXP_ID_1))
+            self.assertTrue(rights_manager.is_exploration_private(
+                self.EXP_ID_1))
+            self.assertEqual(self.datastore_reads, [self.EXP_ID_1])
+            rights_manager.end_request_scope()
+
+            # Outside a request scope, every check reads the datastore.
+            actor.can_play(self.EXP_ID_1)
+            self.assertEqual(
+                self.datastore_reads, [self.EXP_ID_1, self.EXP_ID_1])
+
+    def test_memcache_tier_is_updated_when_rights_change(self):
+        with self._swap_in_read_counter():
+            # The rights were cached in memcache when they were created.
+            self.assertFalse(
+                rights_manager.Actor(self.user_id_b).can_edit(self.EXP_ID_1))
+            self.assertEqual(self.datastore_reads, [])
+
+            rights_manager.assign_role(
+                self.user_id_a, self.EXP_ID_1, self.user_id_b,
+                rights_manager.ROLE_EDITOR)
+            self.assertTrue(
+                rights_manager.Actor(self.user_id_b).can_edit(self.EXP_ID_1))
+            self.assertEqual(self.datastore_reads, [])
+
+    def test_request_cache_is_updated_when_rights_change(self):
+        rights_manager.begin_request_scope()
+        actor = rights_manager.Actor(self.user_id_b)
+        self.assertFalse(actor.can_edit(self.EXP_ID_1))
+        rights_manager.assign_role(
+            self.user_id_a, self.EXP_ID_1, self.user_id_b,
+            rights_manager.ROLE_EDITOR)
+        self.assertTrue(actor.can_edit(self.EXP_ID_1))
+
+        exp_services.delete_exploration(self.user_id_a, self.EXP_ID_1)
+        self.assertFalse(actor.can_play(self.EXP_ID_1))
+
+    def test_returned_rights_do_not_alias_cached_rights(self):
+        rights_manager.begin_request_scope()
+        exp_rights = rights_manager.get_exploration_rights(self.EXP_ID_1)
+        exp_rights.owner_ids.append(self.user_id_b)
+        self.assertFalse(
+            rights_manager.Actor(self.user_id_b).is_owner(self.EXP_ID_1))
+
+    def test_check_permission_multi(self):
+        rights_manager.publish_exploration(self.user_id_a, self.EXP_ID_2)
+
+        with self._swap_in_read_counter(), self.swap(
+                feconf, 'CACHE_EXPLORATION_RIGHTS_IN_MEMCACHE', False):
+            actor = rights_manager.Actor(self.user_id_b)
+            self.assertEqual(
+                actor.check_permission_multi(
+                    'can_play', [self.EXP_ID_1, self.EXP_ID_2, 'missing_id']),
+                [False, True, False])
+            self.assertEqual(
+                sorted(self.datastore_reads), [self.EXP_ID_1, self.EXP_ID_2])
+
+        self.assertEqual(
+            rights_manager.Actor(self.user_id_a).check_permission_multi(
+                'can_edit', [self.EXP_ID_1, self.EXP_ID_2]),
+            [True, True])
+
+        with self.assertRaisesRegexp(Exception, 'Invalid permission name'):
+            actor.check_permission_multi('is_admin', [self.EXP_ID_1])
+
+    def test_get_multi_exploration_rights(self):
+        rights_list = rights_manager.get_multi_exploration_rights(
+            [self.EXP_ID_2, 'missing_id', self.EXP_ID_1])
+        self.assertEqual(rights_list[0].id, self.EXP_ID_2)
+        self.assertIsNone(rights_list[1])
+        self.assertEqual(rights_list[2].owner_ids, [self.user_id_a])
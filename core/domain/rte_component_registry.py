@@ -28,11 +28,15 @@ class Registry(object):
     """Registry of all custom rich-text components."""
 
     _rte_components = {}
+    # The dict returned by get_tag_list_with_attrs(), or None if it has not
+    # been computed since the last refresh.
+    _tag_list_with_attrs = None
 
     @classmethod
     def _refresh(cls):
         """Repopulate the registry."""
         cls._rte_components.clear()
+        cls._tag_list_with_attrs = None
 
         # Assemble all paths to the RTE components.
         EXTENSION_PATHS = [
@@ -65,9 +69,14 @@ class Registry(object):
         by the hyphenated version of the name of the RTE component. The values
         are lists of allowed attributes of the form
         [PARAM_NAME]-with-[CUSTOMIZATION_ARG_NAME].
+
+        The dict is computed once per refresh of the registry, and the same
+        object is returned until the next refresh, so callers should not
+        modify it.
         """
-        # TODO(sll): Cache this computation and update it on each refresh.
         component_list = cls.get_all_rte_components()
+        if cls._tag_list_with_attrs is not None:
+            return cls._tag_list_with_attrs
 
         component_tags = {}
         for component in component_list:
@@ -78,6 +87,7 @@ class Registry(object):
                 '%s-with-value' % ca_spec.name
                 for ca_spec in component.customization_arg_specs]
 
+        cls._tag_list_with_attrs = component_tags
         return component_tags
 
     @classmethod
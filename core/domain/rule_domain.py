@@ -18,6 +18,7 @@
 
 __author__ = 'Sean Lip'
 
+import hashlib
 import inspect
 import os
 import pkgutil
@@ -47,39 +48,108 @@ def get_obj_type_for_param_name(rule_class, param_name):
         'Rule %s has no param called %s' % (rule_class.__name__, param_name))
 
 
+class Registry(object):
+    """Registry of all rule classes, indexed by object type and rule name."""
+
+    # Dict mapping object types to dicts, each of which maps the names of the
+    # rules for that object type to the corresponding rule classes.
+    _rules = {}
+    # Whether the rule classes have been loaded into the registry.
+    _loaded = False
+
+    @classmethod
+    def _refresh(cls):
+        cls._rules.clear()
+
+        rule_dir = os.path.join(os.getcwd(), feconf.RULES_DIR)
+        for loader, name, _ in pkgutil.iter_modules(path=[rule_dir]):
+            if name.endswith('_test'):
+                continue
+            module = loader.find_module(name).load_module(name)
+            for name, clazz in inspect.getmembers(module, inspect.isclass):
+                for ancestor in clazz.__bases__:
+                    ancestor_name = ancestor.__name__
+                    if (ancestor_name.endswith('Rule') and
+                            ancestor_name != 'Rule'):
+                        obj_type = ancestor_name[:-len('Rule')]
+                        cls._rules.setdefault(obj_type, {})[
+                            clazz.__name__] = clazz
+
+        cls._loaded = True
+
+    @classmethod
+    def preload(cls):
+        """Loads all rule classes, if they have not been loaded yet.
+
+        This is called when an instance is warmed up, so that the rule
+        modules do not need to be loaded while serving user requests.
+        """
+        if not cls._loaded:
+            cls._refresh()
+
+    @classmethod
+    def get_rules_for_obj_type(cls, obj_type):
+        """Gets a list of all rule classes for a given object type."""
+        cls.preload()
+        return cls._rules.get(obj_type, {}).values()
+
+    @classmethod
+    def get_rule_class(cls, obj_type, rule_name):
+        """Gets the rule class with the given name for a given object type.
+
+        Raises an Exception if there is no such rule.
+        """
+        cls.preload()
+        try:
+            return cls._rules[obj_type][rule_name]
+        except KeyError:
+            raise Exception(
+                'Could not find rule with name %s for object type %s'
+                % (rule_name, obj_type))
+
+    @classmethod
+    def get_descriptions_hash(cls):
+        """Returns a hash of the names and descriptions of all rules. This
+        changes whenever a rule is added, removed or redescribed.
+        """
+        cls.preload()
+        descriptions = sorted([
+            '%s.%s: %s' % (obj_type, rule_name, rule_class.description)
+            for obj_type, rules in cls._rules.iteritems()
+            for rule_name, rule_class in rules.iteritems()])
+        return hashlib.sha1(
+            '\n'.join(descriptions).encode('utf-8')).hexdigest()
+
+
 def get_rules_for_obj_type(obj_type):
     """Gets all rules for a given object type.
 
     Args:
         obj_type: str. The name of the object type.
     """
-    rule_dir = os.path.join(os.getcwd(), feconf.RULES_DIR)
-    rule_class_name = '%sRule' % obj_type
-    results = []
-
-    for loader, name, _ in pkgutil.iter_modules(path=[rule_dir]):
-        if name.endswith('_test'):
-            continue
-        module = loader.find_module(name).load_module(name)
-        for name, clazz in inspect.getmembers(module, inspect.isclass):
-            ancestors = clazz.__bases__
-            ancestor_class_names = [c.__name__ for c in ancestors]
-            if rule_class_name in ancestor_class_names:
-                results.append(clazz)
-
-    return results
+    return Registry.get_rules_for_obj_type(obj_type)
 
 
 def is_generic(obj_type, rule_name):
     """Checks whether this rule is labelled generic"""
-    rule_list = get_rules_for_obj_type(obj_type)
-    for rule_type in rule_list:
-        if rule_type.__name__ == rule_name:
-            return rule_type.is_generic
+    for rule_class in Registry.get_rules_for_obj_type(obj_type):
+        if rule_class.__name__ == rule_name:
+            return rule_class.is_generic
+
+
+# Dict mapping rule descriptions to the corresponding parameter lists.
+_PARAM_LISTS = {}
 
 
 def get_param_list(description):
-    """Get a parameter list from the rule description."""
+    """Get a parameter list from the rule description.
+
+    The result is cached, since the descriptions of rules do not change.
+    """
+    if description in _PARAM_LISTS:
+        return list(_PARAM_LISTS[description])
+
+    original_description = description
     param_list = []
     while description.find('{{') != -1:
         opening_index = description.find('{{')
@@ -97,7 +167,8 @@ def get_param_list(description):
             (param_name, getattr(objects, normalizer_string))
         )
 
-    return param_list
+    _PARAM_LISTS[original_description] = param_list
+    return list(param_list)
 
 
 class Rule(object):
@@ -217,11 +288,8 @@ def get_rule_description(definition, param_specs, answer_type):
         else:
             subject_type = param_specs[definition['subject']].obj_type
 
-        all_rule_classes = get_rules_for_obj_type(subject_type)
-
-        rule = next(r for r in all_rule_classes
-                    if r.__name__ == definition['name'])
-        return rule.description
+        return Registry.get_rule_class(
+            subject_type, definition['name']).description
 
     elif definition['rule_type'] == AND_RULE_TYPE:
         return ' and '.join([
@@ -247,15 +315,23 @@ def get_rule_description(definition, param_specs, answer_type):
         raise Exception('Unrecognized rule type %s' % definition['rule_type'])
 
 
-def evaluate_rule(definition, param_specs, answer_type, context_params, answer,
-                  fs):
-    """Evaluates a rule definition using context_params. Returns a boolean."""
+def compile_rule(definition, param_specs, answer_type):
+    """Compiles a rule definition into a function that evaluates it.
 
+    All the work that does not depend on the context params or the answer is
+    done here: the rule classes are resolved, the rule inputs that are
+    constants are normalized, and the rule inputs that are Jinja templates
+    are parsed.
+
+    Returns:
+      a function that takes (context_params, answer, fs) as arguments and
+      returns a boolean, with the same semantics as evaluate_rule().
+    """
     if 'rule_type' not in definition:
         raise Exception('No rule type specified when constructing rule.')
 
     elif definition['rule_type'] == DEFAULT_RULE_TYPE:
-        return True
+        return lambda context_params, answer, fs: True
 
     elif definition['rule_type'] == ATOMIC_RULE_TYPE:
         subject_name = definition['subject']
@@ -265,49 +341,76 @@ def evaluate_rule(definition, param_specs, answer_type, context_params, answer,
         else:
             subject_type = param_specs[subject_name].obj_type
 
-        all_rule_classes = get_rules_for_obj_type(subject_type)
-        rule = next(r for r in all_rule_classes
-                    if r.__name__ == definition['name'])
-
-        param_list = []
-        param_defns = get_param_list(rule.description)
-        for (param_name, obj_cls) in param_defns:
-            parsed_param = definition['inputs'][param_name]
-            if (isinstance(parsed_param, basestring) and '{{' in parsed_param):
-                parsed_param = jinja_utils.parse_string(
-                    parsed_param, context_params, autoescape=False)
-            normalized_param = obj_cls.normalize(parsed_param)
-            param_list.append(normalized_param)
-
-        if subject_name == 'answer':
-            subject = answer
-        else:
-            subject = context_params[subject_name]
-
-        constructed_rule = rule(*param_list)
-        constructed_rule.set_fs(fs)
-        return constructed_rule.eval(subject)
+        rule_class = Registry.get_rule_class(subject_type, definition['name'])
+
+        # A list of (compiled_string, obj_cls, normalized_value) 3-tuples,
+        # one for each rule input. Exactly one of compiled_string and
+        # normalized_value is not None.
+        compiled_inputs = []
+        for (param_name, obj_cls) in get_param_list(rule_class.description):
+            raw_input = definition['inputs'][param_name]
+            if isinstance(raw_input, basestring) and '{{' in raw_input:
+                compiled_inputs.append((
+                    jinja_utils.CompiledString(raw_input, autoescape=False),
+                    obj_cls, None))
+            else:
+                compiled_inputs.append(
+                    (None, obj_cls, obj_cls.normalize(raw_input)))
+
+        # If no inputs depend on the context params, the rule object can be
+        # constructed once and reused.
+        constant_rule = (
+            rule_class(*[item[2] for item in compiled_inputs])
+            if all([item[0] is None for item in compiled_inputs]) else None)
+
+        def evaluate_atomic_rule(context_params, answer, fs):
+            if constant_rule is not None:
+                constructed_rule = constant_rule
+            else:
+                constructed_rule = rule_class(*[
+                    normalized_value if compiled_string is None
+                    else obj_cls.normalize(
+                        compiled_string.render(context_params))
+                    for (compiled_string, obj_cls, normalized_value)
+                    in compiled_inputs])
+
+            subject = (
+                answer if subject_name == 'answer'
+                else context_params[subject_name])
+            return constructed_rule.set_fs(fs).eval(subject)
+
+        return evaluate_atomic_rule
 
     elif definition['rule_type'] == AND_RULE_TYPE:
-        for child_dict in definition['children']:
-            if not evaluate_rule(
-                    child_dict, param_specs, answer_type, context_params,
-                    answer):
-                return False
-        return True
+        compiled_children = [
+            compile_rule(child_dict, param_specs, answer_type)
+            for child_dict in definition['children']]
+        return lambda context_params, answer, fs: all(
+            child(context_params, answer, fs) for child in compiled_children)
 
     elif definition['rule_type'] == OR_RULE_TYPE:
-        for child_dict in definition['children']:
-            if evaluate_rule(
-                    child_dict, param_specs, answer_type, context_params,
-                    answer):
-                return True
-        return False
+        compiled_children = [
+            compile_rule(child_dict, param_specs, answer_type)
+            for child_dict in definition['children']]
+        return lambda context_params, answer, fs: any(
+            child(context_params, answer, fs) for child in compiled_children)
 
     elif definition['rule_type'] == NOT_RULE_TYPE:
-        return (not evaluate_rule(
-            definition['child'], param_specs, answer_type, context_params,
-            answer))
+        compiled_child = compile_rule(
+            definition['child'], param_specs, answer_type)
+        return lambda context_params, answer, fs: (
+            not compiled_child(context_params, answer, fs))
 
     else:
         raise Exception('Unrecognized rule type %s' % definition['rule_type'])
+
+
+def evaluate_rule(definition, param_specs, answer_type, context_params, answer,
+                  fs):
+    """Evaluates a rule definition using context_params. Returns a boolean.
+
+    Callers that evaluate the same rule definition repeatedly should use
+    compile_rule() instead.
+    """
+    return compile_rule(definition, param_specs, answer_type)(
+        context_params, answer, fs)
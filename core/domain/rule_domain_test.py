@@ -50,6 +50,49 @@ class RuleServicesUnitTests(test_utils.GenericTestBase):
             len(rule_domain.get_rules_for_obj_type('FakeObjType')), 0)
 
 
+class RuleRegistryUnitTests(test_utils.GenericTestBase):
+    """Tests for the rule registry."""
+
+    def test_rule_classes_are_loaded_once(self):
+        rule_class = rule_domain.Registry.get_rule_class(
+            'Real', 'IsGreaterThan')
+        self.assertEqual(rule_class.__name__, 'IsGreaterThan')
+        self.assertIs(
+            rule_domain.Registry.get_rule_class('Real', 'IsGreaterThan'),
+            rule_class)
+        self.assertIn(rule_class, rule_domain.get_rules_for_obj_type('Real'))
+
+    def test_descriptions_hash_changes_with_descriptions(self):
+        descriptions_hash = rule_domain.Registry.get_descriptions_hash()
+        self.assertEqual(
+            rule_domain.Registry.get_descriptions_hash(), descriptions_hash)
+
+        rule_class = rule_domain.Registry.get_rule_class(
+            'Real', 'IsGreaterThan')
+        with self.swap(rule_class, 'description', 'is more than {{x|Real}}'):
+            self.assertNotEqual(
+                rule_domain.Registry.get_descriptions_hash(),
+                descriptions_hash)
+
+    def test_get_nonexistent_rule_class(self):
+        with self.assertRaisesRegexp(Exception, 'Could not find rule'):
+            rule_domain.Registry.get_rule_class('Real', 'FakeRule')
+        with self.assertRaisesRegexp(Exception, 'Could not find rule'):
+            rule_domain.Registry.get_rule_class('FakeObjType', 'Equals')
+
+    def test_param_lists_are_cached(self):
+        description = 'is between {{x|Real}} and {{y|UnicodeString}}'
+        param_list = rule_domain.get_param_list(description)
+        self.assertEqual(
+            param_list, [('x', objects.Real), ('y', objects.UnicodeString)])
+
+        # Modifying the returned list does not affect the cached value.
+        param_list.append(('z', objects.Int))
+        self.assertEqual(
+            rule_domain.get_param_list(description),
+            [('x', objects.Real), ('y', objects.UnicodeString)])
+
+
 class RuleDomainUnitTests(test_utils.GenericTestBase):
     """Tests for rules."""
 
@@ -76,6 +119,68 @@ class RuleDomainUnitTests(test_utils.GenericTestBase):
         self.assertFalse(rule_domain.is_generic('UnicodeString', 'Equals'))
 
 
+class RuleCompilationUnitTests(test_utils.GenericTestBase):
+    """Tests for compiling rule definitions."""
+
+    def test_compile_atomic_rule(self):
+        compiled_rule = rule_domain.compile_rule({
+            'rule_type': rule_domain.ATOMIC_RULE_TYPE,
+            'name': 'IsGreaterThan',
+            'subject': 'answer',
+            'inputs': {'x': 5},
+        }, {}, 'Real')
+        self.assertTrue(compiled_rule({}, 6, None))
+        self.assertFalse(compiled_rule({}, 4, None))
+
+    def test_compile_rule_with_parameterized_inputs(self):
+        compiled_rule = rule_domain.compile_rule({
+            'rule_type': rule_domain.ATOMIC_RULE_TYPE,
+            'name': 'IsGreaterThan',
+            'subject': 'answer',
+            'inputs': {'x': '{{threshold}}'},
+        }, {}, 'Real')
+        self.assertTrue(compiled_rule({'threshold': 5}, 6, None))
+        self.assertFalse(compiled_rule({'threshold': 7}, 6, None))
+
+    def test_compile_composite_rules(self):
+        greater_than_five = {
+            'rule_type': rule_domain.ATOMIC_RULE_TYPE,
+            'name': 'IsGreaterThan',
+            'subject': 'answer',
+            'inputs': {'x': 5},
+        }
+        less_than_ten = {
+            'rule_type': rule_domain.ATOMIC_RULE_TYPE,
+            'name': 'IsLessThan',
+            'subject': 'answer',
+            'inputs': {'x': 10},
+        }
+
+        and_rule = rule_domain.compile_rule({
+            'rule_type': rule_domain.AND_RULE_TYPE,
+            'children': [greater_than_five, less_than_ten],
+        }, {}, 'Real')
+        self.assertTrue(and_rule({}, 7, None))
+        self.assertFalse(and_rule({}, 12, None))
+
+        or_rule = rule_domain.compile_rule({
+            'rule_type': rule_domain.OR_RULE_TYPE,
+            'children': [greater_than_five, less_than_ten],
+        }, {}, 'Real')
+        self.assertTrue(or_rule({}, 12, None))
+
+        not_rule = rule_domain.compile_rule({
+            'rule_type': rule_domain.NOT_RULE_TYPE,
+            'child': greater_than_five,
+        }, {}, 'Real')
+        self.assertTrue(not_rule({}, 3, None))
+        self.assertFalse(not_rule({}, 7, None))
+
+        default_rule = rule_domain.compile_rule(
+            {'rule_type': rule_domain.DEFAULT_RULE_TYPE}, {}, 'Real')
+        self.assertTrue(default_rule({}, 3, None))
+
+
 class RuleDataUnitTests(test_utils.GenericTestBase):
     """Tests for the actual rules in extensions/."""
 
@@ -60,8 +60,19 @@ class StateRuleAnswerLog(object):
         answer_log_models = (
             stats_models.StateRuleAnswerLogModel.get_or_create_multi(
                 exploration_id, rule_data))
-        return [cls(answer_log_model.answers)
-                for answer_log_model in answer_log_models]
+        # Include answers that have been submitted but not yet merged into
+        # the answer logs.
+        buffered_answers = stats_models.get_buffered_answers(exploration_id)
+
+        answer_logs = []
+        for answer_log_model in answer_log_models:
+            answer_log = cls(answer_log_model.answers)
+            for answer, count in buffered_answers.get(
+                    answer_log_model.id, {}).iteritems():
+                answer_log.answers[answer] = (
+                    answer_log.answers.get(answer, 0) + count)
+            answer_logs.append(answer_log)
+        return answer_logs
 
     @classmethod
     def get(cls, exploration_id, state_name, handler_name, rule_str):
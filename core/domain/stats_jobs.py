@@ -14,10 +14,14 @@
 
 """Jobs for statistics views."""
 
-import ast
 import collections
+import datetime
+import itertools
+import json
+import random
 
 from core import jobs
+from core.domain import config_domain
 from core.platform import models
 (base_models, stats_models, exp_models,) = models.Registry.import_models([
     models.NAMES.base_model, models.NAMES.statistics, models.NAMES.exploration
@@ -32,8 +36,22 @@ _NO_SPECIFIED_VERSION_STRING = 'none'
 _ALL_VERSIONS_STRING = 'all'
 
 
+HIGH_TRAFFIC_EXPLORATION_IDS = config_domain.ConfigProperty(
+    'high_traffic_exploration_ids', config_domain.SET_OF_STRINGS_SCHEMA,
+    'Ids of explorations (e.g. featured ones) whose realtime statistics '
+    'counters should be spread over more shards, so that they can absorb '
+    'more start and completion events', [])
+
+
 class StatisticsRealtimeModel(
         jobs.BaseRealtimeDatastoreClassForContinuousComputations):
+    """A shard of the realtime start and completion counters for an
+    exploration.
+
+    The realtime id of instances of this class has the form
+        [LAYER_INDEX]:[EXPLORATION_ID]:[SHARD_INDEX]
+    The counters for an exploration are the sums of those of its shards.
+    """
     num_starts = ndb.IntegerProperty(default=0)
     num_completions = ndb.IntegerProperty(default=0)
 
@@ -56,44 +74,55 @@ class StatisticsAggregator(jobs.BaseContinuousComputationManager):
     def _get_batch_job_manager_class(cls):
         return StatisticsMRJobManager
 
+    @classmethod
+    def _get_num_realtime_shards(cls, exploration_id):
+        """Returns the number of realtime counter shards for the given
+        exploration.
+
+        Note that changing the number of shards for an exploration discards
+        (for reads) or splits (for writes) its realtime counts until the next
+        batch job has run, since the realtime layer only holds the events that
+        arrived after the last batch job started.
+        """
+        if exploration_id in HIGH_TRAFFIC_EXPLORATION_IDS.value:
+            return feconf.NUM_HIGH_TRAFFIC_STATISTICS_REALTIME_SHARDS
+        return feconf.NUM_STATISTICS_REALTIME_SHARDS
+
+    @classmethod
+    def _get_realtime_shard_ids(cls, realtime_layer, exploration_id):
+        """Returns the realtime ids of all the counter shards for the given
+        exploration in the given realtime layer.
+        """
+        realtime_class = cls._get_realtime_datastore_class()
+        return [
+            realtime_class.get_realtime_id(
+                realtime_layer, '%s:%s' % (exploration_id, shard_index))
+            for shard_index in range(
+                cls._get_num_realtime_shards(exploration_id))]
+
     @classmethod
     def _handle_incoming_event(cls, active_realtime_layer, event_type, *args):
         exp_id = args[0]
+        # Spread the writes for an exploration over its shards, so that
+        # concurrent events rarely contend for the same entity group.
+        realtime_model_id = random.choice(
+            cls._get_realtime_shard_ids(active_realtime_layer, exp_id))
 
-        def _increment_visit_counter():
+        def _increment_counter():
             realtime_class = cls._get_realtime_datastore_class()
-            realtime_model_id = realtime_class.get_realtime_id(
-                active_realtime_layer, exp_id)
-
             model = realtime_class.get(realtime_model_id, strict=False)
             if model is None:
-                realtime_class(
-                    id=realtime_model_id, num_starts=1,
-                    realtime_layer=active_realtime_layer).put()
-            else:
-                model.num_starts += 1
-                model.put()
-
-        def _increment_completion_counter():
-            realtime_class = cls._get_realtime_datastore_class()
-            realtime_model_id = realtime_class.get_realtime_id(
-                active_realtime_layer, exp_id)
+                model = realtime_class(
+                    id=realtime_model_id,
+                    realtime_layer=active_realtime_layer)
 
-            model = realtime_class.get(realtime_model_id, strict=False)
-            if model is None:
-                realtime_class(
-                    id=realtime_model_id, num_completions=1,
-                    realtime_layer=active_realtime_layer).put()
+            if event_type == feconf.EVENT_TYPE_START_EXPLORATION:
+                model.num_starts += 1
             else:
                 model.num_completions += 1
-                model.put()
+            model.put()
 
-        if event_type == feconf.EVENT_TYPE_START_EXPLORATION:
-            transaction_services.run_in_transaction(
-                _increment_visit_counter)
-        else:
-            transaction_services.run_in_transaction(
-                _increment_completion_counter)
+        transaction_services.run_in_transaction(_increment_counter)
 
     # Public query method.
     @classmethod
@@ -133,11 +162,13 @@ class StatisticsAggregator(jobs.BaseContinuousComputationManager):
             state_hit_counts = mr_model.state_hit_counts
             last_updated = utils.get_time_in_millisecs(mr_model.last_updated)
 
-        realtime_model = cls._get_realtime_datastore_class().get(
-            cls.get_active_realtime_layer_id(exploration_id), strict=False)
-        if realtime_model is not None:
-            num_starts += realtime_model.num_starts
-            num_completions += realtime_model.num_completions
+        realtime_models = cls._get_realtime_datastore_class().get_multi(
+            cls._get_realtime_shard_ids(
+                cls._get_active_realtime_index(), exploration_id))
+        for realtime_model in realtime_models:
+            if realtime_model is not None:
+                num_starts += realtime_model.num_starts
+                num_completions += realtime_model.num_completions
 
         return {
             'start_exploration_count': num_starts,
@@ -147,15 +178,100 @@ class StatisticsAggregator(jobs.BaseContinuousComputationManager):
         }
 
 
+# Keys of the partial aggregates that StatisticsMRJobManager passes from its
+# mappers, through its combiner, to its reducer. They are kept short since
+# one partial aggregate is emitted for every event log entry.
+_PARTIAL_NUM_STARTS = 's'
+_PARTIAL_NUM_COMPLETIONS = 'c'
+# {state_name: number of state hit events}
+_PARTIAL_STATE_HITS = 'h'
+# {state_name: [session ids that have hit this state]}
+_PARTIAL_STATE_SESSIONS = 'u'
+# [Session ids with a maybe-leave event at the END state]
+_PARTIAL_END_SESSIONS = 'e'
+# {session_id: [created-on msec of its latest maybe-leave event at a
+#  non-END state, the name of that state]}
+_PARTIAL_LEAVES = 'l'
+# {state_name: [first_entry_count, subsequent_entries_count,
+#  resolved_answer_count, active_answer_count]} from legacy StateCounterModels.
+_PARTIAL_STATE_COUNTERS = 'k'
+# The msec at which the batch job run that emitted the aggregate was queued.
+# The run folds in the events created at or before this time.
+_PARTIAL_FOLDED_UNTIL_MSEC = 'm'
+
+# Caches, for each batch job run, the msec up to which events have already
+# been folded into the stored results for a given reducer key.
+_EVENTS_FOLDED_UNTIL_MSEC_CACHE = utils.LRUCache(
+    feconf.STATISTICS_MR_WATERMARK_CACHE_MAX_ENTRIES)
+
+
+def _encode_partial_aggregate(partial):
+    return json.dumps(partial, separators=(',', ':'))
+
+
+def _merge_partial_aggregates(target, partial):
+    """Folds the partial aggregate `partial` into `target`, in place."""
+    for field in [_PARTIAL_NUM_STARTS, _PARTIAL_NUM_COMPLETIONS]:
+        if field in partial:
+            target[field] = target.get(field, 0) + partial[field]
+
+    if _PARTIAL_FOLDED_UNTIL_MSEC in partial:
+        target[_PARTIAL_FOLDED_UNTIL_MSEC] = max(
+            target.get(_PARTIAL_FOLDED_UNTIL_MSEC, 0),
+            partial[_PARTIAL_FOLDED_UNTIL_MSEC])
+
+    target_hits = target.setdefault(_PARTIAL_STATE_HITS, {})
+    for state_name, count in partial.get(_PARTIAL_STATE_HITS, {}).iteritems():
+        target_hits[state_name] = target_hits.get(state_name, 0) + count
+
+    target_sessions = target.setdefault(_PARTIAL_STATE_SESSIONS, {})
+    for state_name, session_ids in partial.get(
+            _PARTIAL_STATE_SESSIONS, {}).iteritems():
+        target_sessions[state_name] = sorted(
+            set(target_sessions.get(state_name, [])).union(session_ids))
+
+    if partial.get(_PARTIAL_END_SESSIONS):
+        target[_PARTIAL_END_SESSIONS] = sorted(
+            set(target.get(_PARTIAL_END_SESSIONS, [])).union(
+                partial[_PARTIAL_END_SESSIONS]))
+
+    target_leaves = target.setdefault(_PARTIAL_LEAVES, {})
+    for session_id, leave in partial.get(_PARTIAL_LEAVES, {}).iteritems():
+        if (session_id not in target_leaves or
+                target_leaves[session_id][0] < leave[0]):
+            target_leaves[session_id] = leave
+
+    target_counters = target.setdefault(_PARTIAL_STATE_COUNTERS, {})
+    for state_name, counts in partial.get(
+            _PARTIAL_STATE_COUNTERS, {}).iteritems():
+        if state_name in target_counters:
+            counts = [
+                old + new for (old, new) in zip(
+                    target_counters[state_name], counts)]
+        target_counters[state_name] = counts
+
+
 class StatisticsMRJobManager(
         jobs.BaseMapReduceJobManagerForContinuousComputations):
     """Job that calculates and creates stats models for exploration view.
        Includes: * number of visits to the exploration
                  * number of completions of the exploration
-    """
 
-    _TYPE_STATE_COUNTER_STRING = 'counter'
-    _TYPE_EVENT_STRING = 'event'
+    The job is incremental: each run folds in the events created after the
+    previous run was queued, and at or before it was queued itself. The
+    stored ExplorationAnnotationsModel for each (exploration, version) pair
+    records the queued time of the run that last updated it, and later runs
+    add the counts of newer events to the stored ones. The input reader only
+    reads the events created since the last completed run was queued, rather
+    than the whole event history. Each mapped entity is turned into a small
+    partial aggregate (see _merge_partial_aggregates()), which the combiner
+    merges before the values are shuffled to the reducer.
+
+    Since session ids are not stored, first entry counts are summed across
+    runs, so a session that spans two runs is counted once in each. Likewise,
+    a session that leaves in one run and completes the exploration in a later
+    one is counted as a 'no answer' in the first.
+    """
 
     @classmethod
     def _get_continuous_computation_class(cls):
@@ -168,45 +284,99 @@ class StatisticsMRJobManager(
                 stats_models.StateHitEventLogEntryModel,
                 stats_models.StateCounterModel]
 
+    @classmethod
+    def _get_input_filters(cls):
+        # Events created before the last completed run was queued have been
+        # folded into the stored results already. If a later run failed, it
+        # may have folded in some newer events too; map() skips those.
+        last_queued_msec = cls._get_last_completed_job_queued_msec()
+        if last_queued_msec is None:
+            return None
+        # This is the inverse of utils.get_time_in_millisecs().
+        return [('created_on', '>=', datetime.datetime.fromtimestamp(
+            last_queued_msec / 1000.0))]
+
+    @staticmethod
+    def _get_events_folded_until_msec(exploration_id, version):
+        """Returns the msec up to which events have already been folded into
+        the stored results for the given exploration id and version string,
+        or 0 if there are no such results.
+        """
+        cache_key = (
+            StatisticsMRJobManager.get_mapper_param(
+                jobs.MAPPER_PARAM_KEY_QUEUED_TIME_MSECS),
+            exploration_id, version)
+        events_folded_until_msec = _EVENTS_FOLDED_UNTIL_MSEC_CACHE.get(
+            cache_key)
+        if events_folded_until_msec is None:
+            annotations = stats_models.ExplorationAnnotationsModel.get(
+                stats_models.ExplorationAnnotationsModel.get_entity_id(
+                    exploration_id, version), strict=False)
+            events_folded_until_msec = (
+                annotations.events_folded_until_msec
+                if annotations and annotations.events_folded_until_msec
+                else 0)
+            _EVENTS_FOLDED_UNTIL_MSEC_CACHE.put(
+                cache_key, events_folded_until_msec)
+        return events_folded_until_msec
+
     @staticmethod
     def map(item):
-        if StatisticsMRJobManager._entity_created_before_job_queued(item):
-            if isinstance(item, stats_models.StateCounterModel):
-                first_dot_index = item.id.find('.')
-                exploration_id = item.id[:first_dot_index]
-                state_name = item.id[first_dot_index + 1:]
-
-                value = {
-                    'type': StatisticsMRJobManager._TYPE_STATE_COUNTER_STRING,
-                    'exploration_id': exploration_id,
-                    'version': _NO_SPECIFIED_VERSION_STRING,
-                    'state_name': state_name,
-                    'first_entry_count': item.first_entry_count,
-                    'subsequent_entries_count': item.subsequent_entries_count,
-                    'resolved_answer_count': item.resolved_answer_count,
-                    'active_answer_count': item.active_answer_count}
-                yield (
-                    '%s:%s' % (exploration_id, _NO_SPECIFIED_VERSION_STRING),
-                    value)
-                yield ('%s:%s' % (exploration_id, _ALL_VERSIONS_STRING), value)
-            else:
-                version = _NO_SPECIFIED_VERSION_STRING
-                if version is not None:
-                    version = str(item.exploration_version)
-
-                value = {
-                    'type': StatisticsMRJobManager._TYPE_EVENT_STRING,
-                    'event_type': item.event_type,
-                    'session_id': item.session_id,
-                    'state_name': item.state_name,
-                    'created_on': utils.get_time_in_millisecs(item.created_on),
-                    'exploration_id': item.exploration_id,
-                    'version': version}
-
-                yield ('%s:%s' % (item.exploration_id, version), value)
-                yield (
-                    '%s:%s' % (item.exploration_id, _ALL_VERSIONS_STRING),
-                    value)
+        if not StatisticsMRJobManager._entity_created_before_job_queued(item):
+            return
+
+        created_on_msec = utils.get_time_in_millisecs(item.created_on)
+        partial = {
+            _PARTIAL_FOLDED_UNTIL_MSEC: (
+                StatisticsMRJobManager._get_job_queued_msec()),
+        }
+        if isinstance(item, stats_models.StateCounterModel):
+            first_dot_index = item.id.find('.')
+            exploration_id = item.id[:first_dot_index]
+            state_name = item.id[first_dot_index + 1:]
+            version = _NO_SPECIFIED_VERSION_STRING
+
+            partial[_PARTIAL_STATE_COUNTERS] = {
+                state_name: [
+                    item.first_entry_count, item.subsequent_entries_count,
+                    item.resolved_answer_count, item.active_answer_count]}
+        else:
+            exploration_id = item.exploration_id
+            version = str(item.exploration_version)
+
+            # Note: sometimes, item.state_name is None for
+            # StateHitEventLogEntryModel.
+            # TODO(sll): Track down the reason for this, and fix it.
+            state_name = item.state_name
+            if item.event_type == feconf.EVENT_TYPE_START_EXPLORATION:
+                partial[_PARTIAL_NUM_STARTS] = 1
+            elif item.event_type == feconf.EVENT_TYPE_MAYBE_LEAVE_EXPLORATION:
+                # If this maybe-leave event is on the end state, it is a
+                # completion.
+                if state_name == feconf.END_DEST:
+                    partial[_PARTIAL_NUM_COMPLETIONS] = 1
+                    partial[_PARTIAL_END_SESSIONS] = [item.session_id]
+                else:
+                    partial[_PARTIAL_LEAVES] = {
+                        item.session_id: [created_on_msec, state_name]}
+            elif item.event_type == feconf.EVENT_TYPE_STATE_HIT:
+                partial[_PARTIAL_STATE_HITS] = {state_name: 1}
+                partial[_PARTIAL_STATE_SESSIONS] = {
+                    state_name: [item.session_id]}
+
+        value = _encode_partial_aggregate(partial)
+        for version_key in [version, _ALL_VERSIONS_STRING]:
+            if (created_on_msec >
+                    StatisticsMRJobManager._get_events_folded_until_msec(
+                        exploration_id, version_key)):
+                yield ('%s:%s' % (exploration_id, version_key), value)
+
+    @staticmethod
+    def combine(key, values, previously_combined_values):
+        partial = {}
+        for value_str in itertools.chain(previously_combined_values, values):
+            _merge_partial_aggregates(partial, json.loads(value_str))
+        yield _encode_partial_aggregate(partial)
 
     @staticmethod
     def reduce(key, stringified_values):
@@ -223,18 +393,12 @@ class StatisticsMRJobManager(
         except base_models.BaseModel.EntityNotFoundError:
             return
 
-        # Number of times exploration was started
-        new_models_start_count = 0
-        # Number of times exploration was completed
-        new_models_complete_count = 0
-        # Session ids that have completed this state
-        new_models_end_sessions = set()
-        # {session_id: (created-on timestamp of last known maybe leave event,
-        # state_name)}
-        session_id_to_latest_leave_event = collections.defaultdict(
-            lambda: (0, ''))
-        old_models_start_count = 0
-        old_models_complete_count = 0
+        partial = {}
+        for value_str in stringified_values:
+            _merge_partial_aggregates(partial, json.loads(value_str))
+
+        num_starts = partial.get(_PARTIAL_NUM_STARTS, 0)
+        num_completions = partial.get(_PARTIAL_NUM_COMPLETIONS, 0)
 
         # {state_name: {'total_entry_count': ...,
         #               'first_entry_count': ...,
@@ -248,94 +412,75 @@ class StatisticsMRJobManager(
                 'no_answer_count': 0,
             }
 
-        # {state_name: set(session ids that have reached this state)}
-        state_session_ids = collections.defaultdict(set)
-        for state_name in exploration.states:
-            state_session_ids[state_name] = set([])
-
-        # Iterate over and process each event for this exploration.
-        for value_str in stringified_values:
-            value = ast.literal_eval(value_str)
-
-            # Convert the state name to unicode, if necessary.
-            # Note: sometimes, item.state_name is None for
-            # StateHitEventLogEntryModel.
-            # TODO(sll): Track down the reason for this, and fix it.
-            if (value['state_name'] is not None and
-                    not isinstance(value['state_name'], unicode)):
-                value['state_name'] = value['state_name'].decode('utf-8')
-
-            if (value['type'] ==
-                    StatisticsMRJobManager._TYPE_STATE_COUNTER_STRING):
-                if value['state_name'] == exploration.init_state_name:
-                    old_models_start_count = value['first_entry_count']
-                if value['state_name'] == feconf.END_DEST:
-                    old_models_complete_count = value['first_entry_count']
-                else:
-                    state_hit_counts[state_name]['no_answer_count'] += (
-                        value['first_entry_count']
-                        + value['subsequent_entries_count']
-                        - value['resolved_answer_count']
-                        - value['active_answer_count'])
-                    state_hit_counts[state_name]['first_entry_count'] += (
-                        value['first_entry_count'])
-                    state_hit_counts[state_name]['total_entry_count'] += (
-                        value['first_entry_count']
-                        + value['subsequent_entries_count'])
-                continue
-            event_type = value['event_type']
-            state_name = value['state_name']
-            created_on = value['created_on']
-            session_id = value['session_id']
-
-            # If this is a start event, increment start count.
-            if event_type == feconf.EVENT_TYPE_START_EXPLORATION:
-                new_models_start_count += 1
-            elif event_type == feconf.EVENT_TYPE_MAYBE_LEAVE_EXPLORATION:
-                # If this maybe-leave event is on the end state, it is a
-                # completion.
-                if state_name == feconf.END_DEST:
-                    new_models_complete_count += 1
-                    # Track that we have seen a 'real' end for this session id
-                    new_models_end_sessions.add(session_id)
-                else:
-                    # If this is not on the end state, identify the last
-                    # learner event for this session.
-                    latest_timestamp_so_far, _ = (
-                        session_id_to_latest_leave_event[session_id])
-                    if latest_timestamp_so_far < created_on:
-                        latest_timestamp_so_far = created_on
-                        session_id_to_latest_leave_event[session_id] = (
-                            created_on, state_name)
-            # If this is a state hit, increment the total count and record that
-            # we have seen this session id.
-            elif event_type == feconf.EVENT_TYPE_STATE_HIT:
-                state_hit_counts[state_name]['total_entry_count'] += 1
-                state_session_ids[state_name].add(session_id)
-
-        # After iterating through all events, take the size of the set of
-        # session ids as the first entry count.
-        for state_name in state_session_ids:
+        for state_name, counts in partial[
+                _PARTIAL_STATE_COUNTERS].iteritems():
+            (first_entry_count, subsequent_entries_count,
+             resolved_answer_count, active_answer_count) = counts
+            if state_name == exploration.init_state_name:
+                num_starts += first_entry_count
+            if state_name == feconf.END_DEST:
+                num_completions += first_entry_count
+            else:
+                state_hit_counts[state_name]['no_answer_count'] += (
+                    first_entry_count + subsequent_entries_count
+                    - resolved_answer_count - active_answer_count)
+                state_hit_counts[state_name]['first_entry_count'] += (
+                    first_entry_count)
+                state_hit_counts[state_name]['total_entry_count'] += (
+                    first_entry_count + subsequent_entries_count)
+
+        for state_name, count in partial[_PARTIAL_STATE_HITS].iteritems():
+            state_hit_counts[state_name]['total_entry_count'] += count
+
+        # Take the number of distinct session ids that have hit a state as its
+        # first entry count.
+        state_sessions = partial[_PARTIAL_STATE_SESSIONS]
+        for state_name in set(exploration.states).union(state_sessions):
             state_hit_counts[state_name]['first_entry_count'] = len(
-                state_session_ids[state_name])
-
-        # Get the set of session ids that left without completing. This is
-        # determined as the set of session ids with maybe-leave events at
-        # intermediate states, minus the ones that have a maybe-leave event
-        # at the END state.
-        leave_states = set(session_id_to_latest_leave_event.keys()).difference(
-            new_models_end_sessions)
-        for session_id in leave_states:
-            # Grab the state name of the state they left on and count that as a
-            # 'no answer' for that state.
-            (_, state_name) = session_id_to_latest_leave_event[session_id]
-            state_hit_counts[state_name]['no_answer_count'] += 1
-
-        num_starts = (
-            old_models_start_count + new_models_start_count)
-        num_completions = (
-            old_models_complete_count + new_models_complete_count)
+                state_sessions.get(state_name, []))
+
+        # Sessions with maybe-leave events at intermediate states, but none at
+        # the END state, left without completing. Count the state of their
+        # latest maybe-leave event as a 'no answer' for that state.
+        end_sessions = set(partial.get(_PARTIAL_END_SESSIONS, []))
+        for session_id, (_, state_name) in partial[
+                _PARTIAL_LEAVES].iteritems():
+            if session_id not in end_sessions:
+                state_hit_counts[state_name]['no_answer_count'] += 1
+
+        # Add the counts of the events folded in by previous runs. If the
+        # stored model already includes the events of this run (because this
+        # reduce step is being retried after it was saved), the counts it was
+        # computed from are used instead, so that the events are not counted
+        # twice.
+        previous_annotations = stats_models.ExplorationAnnotationsModel.get(
+            stats_models.ExplorationAnnotationsModel.get_entity_id(
+                exp_id, version), strict=False)
+        previous_counts = None
+        if (previous_annotations is not None and
+                previous_annotations.events_folded_until_msec):
+            if (previous_annotations.events_folded_until_msec >=
+                    partial[_PARTIAL_FOLDED_UNTIL_MSEC]):
+                previous_counts = previous_annotations.previous_counts
+            else:
+                previous_counts = {
+                    'num_starts': previous_annotations.num_starts,
+                    'num_completions': previous_annotations.num_completions,
+                    'state_hit_counts': previous_annotations.state_hit_counts,
+                    'events_folded_until_msec': (
+                        previous_annotations.events_folded_until_msec),
+                }
+
+        if previous_counts is not None:
+            num_starts += previous_counts['num_starts']
+            num_completions += previous_counts['num_completions']
+            for state_name, counts in (
+                    previous_counts['state_hit_counts'].iteritems()):
+                for count_name, count in counts.iteritems():
+                    state_hit_counts[state_name][count_name] += count
 
         stats_models.ExplorationAnnotationsModel.create(
             exp_id, str(version), num_starts, num_completions,
-            state_hit_counts)
+            state_hit_counts,
+            events_folded_until_msec=partial[_PARTIAL_FOLDED_UNTIL_MSEC],
+            previous_counts=previous_counts)
@@ -18,7 +18,11 @@ __author__ = 'Stephanie Federwisch'
 
 """Tests for statistics continuous computations."""
 
+import datetime
+import json
+
 from core import jobs_registry
+from core.domain import config_services
 from core.domain import event_services
 from core.domain import stats_jobs
 from core.platform import models
@@ -207,3 +211,169 @@ class StatsAggregatorUnitTests(test_utils.GenericTestBase):
                 'complete_exploration_count': 0,
                 'state_hit_counts': EMPTY_STATE_HIT_COUNTS_DICT,
             }, results)
+
+    def test_later_batch_runs_only_add_new_events(self):
+        with self.swap(
+                jobs_registry, 'ALL_CONTINUOUS_COMPUTATION_MANAGERS',
+                self.ALL_CONTINUOUS_COMPUTATION_MANAGERS_FOR_TESTS):
+            exp_id = 'eid'
+            exp_version = 1
+            exploration = self.save_new_valid_exploration(exp_id, 'owner')
+            state = exploration.init_state_name
+
+            self._record_start(exp_id, exp_version, state, 'session1')
+            self._record_start(exp_id, exp_version, state, 'session2')
+            self._record_leave(exp_id, exp_version, state, 'session2')
+            self.process_and_flush_pending_tasks()
+
+            ModifiedStatisticsAggregator.start_computation()
+            self.process_and_flush_pending_tasks()
+
+            model_id = '%s:%s' % (exp_id, exp_version)
+            output_model = stats_models.ExplorationAnnotationsModel.get(
+                model_id)
+            self.assertEqual(output_model.num_starts, 2)
+            self.assertEqual(output_model.num_completions, 0)
+            self.assertEqual(
+                output_model.state_hit_counts[state]['no_answer_count'], 1)
+            # The first run reads all the events, and the stored results
+            # include the events created up to when it was queued.
+            last_queued_msec = (
+                ModifiedStatisticsMRJobManager
+                ._get_last_completed_job_queued_msec())
+            self.assertEqual(
+                output_model.events_folded_until_msec, last_queued_msec)
+            self.assertEqual(
+                ModifiedStatisticsMRJobManager._get_input_filters(),
+                [('created_on', '>=', datetime.datetime.fromtimestamp(
+                    last_queued_msec / 1000.0))])
+
+            self._record_start(exp_id, exp_version, state, 'session3')
+            self._record_leave(
+                exp_id, exp_version, feconf.END_DEST, 'session3')
+            self.process_and_flush_pending_tasks()
+
+            ModifiedStatisticsAggregator.stop_computation('admin_id')
+            ModifiedStatisticsAggregator.start_computation()
+            self.process_and_flush_pending_tasks()
+
+            output_model = stats_models.ExplorationAnnotationsModel.get(
+                model_id)
+            self.assertEqual(output_model.num_starts, 3)
+            self.assertEqual(output_model.num_completions, 1)
+            self.assertEqual(
+                output_model.state_hit_counts[state]['no_answer_count'], 1)
+
+            output_model = stats_models.ExplorationAnnotationsModel.get(
+                '%s:all' % exp_id)
+            self.assertEqual(output_model.num_starts, 3)
+            self.assertEqual(output_model.num_completions, 1)
+
+    def test_retried_reduce_does_not_count_events_twice(self):
+        exp_id = 'eid'
+        exploration = self.save_new_valid_exploration(exp_id, 'owner')
+        state = exploration.init_state_name
+        model_id = '%s:1' % exp_id
+
+        def _reduce(values):
+            stats_jobs.StatisticsMRJobManager.reduce(model_id, values)
+            return stats_models.ExplorationAnnotationsModel.get(model_id)
+
+        first_run_values = ['{"m":2.0,"s":1}', '{"m":2.0,"s":1}']
+        self.assertEqual(_reduce(first_run_values).num_starts, 2)
+        self.assertEqual(_reduce(first_run_values).num_starts, 2)
+
+        second_run_values = [
+            '{"m":3.0,"s":1,"h":{"%s":1},"u":{"%s":["session1"]}}' % (
+                state, state)]
+        output_model = _reduce(second_run_values)
+        self.assertEqual(output_model.num_starts, 3)
+        self.assertEqual(
+            output_model.state_hit_counts[state]['total_entry_count'], 1)
+
+        output_model = _reduce(second_run_values)
+        self.assertEqual(output_model.num_starts, 3)
+        self.assertEqual(
+            output_model.state_hit_counts[state]['total_entry_count'], 1)
+        self.assertEqual(output_model.events_folded_until_msec, 3.0)
+
+    def test_combine_merges_partial_aggregates(self):
+        values = [
+            '{"m":1.0,"s":1}',
+            '{"m":3.0,"l":{"session1":[3.0,"A"]}}',
+            '{"m":2.0,"h":{"A":1},"u":{"A":["session1"]}}',
+        ]
+        previously_combined_values = [
+            '{"m":0.5,"s":1,"h":{"A":1},"u":{"A":["session2"]},'
+            '"l":{"session1":[0.5,"B"]}}']
+
+        combined_values = list(stats_jobs.StatisticsMRJobManager.combine(
+            'eid:1', values, previously_combined_values))
+        self.assertEqual(len(combined_values), 1)
+        self.assertEqual(json.loads(combined_values[0]), {
+            'm': 3.0,
+            's': 2,
+            'h': {'A': 2},
+            'u': {'A': ['session1', 'session2']},
+            'l': {'session1': [3.0, 'A']},
+            'k': {},
+        })
+
+
+class StatsAggregatorRealtimeShardingUnitTests(test_utils.GenericTestBase):
+    """Tests for the sharded realtime counters of the statistics
+    aggregator.
+    """
+
+    ALL_CONTINUOUS_COMPUTATION_MANAGERS_FOR_TESTS = [
+        ModifiedStatisticsAggregator]
+
+    def _get_num_realtime_models(self):
+        return stats_jobs.StatisticsRealtimeModel.query().count()
+
+    def test_realtime_counts_are_summed_over_shards(self):
+        with self.swap(
+                jobs_registry, 'ALL_CONTINUOUS_COMPUTATION_MANAGERS',
+                self.ALL_CONTINUOUS_COMPUTATION_MANAGERS_FOR_TESTS):
+            exp_id = 'eid'
+            exploration = self.save_new_valid_exploration(exp_id, 'owner')
+
+            for ind in range(20):
+                event_services.StartExplorationEventHandler.record(
+                    exp_id, 1, exploration.init_state_name, 'session%s' % ind,
+                    {}, feconf.PLAY_TYPE_NORMAL)
+            event_services.MaybeLeaveExplorationEventHandler.record(
+                exp_id, 1, feconf.END_DEST, 'session0', 27, {},
+                feconf.PLAY_TYPE_NORMAL)
+            self.process_and_flush_pending_tasks()
+
+            results = ModifiedStatisticsAggregator.get_statistics(
+                exp_id, 'all')
+            self.assertEqual(results['start_exploration_count'], 20)
+            self.assertEqual(results['complete_exploration_count'], 1)
+
+            # Each event is recorded in both realtime layers, and the writes
+            # for each layer are spread over several shards.
+            num_realtime_models = self._get_num_realtime_models()
+            self.assertGreater(num_realtime_models, 2)
+            self.assertLessEqual(
+                num_realtime_models,
+                2 * feconf.NUM_STATISTICS_REALTIME_SHARDS)
+
+    def test_high_traffic_explorations_use_more_shards(self):
+        self.assertEqual(
+            len(ModifiedStatisticsAggregator._get_realtime_shard_ids(
+                0, 'eid')),
+            feconf.NUM_STATISTICS_REALTIME_SHARDS)
+
+        config_services.set_property(
+            feconf.ADMIN_COMMITTER_ID,
+            stats_jobs.HIGH_TRAFFIC_EXPLORATION_IDS.name, ['eid'])
+        self.assertEqual(
+            len(ModifiedStatisticsAggregator._get_realtime_shard_ids(
+                0, 'eid')),
+            feconf.NUM_HIGH_TRAFFIC_STATISTICS_REALTIME_SHARDS)
+        self.assertEqual(
+            len(ModifiedStatisticsAggregator._get_realtime_shard_ids(
+                0, 'eid2')),
+            feconf.NUM_STATISTICS_REALTIME_SHARDS)
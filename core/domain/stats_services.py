@@ -31,6 +31,13 @@ IMPROVE_TYPE_DEFAULT = 'default'
 IMPROVE_TYPE_INCOMPLETE = 'incomplete'
 
 
+def flush_all_buffered_answers():
+    """Merges all buffered answer submissions into the answer logs, and
+    returns the number of buffer shards that were merged.
+    """
+    return stats_models.flush_all_buffered_answers()
+
+
 def get_top_unresolved_answers_for_default_rule(exploration_id, state_name):
     return {
         answer: count for (answer, count) in
@@ -23,6 +23,8 @@ from core.domain import rule_domain
 from core.domain import stats_domain
 from core.domain import stats_jobs
 from core.domain import stats_services
+from core.platform import models
+(stats_models,) = models.Registry.import_models([models.NAMES.statistics])
 from core.tests import test_utils
 import feconf
 
@@ -382,6 +384,105 @@ class UnresolvedAnswersTests(test_utils.GenericTestBase):
                 'eid', 'sid'), {})
 
 
+class AnswerSubmissionBufferTests(test_utils.GenericTestBase):
+    """Test the buffering of submitted answers."""
+
+    DEFAULT_RULESPEC_STR = exp_domain.DEFAULT_RULESPEC_STR
+    DEFAULT_RULESPEC = exp_domain.RuleSpec.get_default_rule_spec(
+        'sid', 'NormalizedString')
+
+    def _record_answer(self, answer):
+        event_services.AnswerSubmissionEventHandler.record(
+            'eid', 1, 'sid', feconf.SUBMIT_HANDLER_NAME, self.DEFAULT_RULESPEC,
+            answer)
+
+    def _get_stored_answers(self):
+        """Returns the answers that have been merged into the answer log."""
+        answer_log_model = stats_models.StateRuleAnswerLogModel.get(
+            stats_models.StateRuleAnswerLogModel.get_entity_id(
+                'eid', 'sid', feconf.SUBMIT_HANDLER_NAME,
+                self.DEFAULT_RULESPEC_STR),
+            strict=False)
+        return answer_log_model.answers if answer_log_model else {}
+
+    def test_buffered_answers_are_merged_on_flush(self):
+        self._record_answer('a1')
+        self._record_answer('a1')
+        self._record_answer('a2')
+
+        self.assertEqual(self._get_stored_answers(), {})
+        self.assertEqual(
+            stats_services.get_top_unresolved_answers_for_default_rule(
+                'eid', 'sid'), {'a1': 2, 'a2': 1})
+
+        self.assertGreater(stats_services.flush_all_buffered_answers(), 0)
+        self.assertEqual(self._get_stored_answers(), {'a1': 2, 'a2': 1})
+        self.assertEqual(stats_services.flush_all_buffered_answers(), 0)
+        self.assertEqual(
+            stats_services.get_top_unresolved_answers_for_default_rule(
+                'eid', 'sid'), {'a1': 2, 'a2': 1})
+
+    def test_answers_are_kept_in_buffer_if_merge_fails(self):
+        self._record_answer('a1')
+
+        def _failing_merge(unused_pending_answers):
+            raise Exception('Datastore unavailable')
+
+        with self.swap(
+                stats_models, '_merge_answers_into_log_batch',
+                _failing_merge):
+            stats_services.flush_all_buffered_answers()
+        self.assertEqual(self._get_stored_answers(), {})
+        self.assertEqual(
+            stats_services.get_top_unresolved_answers_for_default_rule(
+                'eid', 'sid'), {'a1': 1})
+
+        self.assertGreater(stats_services.flush_all_buffered_answers(), 0)
+        self.assertEqual(self._get_stored_answers(), {'a1': 1})
+        self.assertEqual(stats_services.flush_all_buffered_answers(), 0)
+
+    def test_concurrent_flushes_do_not_merge_answers_twice(self):
+        self._record_answer('a1')
+        self._record_answer('a1')
+
+        # Simulate another flush (e.g. by resolve_answers()) that starts
+        # after this one has claimed the shards, but before it has written
+        # the answer logs.
+        original_merge = stats_models._merge_answers_into_log_batch
+
+        def _merge_with_concurrent_flush(pending_answers):
+            self.assertEqual(stats_services.flush_all_buffered_answers(), 0)
+            original_merge(pending_answers)
+
+        with self.swap(
+                stats_models, '_merge_answers_into_log_batch',
+                _merge_with_concurrent_flush):
+            self.assertGreater(stats_services.flush_all_buffered_answers(), 0)
+        self.assertEqual(self._get_stored_answers(), {'a1': 2})
+
+    def test_answers_are_written_directly_when_buffer_is_full(self):
+        with self.swap(
+                feconf, 'MAX_ANSWER_SUBMISSION_BUFFER_SHARD_SIZE_BYTES', 0):
+            self._record_answer('a1')
+        self.assertEqual(self._get_stored_answers(), {'a1': 1})
+        self.assertEqual(stats_services.flush_all_buffered_answers(), 0)
+
+    def test_answer_log_size_limit(self):
+        for _ in range(3):
+            self._record_answer('frequent')
+        self._record_answer('rare')
+
+        with self.swap(feconf, 'MAX_ANSWER_LOG_SIZE_BYTES', 20):
+            stats_services.flush_all_buffered_answers()
+        self.assertEqual(self._get_stored_answers(), {'frequent': 3})
+
+    def test_overlong_answers_are_not_logged(self):
+        self._record_answer('a' * (feconf.MAX_LOGGED_ANSWER_LENGTH + 1))
+        self.assertEqual(
+            stats_services.get_top_unresolved_answers_for_default_rule(
+                'eid', 'sid'), {})
+
+
 class EventLogEntryTests(test_utils.GenericTestBase):
     """Test for the event log creation."""
 
@@ -18,12 +18,11 @@ import ast
 import logging
 
 from core import jobs
-from core.domain import feedback_services
+from core.domain import recent_updates_services
 from core.domain import subscription_services
 from core.platform import models
-(exp_models, feedback_models, user_models) = models.Registry.import_models([
-    models.NAMES.exploration, models.NAMES.feedback, models.NAMES.user])
-import feconf
+(exp_models, feedback_models) = models.Registry.import_models([
+    models.NAMES.exploration, models.NAMES.feedback])
 import utils
 
 
@@ -33,12 +32,15 @@ class RecentUpdatesRealtimeModel(
 
 
 class DashboardRecentUpdatesAggregator(jobs.BaseContinuousComputationManager):
-    """A continuous-computation job that computes a list of recent updates
-    of explorations and feedback threads to show on a user's dashboard.
-
-    This job does not have a realtime component. There will be a delay in
-    propagating new updates to the dashboard; the length of the delay will be
-    approximately the time it takes a batch job to run.
+    """A continuous computation that keeps the feeds of recent updates of
+    explorations and feedback threads, which are shown on users' dashboards,
+    consistent with the datastore.
+
+    The feeds are updated as soon as an exploration is committed to or a
+    feedback message is posted, so new updates show up on the dashboard
+    immediately. The batch job only backfills the feeds, e.g. for activities
+    that were last updated before the feeds existed, or repairs them if one of
+    these writes failed.
     """
     @classmethod
     def get_event_types_listened_to(cls):
@@ -62,26 +64,27 @@ class DashboardRecentUpdatesAggregator(jobs.BaseContinuousComputationManager):
         """Gets a list of recent updates to show on this user's dashboard.
 
         Returns a 2-tuple. The first element is a float representing the number
-        of milliseconds since the Epoch when the job was queued. The second
-        element is a list of recent updates to explorations and feedback
-        threads; each entry is a dict with keys 'type', 'activity_id',
-        'activity_title', 'last_updated_ms', 'author_id' and 'subject'. Here,
-        'type' is either feconf.UPDATE_TYPE_EXPLORATION_COMMIT or
-        feconf.UPDATE_TYPE_FEEDBACK_MESSAGE, 'activity_id' is the id of the
-        exploration being committed to or to which the feedback thread belongs,
-        and 'activity_title' is the corresponding title.
+        of milliseconds since the Epoch at which the list was computed. The
+        second element is a list of recent updates to explorations and
+        feedback threads, as described in
+        recent_updates_services.get_recent_updates().
         """
-        user_model = user_models.UserRecentChangesBatchModel.get(
-            user_id, strict=False)
         return (
-            user_model.job_queued_msec if user_model else None,
-            user_model.output if user_model else [])
+            utils.get_current_time_in_millisecs(),
+            recent_updates_services.get_recent_updates(user_id))
 
 
 class RecentUpdatesMRJobManager(
         jobs.BaseMapReduceJobManagerForContinuousComputations):
-    """Manager for a MapReduce job that computes a list of recent updates
-    to explorations and feedback threads watched by a user.
+    """Manager for a MapReduce job that records the last commit to each
+    exploration, and the last message in each feedback thread, in the feeds
+    of recent updates.
+
+    Recording an update that is already in a feed, or that is older than the
+    one it would replace, leaves the feed unchanged. Explorations are read
+    from their summaries, so that their states are not loaded. Deleted
+    explorations have no summaries, so they are found through their rights
+    instead, and only they are loaded.
     """
     @classmethod
     def _get_continuous_computation_class(cls):
@@ -89,82 +92,52 @@ class RecentUpdatesMRJobManager(
 
     @classmethod
     def entity_classes_to_map_over(cls):
-        return [user_models.UserSubscriptionsModel]
+        return [
+            exp_models.ExpSummaryModel,
+            exp_models.ExplorationRightsModel,
+            feedback_models.FeedbackThreadModel,
+        ]
 
     @staticmethod
     def map(item):
-        user_id = item.id
-        job_queued_msec = RecentUpdatesMRJobManager._get_job_queued_msec()
-        reducer_key = '%s@%s' % (user_id, job_queued_msec)
-
-        activity_ids_list = item.activity_ids
-        feedback_thread_ids_list = item.feedback_thread_ids
-
-        activities = exp_models.ExplorationModel.get_multi(
-            activity_ids_list, include_deleted=True)
+        if isinstance(item, exp_models.ExpSummaryModel):
+            # Summaries are deleted along with their explorations, so there
+            # is no need to load the exploration to check that it exists.
+            metadata_obj = exp_models.ExplorationModel.get_snapshots_metadata(
+                item.id, [item.version], allow_deleted=True)[0]
+            recent_updates_services.record_exploration_commit(
+                item.id, item.title, metadata_obj['committer_id'],
+                metadata_obj['commit_message'],
+                item.exploration_model_last_updated)
+        elif isinstance(item, exp_models.ExplorationRightsModel):
+            # The rights of an exploration are marked as deleted at the same
+            # time as the exploration itself. Undeleted explorations are
+            # handled via their summaries.
+            if not item.deleted:
+                return
 
-        for ind, activity in enumerate(activities):
-            if activity is None:
-                logging.error(
-                    'Could not find activity %s' % activity_ids_list[ind])
-                continue
+            exploration_model = exp_models.ExplorationModel.get_by_id(item.id)
+            if exploration_model is None or not exploration_model.deleted:
+                return
 
             metadata_obj = exp_models.ExplorationModel.get_snapshots_metadata(
-                activity.id, [activity.version], allow_deleted=True)[0]
-            yield (reducer_key, {
-                'type': feconf.UPDATE_TYPE_EXPLORATION_COMMIT,
-                'activity_id': activity.id,
-                'activity_title': activity.title,
-                'author_id': metadata_obj['committer_id'],
-                'last_updated_ms': utils.get_time_in_millisecs(
-                    activity.last_updated),
-                'subject': (
-                    feconf.COMMIT_MESSAGE_EXPLORATION_DELETED
-                    if activity.deleted else metadata_obj['commit_message']
-                ),
-            })
-
-            # If the user subscribes to this activity, he/she is automatically
-            # subscribed to all feedback threads for this activity.
-            if not activity.deleted:
-                threads = feedback_services.get_threadlist(activity.id)
-                for thread in threads:
-                    if thread['thread_id'] not in feedback_thread_ids_list:
-                        feedback_thread_ids_list.append(thread['thread_id'])
-
-        for feedback_thread_id in feedback_thread_ids_list:
+                item.id, [exploration_model.version], allow_deleted=True)[0]
+            recent_updates_services.record_exploration_commit(
+                item.id, exploration_model.title,
+                metadata_obj['committer_id'], metadata_obj['commit_message'],
+                exploration_model.last_updated, is_deleted=True)
+        elif isinstance(item, feedback_models.FeedbackThreadModel):
             last_message = (
                 feedback_models.FeedbackMessageModel.get_most_recent_message(
-                    feedback_thread_id))
-
-            yield (reducer_key, {
-                'type': feconf.UPDATE_TYPE_FEEDBACK_MESSAGE,
-                'activity_id': last_message.exploration_id,
-                'activity_title': exp_models.ExplorationModel.get_by_id(
-                    last_message.exploration_id).title,
-                'author_id': last_message.author_id,
-                'last_updated_ms': utils.get_time_in_millisecs(
-                    last_message.created_on),
-                'subject': last_message.get_thread_subject(),
-            })
-
-    @staticmethod
-    def reduce(key, stringified_values):
-        if '@' not in key:
-            logging.error(
-                'Invalid reducer key for RecentUpdatesMRJob: %s' % key)
-
-        user_id = key[:key.find('@')]
-        job_queued_msec = float(key[key.find('@') + 1:])
-
-        values = [ast.literal_eval(sv) for sv in stringified_values]
-        sorted_values = sorted(
-            values, key=lambda x: x['last_updated_ms'], reverse=True)
+                    item.id))
+            if last_message is None:
+                logging.error(
+                    'Could not find any messages in thread %s' % item.id)
+                return
 
-        user_models.UserRecentChangesBatchModel(
-            id=user_id, output=sorted_values[: feconf.DEFAULT_QUERY_LIMIT],
-            job_queued_msec=job_queued_msec
-        ).put()
+            recent_updates_services.record_feedback_message(
+                item.exploration_id, item.id, last_message.author_id,
+                item.subject, last_message.created_on)
 
 
 class DashboardSubscriptionsOneOffJob(jobs.BaseMapReduceJobManager):
@@ -372,6 +372,74 @@ class RecentUpdatesAggregatorUnitTests(test_utils.GenericTestBase):
                 expected_exploration_created_update_dict,
             ])
 
+    def test_updates_are_shown_before_the_batch_job_runs(self):
+        EXP_ID = 'eid'
+        EXP_TITLE = 'Title'
+        USER_ID = 'user_id'
+        ANOTHER_USER_ID = 'another_user_id'
+
+        self.save_new_valid_exploration(
+            EXP_ID, USER_ID, title=EXP_TITLE, category='Category')
+        feedback_services.create_thread(
+            EXP_ID, None, ANOTHER_USER_ID, 'subject', 'text')
+        thread_id = feedback_services.get_threadlist(EXP_ID)[0]['thread_id']
+        message = feedback_services.get_messages(thread_id)[0]
+        exp_services.update_exploration(
+            ANOTHER_USER_ID, EXP_ID, [], 'Update exploration')
+        exp_last_updated_ms = utils.get_time_in_millisecs(
+            exp_services.get_exploration_by_id(EXP_ID).last_updated)
+
+        self.assertEqual(
+            ModifiedRecentUpdatesAggregator.get_recent_updates(USER_ID)[1], [{
+                'type': feconf.UPDATE_TYPE_EXPLORATION_COMMIT,
+                'activity_id': EXP_ID,
+                'activity_title': EXP_TITLE,
+                'author_id': ANOTHER_USER_ID,
+                'last_updated_ms': exp_last_updated_ms,
+                'subject': 'Update exploration',
+            }, {
+                'type': feconf.UPDATE_TYPE_FEEDBACK_MESSAGE,
+                'activity_id': EXP_ID,
+                'activity_title': EXP_TITLE,
+                'author_id': ANOTHER_USER_ID,
+                'last_updated_ms': message['created_on'],
+                'subject': 'subject',
+            }])
+
+    def test_batch_job_backfills_missing_feeds(self):
+        with self.swap(
+                jobs_registry, 'ALL_CONTINUOUS_COMPUTATION_MANAGERS',
+                self.ALL_CONTINUOUS_COMPUTATION_MANAGERS_FOR_TESTS):
+            EXP_ID = 'eid'
+            EXP_TITLE = 'Title'
+            USER_ID = 'user_id'
+            ANOTHER_USER_ID = 'another_user_id'
+
+            self.save_new_valid_exploration(
+                EXP_ID, USER_ID, title=EXP_TITLE, category='Category')
+            feedback_services.create_thread(
+                EXP_ID, None, ANOTHER_USER_ID, 'subject', 'text')
+            recent_updates = (
+                ModifiedRecentUpdatesAggregator.get_recent_updates(USER_ID)[1])
+            self.assertEqual(len(recent_updates), 2)
+
+            # Simulate a feed that was never written.
+            user_models.ActivityRecentUpdatesModel.get(EXP_ID).delete()
+            self.assertEqual(
+                ModifiedRecentUpdatesAggregator.get_recent_updates(USER_ID)[1],
+                [])
+
+            ModifiedRecentUpdatesAggregator.start_computation()
+            self.assertEqual(
+                self.count_jobs_in_taskqueue(
+                    queue_name=taskqueue_services.QUEUE_NAME_DEFAULT),
+                1)
+            self.process_and_flush_pending_tasks()
+
+            self.assertEqual(
+                ModifiedRecentUpdatesAggregator.get_recent_updates(USER_ID)[1],
+                recent_updates)
+
 
 class DashboardSubscriptionsOneOffJobTests(test_utils.GenericTestBase):
     """Tests for the one-off dashboard subscriptions job."""
@@ -42,6 +42,9 @@ from mapreduce.lib.pipeline import pipeline
 from mapreduce import util as mapreduce_util
 
 MAPPER_PARAM_KEY_ENTITY_KINDS = 'entity_kinds'
+# The name of the parameter of the datastore input reader that restricts the
+# entities that are mapped over.
+MAPPER_PARAM_KEY_FILTERS = 'filters'
 MAPPER_PARAM_KEY_QUEUED_TIME_MSECS = 'queued_time_msecs'
 # Name of an additional parameter to pass into the MR job for cleaning up
 # old auxiliary job models.
@@ -123,12 +126,14 @@ class BaseJobManager(object):
             job_id, model.status_code, STATUS_CODE_QUEUED)
         cls._require_correct_job_type(model.job_type)
 
-        # Enqueue the job.
+        # Enqueue the job. The queued time is saved first, so that the job
+        # can read it (see BaseMapReduceJobManager._real_enqueue()).
         cls._pre_enqueue_hook(job_id)
+        model.time_queued_msec = utils.get_current_time_in_millisecs()
+        model.put()
         cls._real_enqueue(job_id, additional_job_params)
 
         model.status_code = STATUS_CODE_QUEUED
-        model.time_queued_msec = utils.get_current_time_in_millisecs()
         model.put()
 
         cls._post_enqueue_hook(job_id)
@@ -431,6 +436,27 @@ class BaseMapReduceJobManager(BaseJobManager):
             'Classes derived from BaseMapReduceJobManager must implement '
             'entity_classes_to_map_over()')
 
+    @classmethod
+    def _get_input_filters(cls):
+        """Returns a list of (property_name, operator, value) tuples, which
+        restrict the entities of each of the classes in
+        entity_classes_to_map_over() that are passed to map(), or None if
+        all entities should be mapped over.
+
+        The datastore input reader supports at most one property with
+        inequality filters. Subclasses may override this.
+        """
+        return None
+
+    @classmethod
+    def _get_last_completed_job_queued_msec(cls):
+        """Returns the time at which the most recently queued job of this
+        type that has completed was queued, in milliseconds since the Epoch,
+        or None if no job of this type has completed.
+        """
+        job_model = job_models.JobModel.get_last_completed_job(cls.__name__)
+        return job_model.time_queued_msec if job_model else None
+
     @staticmethod
     def map(item):
         """Implements the map function.  Must be declared @staticmethod.
@@ -473,6 +499,13 @@ class BaseMapReduceJobManager(BaseJobManager):
             'Classes derived from BaseMapReduceJobManager must implement '
             'reduce as a @staticmethod.')
 
+    # Subclasses may override this with a @staticmethod
+    # combine(key, values, previously_combined_values) that merges the values
+    # emitted by a mapper shard for a given key before they are shuffled, and
+    # yields the merged values. Its output is passed to reduce() in place of
+    # the original values, so it must yield values of the same form.
+    combine = None
+
     @classmethod
     def _real_enqueue(cls, job_id, additional_job_params):
         entity_class_types = cls.entity_classes_to_map_over()
@@ -481,6 +514,8 @@ class BaseMapReduceJobManager(BaseJobManager):
                 entity_class_type.__module__, entity_class_type.__name__)
             for entity_class_type in entity_class_types]
 
+        time_queued_msec = job_models.JobModel.get(job_id).time_queued_msec
+
         kwargs = {
             'job_name': job_id,
             'mapper_spec': '%s.%s.map' % (cls.__module__, cls.__name__),
@@ -492,14 +527,20 @@ class BaseMapReduceJobManager(BaseJobManager):
             'mapper_params': {
                 MAPPER_PARAM_KEY_ENTITY_KINDS: entity_class_names,
                 # Note that all parameters passed to the mapper need to be
-                # strings. Also note that the value for this key is determined
-                # just before enqueue time, so it will be roughly equal to the
-                # actual enqueue time.
-                MAPPER_PARAM_KEY_QUEUED_TIME_MSECS: str(
-                    utils.get_current_time_in_millisecs()),
+                # strings. The value for this key is the queued time that is
+                # recorded in the JobModel; repr() keeps all of its digits.
+                MAPPER_PARAM_KEY_QUEUED_TIME_MSECS: repr(time_queued_msec),
             }
         }
 
+        input_filters = cls._get_input_filters()
+        if input_filters:
+            kwargs['mapper_params'][MAPPER_PARAM_KEY_FILTERS] = input_filters
+
+        if cls.combine is not None:
+            kwargs['combiner_spec'] = '%s.%s.combine' % (
+                cls.__module__, cls.__name__)
+
         if additional_job_params is not None:
             for param_name in additional_job_params:
                 if param_name in kwargs['mapper_params']:
@@ -29,7 +29,9 @@ ONE_OFF_JOB_MANAGERS = [
     exp_jobs.IndexAllExplorationsJobManager,
     exp_jobs.ExpSummariesCreationOneOffJob,
     exp_jobs.ExplorationValidityJobManager,
-    exp_jobs.InteractionMigrationJobManager]
+    exp_jobs.InteractionMigrationJobManager,
+    exp_jobs.ExplorationSnapshotDeltaEncodingOneOffJob,
+    exp_jobs.ExplorationFileIndexCreationOneOffJob]
 
 # List of all ContinuousComputation managers to show controls for on the
 # admin dashboard.
@@ -44,7 +44,7 @@ def get_multi(keys):
     return result
 
 
-def set_multi(key_value_mapping):
+def set_multi(key_value_mapping, time=0):
     """Sets multiple keys' values at once.
 
     Args:
@@ -52,12 +52,14 @@ def set_multi(key_value_mapping):
           and the value is anything that is serializable using the Python
           pickle module. The combined size of each key and value must be
           < 1 MB. The total size of key_value_mapping should be at most 32 MB.
+      - time: the number of seconds after which the values expire, or 0 if
+          they should not expire.
 
     Returns:
       A list of the keys whose values were NOT set.
     """
     assert isinstance(key_value_mapping, dict)
-    unset_keys = memcache.set_multi(key_value_mapping)
+    unset_keys = memcache.set_multi(key_value_mapping, time=time)
 
     if unset_keys:
         counters.MEMCACHE_SET_FAILURE.inc()
@@ -67,6 +69,40 @@ def set_multi(key_value_mapping):
     return unset_keys
 
 
+def add_multi(key_value_mapping, time=0):
+    """Sets multiple keys' values at once, but only for keys that are not
+    already present in memcache.
+
+    Args:
+      - key_value_mapping: a dict of {key: value} pairs, subject to the same
+          constraints as in set_multi().
+      - time: the number of seconds after which the values expire, or 0 if
+          they should not expire.
+
+    Returns:
+      A list of the keys whose values were NOT set, either because they were
+      already present or because of a network failure.
+    """
+    assert isinstance(key_value_mapping, dict)
+    return memcache.add_multi(key_value_mapping, time=time)
+
+
+def incr_multi(key_increment_mapping):
+    """Atomically increments the integer values of multiple keys at once.
+    Keys that are not present in memcache are initialized to 0 first.
+
+    Args:
+      - key_increment_mapping: a dict of {key: increment} pairs. The key is
+          a string and the increment is an integer, which may be negative.
+
+    Returns:
+      A dict mapping each key to its new value, or to None if it could not be
+      incremented.
+    """
+    assert isinstance(key_increment_mapping, dict)
+    return memcache.offset_multi(key_increment_mapping, initial_value=0)
+
+
 def delete(key):
     """Deletes a key in memcache.
 
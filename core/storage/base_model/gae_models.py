@@ -16,6 +16,8 @@
 
 __author__ = 'Sean Lip'
 
+import json
+
 from core.platform import models
 transaction_services = models.Registry.import_transaction_services()
 import feconf
@@ -189,6 +191,10 @@ class VersionedModel(BaseModel):
     SNAPSHOT_CONTENT_CLASS = None
     # Whether reverting is allowed. Default is False.
     ALLOW_REVERT = False
+    # Whether snapshots are stored as deltas against periodic full
+    # snapshots ('keyframes'), rather than in full. This should only be
+    # enabled for models whose snapshots are dicts. Default is False.
+    DELTA_ENCODE_SNAPSHOTS = False
 
     ### IMPORTANT: Subclasses should only overwrite things above this line. ###
 
@@ -216,6 +222,9 @@ class VersionedModel(BaseModel):
     # All data in this instance represents the version at HEAD; data about the
     # previous versions is stored in the snapshot models.
     version = ndb.IntegerProperty(default=0)
+    # A snapshot is only stored as a delta if the JSON encoding of the delta
+    # is at most this fraction of the size of the full snapshot.
+    _MAX_SNAPSHOT_DELTA_SIZE_FRACTION = 0.5
 
     def _require_not_marked_deleted(self):
         if self.deleted:
@@ -233,7 +242,9 @@ class VersionedModel(BaseModel):
     def _reconstitute_from_snapshot_id(self, snapshot_id):
         """Makes this instance into a reconstitution of the given snapshot."""
         snapshot_model = self.SNAPSHOT_CONTENT_CLASS.get(snapshot_id)
-        snapshot_dict = snapshot_model.content
+        instance_id = snapshot_id[:snapshot_id.rfind(self._VERSION_DELIMITER)]
+        snapshot_dict = self._get_snapshot_from_content_model(
+            instance_id, snapshot_model)
         return self._reconstitute(snapshot_dict)
 
     @classmethod
@@ -241,6 +252,115 @@ class VersionedModel(BaseModel):
         return '%s%s%s' % (
             instance_id, cls._VERSION_DELIMITER, version_number)
 
+    @classmethod
+    def _get_snapshot_from_content_model(cls, instance_id, snapshot_model):
+        """Returns the full snapshot stored in the given snapshot content
+        model, applying its delta to its keyframe if necessary.
+        """
+        if snapshot_model.keyframe_version is None:
+            return snapshot_model.content
+
+        keyframe_model = cls.SNAPSHOT_CONTENT_CLASS.get(
+            cls._get_snapshot_id(instance_id, snapshot_model.keyframe_version))
+        # The keyframe is normally a full snapshot, but it may itself have
+        # been re-encoded as a delta by a migration since this delta was
+        # written.
+        return utils.apply_dict_delta(
+            cls._get_snapshot_from_content_model(instance_id, keyframe_model),
+            snapshot_model.delta)
+
+    @classmethod
+    def _create_snapshot_content_model(
+            cls, snapshot_id, version_number, snapshot, keyframe_version,
+            keyframe_snapshot):
+        """Returns a snapshot content model for the given snapshot.
+
+        If delta encoding is enabled, the snapshot is stored as a delta against
+        the given keyframe, provided that the keyframe is less than
+        feconf.SNAPSHOT_KEYFRAME_INTERVAL versions old and that the delta is
+        small enough. Otherwise, it is stored in full, and becomes a keyframe
+        for later versions. keyframe_version is None if there is no keyframe.
+        """
+        if (cls.DELTA_ENCODE_SNAPSHOTS and keyframe_version is not None and
+                version_number - keyframe_version <
+                feconf.SNAPSHOT_KEYFRAME_INTERVAL):
+            delta = utils.compute_dict_delta(keyframe_snapshot, snapshot)
+            if (len(json.dumps(delta)) <=
+                    len(json.dumps(snapshot)) *
+                    cls._MAX_SNAPSHOT_DELTA_SIZE_FRACTION):
+                return cls.SNAPSHOT_CONTENT_CLASS(
+                    id=snapshot_id, keyframe_version=keyframe_version,
+                    delta=delta)
+
+        return cls.SNAPSHOT_CONTENT_CLASS(id=snapshot_id, content=snapshot)
+
+    def _get_latest_keyframe(self):
+        """Returns a tuple with the version number and the snapshot of the
+        keyframe for the latest committed version of this instance, or
+        (None, None) if there is none.
+        """
+        if not self.DELTA_ENCODE_SNAPSHOTS or self.version < 1:
+            return (None, None)
+
+        latest_snapshot_model = self.SNAPSHOT_CONTENT_CLASS.get(
+            self._get_snapshot_id(self.id, self.version), strict=False)
+        if latest_snapshot_model is None:
+            return (None, None)
+        elif latest_snapshot_model.keyframe_version is None:
+            return (self.version, latest_snapshot_model.content)
+        else:
+            keyframe_version = latest_snapshot_model.keyframe_version
+            keyframe_model = self.SNAPSHOT_CONTENT_CLASS.get(
+                self._get_snapshot_id(self.id, keyframe_version))
+            return (keyframe_version, self._get_snapshot_from_content_model(
+                self.id, keyframe_model))
+
+    @classmethod
+    def delta_encode_snapshots(cls, model_instance_id, latest_version):
+        """Re-encodes the existing snapshots of the given model instance, up
+        to the given version, in the same way as new snapshots are encoded.
+        This is used to migrate snapshots that were stored in full.
+
+        Returns the number of snapshots that were re-encoded.
+        """
+        snapshot_ids = [
+            cls._get_snapshot_id(model_instance_id, version_number)
+            for version_number in range(1, latest_version + 1)]
+        snapshot_models = cls.SNAPSHOT_CONTENT_CLASS.get_multi(snapshot_ids)
+
+        snapshots_by_version = {}
+        models_to_put = []
+        keyframe_version = None
+        for (ind, snapshot_model) in enumerate(snapshot_models):
+            version_number = ind + 1
+            if snapshot_model is None:
+                keyframe_version = None
+                continue
+
+            if snapshot_model.keyframe_version in snapshots_by_version:
+                snapshot = utils.apply_dict_delta(
+                    snapshots_by_version[snapshot_model.keyframe_version],
+                    snapshot_model.delta)
+            else:
+                snapshot = cls._get_snapshot_from_content_model(
+                    model_instance_id, snapshot_model)
+
+            new_snapshot_model = cls._create_snapshot_content_model(
+                snapshot_ids[ind], version_number, snapshot, keyframe_version,
+                snapshots_by_version.get(keyframe_version))
+            if new_snapshot_model.keyframe_version is None:
+                keyframe_version = version_number
+                snapshots_by_version[version_number] = snapshot
+
+            if (new_snapshot_model.keyframe_version !=
+                    snapshot_model.keyframe_version):
+                # Keep the original creation time of the snapshot.
+                new_snapshot_model.created_on = snapshot_model.created_on
+                models_to_put.append(new_snapshot_model)
+
+        cls.SNAPSHOT_CONTENT_CLASS.put_multi(models_to_put)
+        return len(models_to_put)
+
     def _trusted_commit(
             self, committer_id, commit_type, commit_message, commit_cmds):
         if self.SNAPSHOT_METADATA_CLASS is None:
@@ -257,6 +377,8 @@ class VersionedModel(BaseModel):
                     'Expected commit_cmds to be a list of dicts, received %s'
                     % commit_cmds)
 
+        (keyframe_version, keyframe_snapshot) = self._get_latest_keyframe()
+
         self.version += 1
 
         snapshot = self._compute_snapshot()
@@ -265,8 +387,9 @@ class VersionedModel(BaseModel):
         snapshot_metadata_instance = self.SNAPSHOT_METADATA_CLASS(
             id=snapshot_id, committer_id=committer_id, commit_type=commit_type,
             commit_message=commit_message, commit_cmds=commit_cmds)
-        snapshot_content_instance = self.SNAPSHOT_CONTENT_CLASS(
-            id=snapshot_id, content=snapshot)
+        snapshot_content_instance = self._create_snapshot_content_model(
+            snapshot_id, self.version, snapshot, keyframe_version,
+            keyframe_snapshot)
 
         transaction_services.run_in_transaction(
             ndb.put_multi,
@@ -444,8 +567,16 @@ class BaseSnapshotContentModel(BaseModel):
     The id of this model is computed using VersionedModel.get_snapshot_id().
     """
 
-    # The snapshot content, as a JSON blob.
+    # The snapshot content, as a JSON blob. This is None if the snapshot is
+    # stored as a delta.
     content = ndb.JsonProperty(indexed=False)
+    # If the snapshot is stored as a delta, the version number of the snapshot
+    # (the 'keyframe') that the delta applies to; otherwise, None.
+    keyframe_version = ndb.IntegerProperty(indexed=False)
+    # If the snapshot is stored as a delta, the delta (as computed by
+    # utils.compute_dict_delta()) that transforms the keyframe into this
+    # snapshot; otherwise, None.
+    delta = ndb.JsonProperty(indexed=False)
 
 
 class BaseMapReduceBatchResultsModel(BaseModel):
@@ -51,6 +51,7 @@ class ExplorationModel(base_models.VersionedModel):
     SNAPSHOT_METADATA_CLASS = ExplorationSnapshotMetadataModel
     SNAPSHOT_CONTENT_CLASS = ExplorationSnapshotContentModel
     ALLOW_REVERT = True
+    DELTA_ENCODE_SNAPSHOTS = True
 
     # What this exploration is called.
     title = ndb.StringProperty(required=True)
@@ -219,6 +220,47 @@ class ExplorationRightsModel(base_models.VersionedModel):
             ).put_async()
 
 
+class ExplorationPlayerPayloadModel(base_models.BaseModel):
+    """The JSON-encoded data for the learner view of a particular version of
+    an exploration.
+
+    This is a cache: since a version of an exploration never changes, the
+    data is computed once for each version of the code that computes it, and
+    never updated. It is deleted when the exploration is deleted.
+
+    The id for this model is of the form
+    '{{EXP_ID}}-{{EXP_VERSION}}-{{CODE_VERSION}}'.
+    """
+    # The id of the exploration.
+    exploration_id = ndb.StringProperty(indexed=True, required=True)
+    # The JSON-encoded data.
+    payload = ndb.TextProperty(indexed=False, required=True, compressed=True)
+
+    @classmethod
+    def _get_instance_id(cls, exploration_id, version, code_version):
+        return '%s-%s-%s' % (exploration_id, version, code_version)
+
+    @classmethod
+    def get_payload(cls, exploration_id, version, code_version):
+        """Returns the stored payload for the given exploration version, or
+        None if there is none.
+        """
+        instance = cls.get(
+            cls._get_instance_id(exploration_id, version, code_version),
+            strict=False)
+        return instance.payload if instance else None
+
+    @classmethod
+    def create(cls, exploration_id, version, code_version, payload):
+        cls(id=cls._get_instance_id(exploration_id, version, code_version),
+            exploration_id=exploration_id, payload=payload).put()
+
+    @classmethod
+    def delete_all_for_exploration(cls, exploration_id):
+        ndb.delete_multi(cls.query(
+            cls.exploration_id == exploration_id).fetch(keys_only=True))
+
+
 class ExplorationCommitLogEntryModel(base_models.BaseModel):
     """Log of commits to explorations.
 
@@ -21,7 +21,6 @@ __author__ = 'Sean Lip'
 import os
 
 import core.storage.base_model.gae_models as base_models
-import feconf
 import utils
 
 from google.appengine.ext import ndb
@@ -49,9 +48,22 @@ class FileMetadataModel(base_models.VersionedModel):
         raise NotImplementedError
 
     @classmethod
-    def get_undeleted(cls):
-        return cls.get_all().filter(cls.deleted == False).fetch(
-            feconf.DEFAULT_QUERY_LIMIT)
+    def get_undeleted_filepaths(cls, exploration_id):
+        """Returns a list of the filepaths of all undeleted files belonging to
+        the given exploration, relative to the exploration's root directory.
+
+        This is a key-range query over the ids of the files of this
+        exploration only, and it is therefore eventually consistent.
+        """
+        dir_path = cls._construct_id(exploration_id, '')
+        # All ids for files of this exploration are prefixed with dir_path,
+        # which ends with '/'. The character after '/' is '0'.
+        query = cls.query(
+            cls.key >= ndb.Key(cls, dir_path),
+            cls.key < ndb.Key(cls, '%s0' % dir_path[:-1]))
+        return [
+            metadata_model.id[len(dir_path):] for metadata_model in query
+            if not metadata_model.deleted]
 
     @classmethod
     def _construct_id(cls, exploration_id, filepath):
@@ -78,6 +90,69 @@ class FileMetadataModel(base_models.VersionedModel):
             committer_id, '', commit_cmds)
 
 
+class FileIndexModel(base_models.BaseModel):
+    """Index of the undeleted files of an exploration, keyed by exploration
+    id.
+
+    The filepaths are relative to the exploration's root directory, e.g.
+    'assets/abc.png'.
+    """
+    # The filepaths of the undeleted files of the exploration.
+    filepaths = ndb.StringProperty(repeated=True, indexed=False)
+
+    @classmethod
+    def create(cls, exploration_id, filepaths):
+        return cls(id=exploration_id, filepaths=filepaths)
+
+
+class FileBlobModel(base_models.BaseModel):
+    """Content-addressed storage for the contents of files, keyed by the
+    SHA-256 hex digest of the contents.
+
+    A blob may be shared by any number of file versions, in any number of
+    explorations. Its contents are split into chunks; the first chunk is
+    stored in this model, and each subsequent chunk in a FileBlobChunkModel.
+    """
+    # The total size of the blob, in bytes.
+    size = ndb.IntegerProperty(indexed=False)
+    # The number of chunks the blob is split into.
+    num_chunks = ndb.IntegerProperty(indexed=False)
+    # The first chunk of the blob.
+    content = ndb.BlobProperty(indexed=False)
+
+    @classmethod
+    def create(cls, blob_hash, size, num_chunks, first_chunk):
+        return cls(
+            id=blob_hash, size=size, num_chunks=num_chunks,
+            content=first_chunk)
+
+
+class FileBlobChunkModel(base_models.BaseModel):
+    """A chunk of a blob other than the first one, keyed by the hash of the
+    blob and the index of the chunk.
+    """
+    # The contents of the chunk.
+    content = ndb.BlobProperty(indexed=False)
+
+    @classmethod
+    def _construct_id(cls, blob_hash, chunk_index):
+        return '%s.%s' % (blob_hash, chunk_index)
+
+    @classmethod
+    def create(cls, blob_hash, chunk_index, content):
+        return cls(
+            id=cls._construct_id(blob_hash, chunk_index), content=content)
+
+    @classmethod
+    def get_chunks(cls, blob_hash, num_chunks):
+        """Returns the chunks of the given blob other than the first one, in
+        order.
+        """
+        return cls.get_multi([
+            cls._construct_id(blob_hash, chunk_index)
+            for chunk_index in range(1, num_chunks)])
+
+
 class FileSnapshotMetadataModel(base_models.BaseSnapshotMetadataModel):
     """Class for storing the file snapshot commit history."""
     pass
@@ -88,6 +163,9 @@ class FileSnapshotContentModel(base_models.BaseSnapshotContentModel):
 
     # Overwrite the superclass member to use a BlobProperty for raw strings.
     content = ndb.BlobProperty(indexed=False)
+    # The hash of the FileBlobModel holding the contents of the file, or
+    # None if the contents are stored in `content`.
+    blob_hash = ndb.StringProperty(indexed=False)
 
 
 class FileModel(base_models.VersionedModel):
@@ -95,17 +173,35 @@ class FileModel(base_models.VersionedModel):
     SNAPSHOT_METADATA_CLASS = FileSnapshotMetadataModel
     SNAPSHOT_CONTENT_CLASS = FileSnapshotContentModel
 
-    # The contents of the file.
+    # The contents of the file. This is only set for file versions that were
+    # saved before the blob store was introduced.
     content = ndb.BlobProperty(indexed=False)
+    # The hash of the FileBlobModel holding the contents of the file, or None
+    # if the contents are stored in `content`.
+    blob_hash = ndb.StringProperty(indexed=False)
 
-    def _reconstitute(self, snapshot_blob):
+    def _reconstitute(self, snapshot):
         """Manually overwrite the superclass method."""
-        self.content = snapshot_blob
+        (self.content, self.blob_hash) = snapshot
         return self
 
     def _compute_snapshot(self):
         """Manually overwrite the superclass method."""
-        return self.content
+        return (self.content, self.blob_hash)
+
+    @classmethod
+    def _get_snapshot_from_content_model(cls, instance_id, snapshot_model):
+        """Manually overwrite the superclass method."""
+        return (snapshot_model.content, snapshot_model.blob_hash)
+
+    @classmethod
+    def _create_snapshot_content_model(
+            cls, snapshot_id, version_number, snapshot, keyframe_version,
+            keyframe_snapshot):
+        """Manually overwrite the superclass method."""
+        (content, blob_hash) = snapshot
+        return cls.SNAPSHOT_CONTENT_CLASS(
+            id=snapshot_id, content=content, blob_hash=blob_hash)
 
     def get_new_id(cls, entity_name):
         raise NotImplementedError
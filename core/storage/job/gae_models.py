@@ -101,6 +101,15 @@ class JobModel(base_models.BaseModel):
     def get_jobs(cls, job_type):
         return cls.query().filter(cls.job_type == job_type)
 
+    @classmethod
+    def get_last_completed_job(cls, job_type):
+        """Returns the most recently queued job of the given type that has
+        completed, or None if there is none.
+        """
+        return cls.query().filter(cls.job_type == job_type).filter(
+            cls.status_code == STATUS_CODE_COMPLETED
+        ).order(-cls.time_queued_msec).get()
+
     @classmethod
     def get_unfinished_jobs(cls, job_type):
         return cls.query().filter(cls.job_type == job_type).filter(
@@ -19,10 +19,14 @@
 __author__ = 'Sean Lip'
 
 import datetime
+import json
 import logging
+import random
 
+from core import counters
 from core.platform import models
 (base_models,) = models.Registry.import_models([models.NAMES.base_model])
+transaction_services = models.Registry.import_transaction_services()
 import feconf
 import utils
 
@@ -101,6 +105,12 @@ class StateRuleAnswerLogModel(base_models.BaseModel):
     def _get_entity_key(cls, exploration_id, entity_id):
         return ndb.Key(cls._get_kind(), entity_id)
 
+    @classmethod
+    def get_entity_id(cls, exploration_id, state_name, handler_name, rule_str):
+        # TODO(sll): Use a hash instead to disambiguate.
+        return '.'.join([
+            exploration_id, state_name, handler_name, rule_str])[:490]
+
     @classmethod
     def get_or_create_multi(cls, exploration_id, rule_data):
         """Gets or creates entities for the given rules.
@@ -110,11 +120,10 @@ class StateRuleAnswerLogModel(base_models.BaseModel):
             rule_data: a list of dicts, each with the following keys:
                 (state_name, handler_name, rule_str).
         """
-        # TODO(sll): Use a hash instead to disambiguate.
-        entity_ids = ['.'.join([
-            exploration_id, datum['state_name'],
-            datum['handler_name'], datum['rule_str']
-        ])[:490] for datum in rule_data]
+        entity_ids = [cls.get_entity_id(
+            exploration_id, datum['state_name'], datum['handler_name'],
+            datum['rule_str']
+        ) for datum in rule_data]
 
         entity_keys = [cls._get_entity_key(exploration_id, entity_id)
                        for entity_id in entity_ids]
@@ -131,6 +140,143 @@ class StateRuleAnswerLogModel(base_models.BaseModel):
         return entities
 
 
+class AnswerSubmissionBufferModel(base_models.BaseModel):
+    """A shard of the buffer of submitted answers for an exploration that
+    have not yet been merged into the corresponding StateRuleAnswerLogModel
+    entities.
+
+    Each exploration has feconf.NUM_ANSWER_SUBMISSION_BUFFER_SHARDS shards,
+    and each submitted answer is added to one of them at random, so that
+    concurrent submissions for the same rule do not all contend for the same
+    entity group. Repeated submissions of an answer are coalesced into a
+    count. A flush claims a shard by deleting it in a transaction, so that
+    concurrent flushes never merge the same answers twice; answers that the
+    flush then fails to merge are added back to the shard.
+
+    The id/key of instances of this class has the form
+        [EXPLORATION_ID]:[SHARD_INDEX]
+    """
+    # The id of the exploration whose answers are buffered in this shard.
+    exploration_id = ndb.StringProperty(indexed=True)
+    # The buffered answers. The JSON blob represents a dict whose keys are
+    # StateRuleAnswerLogModel ids, and whose values are dicts mapping answers
+    # (encoded as HTML strings) to the number of times they were submitted.
+    pending_answers = ndb.JsonProperty(indexed=False)
+    # The approximate size, in bytes, of the JSON encoding of
+    # pending_answers.
+    size_bytes = ndb.IntegerProperty(default=0, indexed=False)
+
+    @classmethod
+    def get_shard_ids(cls, exploration_id):
+        return [
+            '%s:%s' % (exploration_id, shard_index) for shard_index in
+            range(feconf.NUM_ANSWER_SUBMISSION_BUFFER_SHARDS)]
+
+    @classmethod
+    def add_answer(cls, exploration_id, answer_log_id, answer):
+        """Adds an answer to a randomly-chosen buffer shard for the given
+        exploration.
+
+        Returns:
+            True if the answer was buffered, or False if the chosen shard is
+            full.
+        """
+        shard_id = random.choice(cls.get_shard_ids(exploration_id))
+
+        def _add_answer_to_shard():
+            shard = cls.get_by_id(shard_id)
+            if shard is None:
+                shard = cls(
+                    id=shard_id, exploration_id=exploration_id,
+                    pending_answers={})
+
+            answer_counts = shard.pending_answers.get(answer_log_id, {})
+            if answer in answer_counts:
+                answer_counts[answer] += 1
+            else:
+                added_size = _get_json_size(answer)
+                if answer_log_id not in shard.pending_answers:
+                    added_size += _get_json_size(answer_log_id)
+                if (shard.size_bytes + added_size >
+                        feconf.MAX_ANSWER_SUBMISSION_BUFFER_SHARD_SIZE_BYTES):
+                    return False
+                answer_counts[answer] = 1
+                shard.size_bytes += added_size
+
+            shard.pending_answers[answer_log_id] = answer_counts
+            shard.put()
+            return True
+
+        return transaction_services.run_in_transaction(_add_answer_to_shard)
+
+    @classmethod
+    def get_pending_answers(cls, shard_ids):
+        """Returns the answers buffered in the given shards, without removing
+        them, as a dict of the same form as pending_answers.
+        """
+        pending_answers = {}
+        for shard in cls.get_multi(shard_ids):
+            if shard is not None:
+                _add_answer_counts(pending_answers, shard.pending_answers)
+        return pending_answers
+
+    @classmethod
+    def claim_shards(cls, shard_ids):
+        """Removes the given shards from the buffer and returns them, so that
+        their answers can be merged into the answer logs.
+
+        Each shard is read and deleted in a transaction, so a shard is claimed
+        by at most one caller, even if several flushes run concurrently.
+        Answers that are submitted afterwards go into a new shard.
+
+        Returns:
+            A list of the claimed shards. Shards that do not exist, e.g.
+            because another flush has claimed them, are omitted.
+        """
+        def _claim_shard(shard_id):
+            shard = cls.get_by_id(shard_id)
+            if shard is not None:
+                shard.key.delete()
+            return shard
+
+        claimed_shards = []
+        for shard_id in shard_ids:
+            shard = transaction_services.run_in_transaction(
+                _claim_shard, shard_id)
+            if shard is not None:
+                claimed_shards.append(shard)
+        return claimed_shards
+
+    @classmethod
+    def restore_answers(cls, shard_id, exploration_id, answers):
+        """Adds answers that were claimed from the given shard, but could not
+        be merged into the answer logs, back to the shard.
+
+        Args:
+            shard_id: the id of the shard.
+            exploration_id: the id of the exploration the shard belongs to.
+            answers: a dict of the same form as pending_answers.
+        """
+        def _restore_answers():
+            shard = cls.get_by_id(shard_id)
+            if shard is None:
+                shard = cls(
+                    id=shard_id, exploration_id=exploration_id,
+                    pending_answers={})
+            _add_answer_counts(shard.pending_answers, answers)
+            shard.size_bytes = _get_json_size(shard.pending_answers)
+            shard.put()
+
+        transaction_services.run_in_transaction(_restore_answers)
+
+    @classmethod
+    def get_all_shard_ids(cls):
+        """Returns the ids of all shards that contain buffered answers, across
+        all explorations.
+        """
+        return [key.id() for key in cls.query().iter(keys_only=True)]
+
+
 class MaybeLeaveExplorationEventLogEntryModel(base_models.BaseModel):
     """An event triggered by a reader attempting to leave the
     exploration without completing.
@@ -368,6 +514,19 @@ class ExplorationAnnotationsModel(base_models.BaseMapReduceBatchResultsModel):
     #               'total_entry_count': ...,
     #               'no_answer_count': ...}}
     state_hit_counts = ndb.JsonProperty(indexed=False)
+    # The time, in milliseconds since the Epoch, at which the batch job run
+    # that wrote this model was queued. The counts in this model include all
+    # events created at or before this time, and later batch job runs only
+    # process events created after it. None for models written before batch
+    # jobs became incremental.
+    events_folded_until_msec = ndb.FloatProperty(indexed=False)
+    # The counts that were folded in by earlier batch job runs, and to which
+    # the run that wrote this model added the counts of newer events. This is
+    # a dict with keys 'num_starts', 'num_completions', 'state_hit_counts' and
+    # 'events_folded_until_msec', or None if there were no such counts. It
+    # lets a re-run of the same reduce step recompute the same totals, rather
+    # than adding the new events to them a second time.
+    previous_counts = ndb.JsonProperty(indexed=False)
 
     @classmethod
     def get_entity_id(cls, exploration_id, exploration_version):
@@ -375,7 +534,8 @@ class ExplorationAnnotationsModel(base_models.BaseMapReduceBatchResultsModel):
 
     @classmethod
     def create(
-        cls, exp_id, version, num_starts, num_completions, state_hit_counts):
+        cls, exp_id, version, num_starts, num_completions, state_hit_counts,
+        events_folded_until_msec=None, previous_counts=None):
         """Creates a new ExplorationAnnotationsModel."""
         entity_id = cls.get_entity_id(exp_id, version)
         cls(
@@ -384,7 +544,9 @@ class ExplorationAnnotationsModel(base_models.BaseMapReduceBatchResultsModel):
             version=version,
             num_starts=num_starts,
             num_completions=num_completions,
-            state_hit_counts=state_hit_counts).put()
+            state_hit_counts=state_hit_counts,
+            events_folded_until_msec=events_folded_until_msec,
+            previous_counts=previous_counts).put()
 
     @classmethod
     def get_versions(cls, exploration_id):
@@ -394,10 +556,161 @@ class ExplorationAnnotationsModel(base_models.BaseMapReduceBatchResultsModel):
                     feconf.DEFAULT_QUERY_LIMIT)]
 
 
+def _get_json_size(obj):
+    """Returns the length of the JSON encoding of the given object."""
+    return len(json.dumps(obj))
+
+
+def _add_answer_counts(answer_counts, new_answer_counts):
+    """Adds the counts in new_answer_counts to answer_counts, in place. Both
+    arguments are dicts keyed by answer log id, whose values are dicts mapping
+    answers to counts.
+    """
+    for answer_log_id, counts in new_answer_counts.iteritems():
+        target_counts = answer_counts.setdefault(answer_log_id, {})
+        for answer, count in counts.iteritems():
+            target_counts[answer] = target_counts.get(answer, 0) + count
+
+
+def _enforce_answer_log_size_limit(answer_log):
+    """Ensures that the JSON encoding of the answers in the given answer log
+    fits within feconf.MAX_ANSWER_LOG_SIZE_BYTES, by discarding the answers
+    with the lowest counts.
+    """
+    answers = answer_log.answers
+    total_size = _get_json_size(answers)
+    if total_size <= feconf.MAX_ANSWER_LOG_SIZE_BYTES:
+        return
+
+    num_evicted = 0
+    for answer, _ in sorted(answers.iteritems(), key=lambda item: item[1]):
+        if total_size <= feconf.MAX_ANSWER_LOG_SIZE_BYTES:
+            break
+        # The braces of this one-entry dict stand in for the separator
+        # between entries.
+        total_size -= _get_json_size({answer: answers[answer]})
+        del answers[answer]
+        num_evicted += 1
+
+    counters.ANSWER_LOG_ANSWERS_EVICTED.inc(increment=num_evicted)
+    logging.warning(
+        'Answer log %s exceeded its maximum size; discarded %s answers with '
+        'the lowest counts.' % (answer_log.id, num_evicted))
+
+
+# The maximum number of answer logs that are updated in one transaction. Each
+# answer log is in its own entity group, and a cross-group transaction can
+# span at most 25 entity groups.
+_MAX_ANSWER_LOGS_PER_TRANSACTION = 25
+
+
+def _merge_answers_into_log_batch(pending_answers):
+    """Adds answer counts to several answer logs, creating them if necessary,
+    using one batched read and one batched write.
+
+    The update is made in a transaction, so that concurrent merges into (and
+    resolutions of) the same answer logs do not overwrite each other's
+    counts. Hence, pending_answers should have at most
+    _MAX_ANSWER_LOGS_PER_TRANSACTION keys.
+
+    Args:
+        pending_answers: a dict whose keys are StateRuleAnswerLogModel ids and
+            whose values are dicts mapping answers to counts.
+    """
+    answer_log_ids = pending_answers.keys()
+
+    def _merge_answers():
+        answer_logs = StateRuleAnswerLogModel.get_multi(answer_log_ids)
+        for ind, answer_log_id in enumerate(answer_log_ids):
+            if answer_logs[ind] is None:
+                answer_logs[ind] = StateRuleAnswerLogModel(
+                    id=answer_log_id, answers={})
+
+            answer_log = answer_logs[ind]
+            for answer, count in pending_answers[answer_log_id].iteritems():
+                answer_log.answers[answer] = (
+                    answer_log.answers.get(answer, 0) + count)
+            _enforce_answer_log_size_limit(answer_log)
+        StateRuleAnswerLogModel.put_multi(answer_logs)
+
+    transaction_services.run_in_transaction(_merge_answers)
+
+
+def _merge_answers_into_logs(pending_answers):
+    """Merges buffered answer counts into the answer logs.
+
+    Args:
+        pending_answers: a dict whose keys are StateRuleAnswerLogModel ids and
+            whose values are dicts mapping answers to counts.
+
+    Returns:
+        The set of ids of the answer logs that were updated. The answers for
+        the other answer logs could not be merged (e.g. because the datastore
+        was unavailable); this is logged, and the caller should keep them so
+        that they can be merged later.
+    """
+    merged_answer_log_ids = set()
+    num_answers = 0
+    answer_log_ids = sorted(pending_answers.keys())
+    for ind in range(
+            0, len(answer_log_ids), _MAX_ANSWER_LOGS_PER_TRANSACTION):
+        batch = {
+            answer_log_id: pending_answers[answer_log_id]
+            for answer_log_id in answer_log_ids[
+                ind:ind + _MAX_ANSWER_LOGS_PER_TRANSACTION]}
+        try:
+            _merge_answers_into_log_batch(batch)
+        except Exception as e:
+            logging.error(e)
+            continue
+        merged_answer_log_ids.update(batch.keys())
+        num_answers += sum(
+            sum(answer_counts.values()) for answer_counts in batch.values())
+
+    if merged_answer_log_ids:
+        counters.ANSWER_SUBMISSIONS_MERGED.inc(increment=num_answers)
+        counters.ANSWER_LOG_MERGE_BATCHES.inc()
+    return merged_answer_log_ids
+
+
+def _flush_shards(shard_ids):
+    """Claims the given shards and merges their answers into the answer logs.
+
+    Since each shard is claimed by only one flush, concurrent flushes (e.g.
+    the cron job and resolve_answers()) never count the same answers twice.
+    Answers that cannot be merged are returned to their shards, to be merged
+    by a later flush. (If this is interrupted after the shards are claimed
+    but before the answer logs are written, their answers are lost.)
+
+    Returns:
+        The number of shards that were claimed.
+    """
+    shards = AnswerSubmissionBufferModel.claim_shards(shard_ids)
+
+    pending_answers = {}
+    for shard in shards:
+        _add_answer_counts(pending_answers, shard.pending_answers)
+    merged_answer_log_ids = _merge_answers_into_logs(pending_answers)
+
+    for shard in shards:
+        unmerged_answers = {
+            answer_log_id: answer_counts for (answer_log_id, answer_counts)
+            in shard.pending_answers.iteritems()
+            if answer_log_id not in merged_answer_log_ids}
+        if unmerged_answers:
+            AnswerSubmissionBufferModel.restore_answers(
+                shard.id, shard.exploration_id, unmerged_answers)
+    return len(shards)
+
+
 def process_submitted_answer(
         exploration_id, exploration_version, state_name, handler_name,
         rule, answer):
-    """Adds an answer to the answer log for the rule it hits.
+    """Adds an answer to the buffer of answers for the rule it hits. Buffered
+    answers are merged into the answer log for the rule by
+    flush_buffered_answers() or flush_all_buffered_answers().
+
+    If the buffer is full, the answer is merged into the answer log directly.
 
     Args:
         exploration_id: the exploration id
@@ -406,19 +719,68 @@ def process_submitted_answer(
         rule: the rule
         answer: an HTML string representation of the answer
     """
-    answer_log = StateRuleAnswerLogModel.get_or_create(
+    if len(answer) > feconf.MAX_LOGGED_ANSWER_LENGTH:
+        counters.ANSWER_SUBMISSIONS_DROPPED.inc()
+        logging.error(
+            'Answer of length %s submitted to exploration %s, state %s was '
+            'too long to be logged.' % (
+                len(answer), exploration_id, state_name))
+        return
+
+    answer_log_id = StateRuleAnswerLogModel.get_entity_id(
         exploration_id, state_name, handler_name, str(rule))
-    if answer in answer_log.answers:
-        answer_log.answers[answer] += 1
-    else:
-        answer_log.answers[answer] = 1
 
-    # This may fail due to answer_log.answers being larger than 1 MB in size.
     try:
-        answer_log.put()
+        is_buffered = AnswerSubmissionBufferModel.add_answer(
+            exploration_id, answer_log_id, answer)
     except Exception as e:
         logging.error(e)
-        pass
+        is_buffered = False
+
+    if is_buffered:
+        counters.ANSWER_SUBMISSIONS_BUFFERED.inc()
+    else:
+        counters.ANSWER_SUBMISSION_BUFFER_OVERFLOWS.inc()
+        # As before buffering was introduced, the answer is dropped if this
+        # fails.
+        _merge_answers_into_logs({answer_log_id: {answer: 1}})
+
+
+def get_buffered_answers(exploration_id):
+    """Returns the answers for the given exploration that have not yet been
+    merged into its answer logs, as a dict whose keys are
+    StateRuleAnswerLogModel ids and whose values are dicts mapping answers to
+    counts.
+    """
+    return AnswerSubmissionBufferModel.get_pending_answers(
+        AnswerSubmissionBufferModel.get_shard_ids(exploration_id))
+
+
+def flush_buffered_answers(exploration_id):
+    """Merges all buffered answers for the given exploration into its answer
+    logs.
+    """
+    _flush_shards(AnswerSubmissionBufferModel.get_shard_ids(exploration_id))
+
+
+def flush_all_buffered_answers():
+    """Merges all buffered answers, for all explorations, into the answer
+    logs. The shards are claimed in batches of
+    feconf.ANSWER_SUBMISSION_BUFFER_FLUSH_BATCH_SIZE, and the answers in each
+    batch are combined so that each answer log is updated at most once per
+    batch.
+
+    Returns:
+        The number of buffer shards that were merged.
+    """
+    # Shards that are created while this is running are left for the next
+    # flush.
+    shard_ids = AnswerSubmissionBufferModel.get_all_shard_ids()
+    batch_size = feconf.ANSWER_SUBMISSION_BUFFER_FLUSH_BATCH_SIZE
+    num_flushed_shards = 0
+    for ind in range(0, len(shard_ids), batch_size):
+        num_flushed_shards += _flush_shards(shard_ids[ind:ind + batch_size])
+    return num_flushed_shards
 
 
 def resolve_answers(
@@ -433,16 +795,30 @@ def resolve_answers(
         answers: a list of HTML string representations of the resolved answers
     """
     assert isinstance(answers, list)
-    answer_log = StateRuleAnswerLogModel.get_or_create(
+    # Merge any buffered submissions first, so that they can be resolved too.
+    flush_buffered_answers(exploration_id)
+
+    answer_log_id = StateRuleAnswerLogModel.get_entity_id(
         exploration_id, state_name, handler_name, rule_str)
 
-    for answer in answers:
-        if answer not in answer_log.answers:
-            logging.error(
-                'Answer %s not found in answer log for rule %s of exploration '
-                '%s, state %s, handler %s' % (
-                    answer, rule_str, exploration_id, state_name,
-                    handler_name))
-        else:
-            del answer_log.answers[answer]
-    answer_log.put()
+    # This runs in a transaction, so that it does not overwrite answers that
+    # are concurrently merged into the answer log.
+    def _resolve_answers():
+        answer_log = StateRuleAnswerLogModel.get(answer_log_id, strict=False)
+        if answer_log is None:
+            answer_log = StateRuleAnswerLogModel(id=answer_log_id, answers={})
+
+        unknown_answers = []
+        for answer in answers:
+            if answer not in answer_log.answers:
+                unknown_answers.append(answer)
+            else:
+                del answer_log.answers[answer]
+        answer_log.put()
+        return unknown_answers
+
+    for answer in transaction_services.run_in_transaction(_resolve_answers):
+        logging.error(
+            'Answer %s not found in answer log for rule %s of exploration '
+            '%s, state %s, handler %s' % (
+                answer, rule_str, exploration_id, state_name, handler_name))
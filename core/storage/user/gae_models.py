@@ -81,11 +81,37 @@ class UserSubscriptionsModel(base_models.BaseModel):
 class UserRecentChangesBatchModel(base_models.BaseMapReduceBatchResultsModel):
     """A list of recent changes corresponding to things a user subscribes to.
 
-    This is computed using a MapReduce batch job and may not be up to date.
-    Instances of this class are keyed by the user id.
+    This was computed using a MapReduce batch job, and is no longer written
+    now that the recent updates are read from the ActivityRecentUpdatesModel
+    feeds of the user's activities. Instances of this class are keyed by the
+    user id.
     """
     # The output of the batch job.
     output = ndb.JsonProperty(indexed=False)
     # The time, in milliseconds since the epoch, when the job that computed
     # this batch model was queued.
     job_queued_msec = ndb.FloatProperty(indexed=False)
+
+
+class ActivityRecentUpdatesModel(base_models.BaseModel):
+    """The feed of recent updates to an activity: its title, its last commit,
+    and the last message in each of its most recently updated feedback
+    threads.
+
+    This is updated whenever the activity is committed to or a feedback
+    message is added to one of its threads, and the feeds of the activities a
+    user subscribes to are merged when the user's dashboard is loaded.
+    Instances of this class are keyed by the activity id.
+    """
+    # The title of the activity, as of its last commit.
+    activity_title = ndb.StringProperty(indexed=False)
+    # Whether the activity has been deleted.
+    activity_deleted = ndb.BooleanProperty(indexed=False, default=False)
+    # The last commit to the activity, as a dict with keys 'author_id',
+    # 'last_updated_ms' and 'subject'. May be None.
+    last_commit = ndb.JsonProperty(indexed=False)
+    # The last message in each of the most recently updated feedback threads
+    # of the activity, as a list of dicts with keys 'thread_id', 'author_id',
+    # 'last_updated_ms' and 'subject', sorted by decreasing 'last_updated_ms'.
+    # This has at most feconf.MAX_FEEDBACK_UPDATES_PER_ACTIVITY entries.
+    feedback_updates = ndb.JsonProperty(default=[], indexed=False)
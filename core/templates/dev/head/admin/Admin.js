@@ -44,6 +44,8 @@ oppia.controller('Admin', ['$scope', '$http', function($scope, $http) {
     $http.get($scope.adminHandlerUrl).success(function(data) {
       $scope.configProperties = data.config_properties;
       $scope.computedProperties = data.computed_properties;
+      $scope.counters = data.counters;
+      $scope.handlerStats = data.handler_stats;
     });
   };
 
@@ -161,6 +161,9 @@ oppia.factory('oppiaPlayerService', [
   var version = GLOBALS.explorationVersion;
   var explorationDataUrl = (
     '/explorehandler/init/' + _explorationId + (version ? '?v=' + version : ''));
+  var explorationPayloadUrl = (
+    '/explorehandler/payload/' + _explorationId +
+    (version ? '?v=' + version : ''));
   var sessionId = null;
   var _isLoggedIn = false;
   var _exploration = null;
@@ -334,17 +337,24 @@ oppia.factory('oppiaPlayerService', [
           _loadInitialState(successCallback);
         }
       } else {
-        $http.get(explorationDataUrl).success(function(data) {
-          _exploration = data.exploration;
+        // The learner view data is the same for all users, so it is fetched
+        // separately, and the browser can revalidate it using its ETag.
+        $q.all([
+          $http.get(explorationDataUrl),
+          $http.get(explorationPayloadUrl)
+        ]).then(function(responses) {
+          var data = responses[0].data;
+          _exploration = responses[1].data.exploration;
           _introCardImageUrl = data.intro_card_image_url;
           version = data.version,
           _isLoggedIn = data.is_logged_in;
           sessionId = data.session_id;
           _viewerHasEditingRights = data.can_edit;
           _loadInitialState(successCallback);
-        }).error(function(data) {
+        }, function(response) {
           warningsData.addWarning(
-            data.error || 'There was an error loading the exploration.');
+            response.data.error ||
+            'There was an error loading the exploration.');
         });
       }
     },
@@ -51,6 +51,94 @@ VALUE_GENERATORS_DIR = os.path.join('extensions', 'value_generators')
 # The maximum number of results to retrieve in a datastore query.
 DEFAULT_QUERY_LIMIT = 1000
 
+# The maximum number of exploration versions, and their maximum combined
+# (pickled) size in bytes, that each instance keeps in its in-process cache of
+# explorations for the learner view.
+EXPLORATION_CACHE_MAX_ENTRIES = 100
+EXPLORATION_CACHE_MAX_SIZE_BYTES = 8 * 1024 * 1024
+
+# The maximum number of bundles of precompiled learner view page assets, one
+# per distinct set of interactions used by an exploration, that each instance
+# keeps in memory.
+PLAYER_ASSET_BUNDLE_CACHE_MAX_ENTRIES = 200
+
+# The number of seconds for which memcache remembers that an exploration (or
+# exploration summary) does not exist. Creating the exploration clears this
+# entry immediately; the expiry only bounds the effect of races with such
+# writes.
+MISSING_EXPLORATION_MEMCACHE_TTL_SECS = 60
+# When explorations (or their summaries) that are not in memcache are loaded
+# from the datastore, the loading request holds a lease on each of them in
+# memcache, and other requests that need them at the same time wait for that
+# request to add them to memcache instead of loading them too. These are the
+# number of seconds after which a lease expires, the interval at which waiting
+# requests poll memcache, and the maximum time for which they wait before
+# loading the explorations themselves.
+EXPLORATION_LOAD_LEASE_TTL_SECS = 10
+EXPLORATION_LOAD_LEASE_POLL_INTERVAL_SECS = 0.05
+EXPLORATION_LOAD_LEASE_MAX_WAIT_SECS = 1
+# The maximum number of entities fetched from the datastore by a single
+# get_multi() call when loading explorations or their summaries in bulk. This
+# is well below the datastore limit on the number of keys per batch get, so
+# that the responses for large entities such as explorations stay small.
+MAX_ENTITIES_PER_DATASTORE_GET = 100
+
+# For versioned models whose snapshots are delta-encoded, the maximum number
+# of versions between consecutive full snapshots ('keyframes'). Reading a
+# version requires at most two snapshot reads: its delta and its keyframe.
+SNAPSHOT_KEYFRAME_INTERVAL = 10
+
+# The minimum interval, in seconds, between two flushes of the performance
+# counters of an instance to the aggregate across all instances.
+PERF_COUNTER_FLUSH_INTERVAL_SECS = 60
+
+# The maximum number of compiled answer classifiers that each instance keeps in
+# its in-process cache.
+CLASSIFIER_CACHE_MAX_ENTRIES = 1000
+
+# The maximum number of parsed Jinja strings (e.g. parameterized content and
+# rule inputs), and their maximum combined length in characters, that each
+# instance keeps in its in-process cache.
+JINJA_STRING_CACHE_MAX_ENTRIES = 2000
+JINJA_STRING_CACHE_MAX_SIZE_CHARS = 2 * 1024 * 1024
+
+# The maximum number of sanitized pieces of user-submitted HTML, and their
+# maximum combined length in characters, that each instance keeps in its
+# in-process cache.
+HTML_CLEANER_CACHE_MAX_ENTRIES = 2000
+HTML_CLEANER_CACHE_MAX_SIZE_CHARS = 4 * 1024 * 1024
+
+# Whether exploration rights should be cached in memcache, in addition to the
+# per-request cache used for permission checks.
+CACHE_EXPLORATION_RIGHTS_IN_MEMCACHE = True
+
+# The number of buffer shards per exploration for submitted answers that have
+# not yet been merged into the answer logs. Answers are added to a random
+# shard, so this bounds write contention for popular explorations.
+NUM_ANSWER_SUBMISSION_BUFFER_SHARDS = 10
+# The maximum (approximate) size of the JSON-encoded answers in a buffer shard.
+# Answers that do not fit are written directly to the answer log.
+MAX_ANSWER_SUBMISSION_BUFFER_SHARD_SIZE_BYTES = 256 * 1024
+# The number of buffer shards whose answers are merged into the answer logs
+# together, so that each answer log is read and written at most once per
+# batch.
+ANSWER_SUBMISSION_BUFFER_FLUSH_BATCH_SIZE = 50
+# The maximum size of the JSON-encoded answers in an answer log. When it is
+# exceeded, the answers with the lowest counts are discarded. This keeps the
+# entity below the 1 MB datastore limit.
+MAX_ANSWER_LOG_SIZE_BYTES = 900 * 1024
+# Answers longer than this are not logged.
+MAX_LOGGED_ANSWER_LENGTH = 10000
+
+# The number of shards over which the realtime start and completion counters
+# of an exploration are spread. High-traffic explorations (listed in the
+# high_traffic_exploration_ids config property) use more shards.
+NUM_STATISTICS_REALTIME_SHARDS = 4
+NUM_HIGH_TRAFFIC_STATISTICS_REALTIME_SHARDS = 32
+# The maximum number of (exploration, version) pairs for which a statistics
+# batch job mapper caches the time up to which events have been processed.
+STATISTICS_MR_WATERMARK_CACHE_MAX_ENTRIES = 1000
+
 # The id and name for the final state of an exploration.
 END_DEST = 'END'
 
@@ -130,6 +218,19 @@ CAN_SEND_EMAILS_TO_ADMIN = False
 
 # The maximum size of an uploaded file, in bytes.
 MAX_FILE_SIZE_BYTES = 1048576
+# The size of the chunks into which the contents of files are split in the
+# blob store, in bytes. This must leave room under the datastore's 1 MB entity
+# size limit for the other properties of a blob entity.
+FILE_BLOB_CHUNK_SIZE_BYTES = 900 * 1024
+# The maximum number of file blobs, and their maximum combined size in bytes,
+# that each instance keeps in its in-process cache. Only blobs of at most
+# FILE_BLOB_CACHE_MAX_BLOB_SIZE_BYTES are cached.
+FILE_BLOB_CACHE_MAX_ENTRIES = 500
+FILE_BLOB_CACHE_MAX_SIZE_BYTES = 16 * 1024 * 1024
+FILE_BLOB_CACHE_MAX_BLOB_SIZE_BYTES = 256 * 1024
+# The number of seconds for which browsers and intermediate caches may reuse an
+# exploration asset without revalidating it.
+ASSET_CACHE_MAX_AGE_SECS = 300
 
 # The default language code for an exploration.
 DEFAULT_LANGUAGE_CODE = 'en'
@@ -239,6 +340,7 @@ EXPLORATION_RIGHTS_PREFIX = '/createhandler/rights'
 EXPLORATION_DATA_PREFIX = '/createhandler/data'
 EXPLORATION_URL_PREFIX = '/explore'
 EXPLORATION_INIT_URL_PREFIX = '/explorehandler/init'
+EXPLORATION_PAYLOAD_URL_PREFIX = '/explorehandler/payload'
 FEEDBACK_LAST_UPDATED_URL_PREFIX = '/feedback_last_updated'
 FEEDBACK_THREAD_URL_PREFIX = '/threadhandler'
 FEEDBACK_THREADLIST_URL_PREFIX = '/threadlisthandler'
@@ -294,6 +396,10 @@ OUTPUT_FORMAT_ZIP = 'zip'
 # Types of updates shown in the 'recent updates' table in the dashboard page.
 UPDATE_TYPE_EXPLORATION_COMMIT = 'exploration_commit'
 UPDATE_TYPE_FEEDBACK_MESSAGE = 'feedback_thread'
+# The maximum number of feedback threads of each activity whose latest message
+# is kept in the activity's feed of recent updates. The least recently updated
+# threads are dropped first.
+MAX_FEEDBACK_UPDATES_PER_ACTIVITY = 100
 
 # The name for the default handler of an interaction.
 SUBMIT_HANDLER_NAME = 'submit'
@@ -23,6 +23,7 @@ import feconf
 import jinja2
 from jinja2 import meta
 import json
+import utils
 
 
 class JinjaConfig(object):
@@ -77,6 +78,102 @@ def get_jinja_env(dir_path):
     return env
 
 
+def _create_string_env(autoescape):
+    env = jinja2.Environment(autoescape=autoescape)
+    env.filters.update(JinjaConfig.FILTERS)
+    return env
+
+
+# The environments used to parse strings, keyed by whether autoescaping is
+# enabled. They are shared, so that each string is compiled using an
+# environment that has already been set up.
+_STRING_ENVS = {
+    True: _create_string_env(True),
+    False: _create_string_env(False),
+}
+
+# The substrings that start Jinja syntax. A string that contains none of them
+# renders as itself, unless it contains line breaks (which Jinja normalizes).
+_JINJA_SYNTAX_START_STRINGS = ('{{', '{%', '{#')
+
+# Caches the CompiledString for each recently parsed (string, autoescape)
+# pair.
+_COMPILED_STRINGS = utils.LRUCache(
+    feconf.JINJA_STRING_CACHE_MAX_ENTRIES,
+    max_size_bytes=feconf.JINJA_STRING_CACHE_MAX_SIZE_CHARS)
+
+_CONTENT_PARSING_ERROR = u'[CONTENT PARSING ERROR]'
+
+
+class CompiledString(object):
+    """A string that has been parsed into a Jinja template once, so that it
+    can be rendered repeatedly with different parameters.
+
+    Rendering behaves in the same way as parse_string().
+    """
+
+    def __init__(self, string, autoescape=True):
+        env = _STRING_ENVS[bool(autoescape)]
+        try:
+            # The string is parsed once, and the resulting syntax tree is
+            # used both to find the variables and to compile the template.
+            parsed_string = env.parse(string)
+            self._variables = meta.find_undeclared_variables(parsed_string)
+            self._template = env.from_string(parsed_string)
+        except Exception:
+            raise Exception('Unable to parse string with Jinja: %s' % string)
+
+        self._env = env
+        self._string = string
+
+    def render(self, params):
+        """Renders the compiled string using the given parameters."""
+        if any([var not in params for var in self._variables]):
+            logging.info(
+                'Cannot parse %s fully using %s', self._string, params)
+
+        try:
+            return self._template.render(params)
+        except Exception:
+            logging.error(
+                'jinja_utils.CompiledString.render() failed with args: '
+                '%s, %s, %s' % (
+                    self._string, params, self._env.autoescape))
+            return _CONTENT_PARSING_ERROR
+
+
+def _get_literal_value(string):
+    """Returns what rendering the given string with Jinja would return, if
+    this can be determined without parsing the string (i.e. if the string
+    contains no Jinja syntax and no line breaks), or None otherwise.
+    """
+    for syntax_start_string in _JINJA_SYNTAX_START_STRINGS:
+        if syntax_start_string in string:
+            return None
+    try:
+        value = unicode(string)
+    except UnicodeDecodeError:
+        return None
+    return value if value.splitlines() in ([], [value]) else None
+
+
+def get_compiled_string(string, autoescape=True):
+    """Returns a CompiledString for the given string.
+
+    CompiledStrings are cached on this instance, so a string that is parsed
+    repeatedly (e.g. the content of a state, or a rule input) is compiled
+    only once.
+    """
+    autoescape = bool(autoescape)
+    cache_key = (string, autoescape)
+    compiled_string = _COMPILED_STRINGS.get(cache_key)
+    if compiled_string is None:
+        compiled_string = CompiledString(string, autoescape=autoescape)
+        _COMPILED_STRINGS.put(
+            cache_key, compiled_string, size_bytes=len(string))
+    return compiled_string
+
+
 def parse_string(string, params, autoescape=True):
     """Parses a string using Jinja templating.
 
@@ -86,27 +183,16 @@ def parse_string(string, params, autoescape=True):
       autoescape: whether to enable autoescaping when parsing.
 
     Returns:
-      the parsed string, or None if the string could not be parsed.
-    """
-    env = jinja2.Environment(autoescape=autoescape)
-
-    env.filters.update(JinjaConfig.FILTERS)
-    try:
-        parsed_string = env.parse(string)
-    except Exception:
-        raise Exception('Unable to parse string with Jinja: %s' % string)
+      the parsed string, or '[CONTENT PARSING ERROR]' if the string could
+      not be rendered.
 
-    variables = meta.find_undeclared_variables(parsed_string)
-    if any([var not in params for var in variables]):
-        logging.info('Cannot parse %s fully using %s', string, params)
-
-    try:
-        return env.from_string(string).render(params)
-    except Exception:
-        logging.error(
-            'jinja_utils.parse_string() failed with args: %s, %s, %s' %
-            (string, params, autoescape))
-        return env.from_string('[CONTENT PARSING ERROR]').render({})
+    Raises:
+      Exception: if the string is not valid Jinja syntax.
+    """
+    literal_value = _get_literal_value(string)
+    if literal_value is not None:
+        return literal_value
+    return get_compiled_string(string, autoescape=autoescape).render(params)
 
 
 def evaluate_object(obj, params):
@@ -115,14 +201,8 @@ def evaluate_object(obj, params):
     if isinstance(obj, basestring):
         return parse_string(obj, params)
     elif isinstance(obj, list):
-        new_list = []
-        for item in obj:
-            new_list.append(evaluate_object(item, params))
-        return new_list
+        return [evaluate_object(item, params) for item in obj]
     elif isinstance(obj, dict):
-        new_dict = {}
-        for key in obj:
-            new_dict[key] = evaluate_object(obj[key], params)
-        return new_dict
+        return {key: evaluate_object(obj[key], params) for key in obj}
     else:
         return copy.deepcopy(obj)
@@ -63,6 +63,45 @@ class JinjaUtilsUnitTests(test_utils.GenericTestBase):
         parsed_str = jinja_utils.parse_string('int {{i}}', {'i': 2})
         self.assertEqual(parsed_str, 'int 2')
 
+    def test_compiled_string(self):
+        compiled_string = jinja_utils.CompiledString('{{a}} and {{b}}')
+        self.assertEqual(
+            compiled_string.render({'a': 'x', 'b': 'y'}), 'x and y')
+        self.assertEqual(
+            compiled_string.render({'a': 1, 'b': 2}), '1 and 2')
+        # Some parameters are missing.
+        self.assertEqual(compiled_string.render({'b': 'y'}), ' and y')
+
+        self.assertEqual(
+            jinja_utils.CompiledString('<b>{{a}}</b>').render({'a': '<i>'}),
+            '<b>&lt;i&gt;</b>')
+        self.assertEqual(
+            jinja_utils.CompiledString(
+                '<b>{{a}}</b>', autoescape=False).render({'a': '<i>'}),
+            '<b><i></b>')
+
+        with self.assertRaisesRegexp(Exception, 'Unable to parse string'):
+            jinja_utils.CompiledString('{{a')
+
+    def test_parsed_strings_are_cached(self):
+        compiled_string = jinja_utils.get_compiled_string('{{a}} and {{b}}')
+        self.assertIs(
+            jinja_utils.get_compiled_string('{{a}} and {{b}}'),
+            compiled_string)
+        self.assertIsNot(
+            jinja_utils.get_compiled_string(
+                '{{a}} and {{b}}', autoescape=False),
+            compiled_string)
+
+        params = {'a': 1, 'b': '<i>'}
+        self.assertEqual(
+            jinja_utils.parse_string('{{a}} and {{b}}', params),
+            '1 and &lt;i&gt;')
+        self.assertEqual(
+            jinja_utils.parse_string('no params', params), 'no params')
+        self.assertEqual(
+            jinja_utils.parse_string('line\nbreak\n', params), 'line\nbreak')
+
     def test_evaluate_object(self):
         parsed_object = jinja_utils.evaluate_object('abc', {})
         self.assertEqual(parsed_object, 'abc')
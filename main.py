@@ -32,6 +32,9 @@ from core.controllers import reader
 from core.controllers import recent_commits
 from core.controllers import resources
 from core.controllers import services
+from core.domain import interaction_registry
+from core.domain import player_assets_registry
+from core.domain import rule_domain
 from core.platform import models
 transaction_services = models.Registry.import_transaction_services()
 
@@ -57,7 +60,12 @@ class WarmupHandler(base.BaseHandler):
 
     def get(self):
         """Handles GET warmup requests."""
-        pass
+        # Load the rule and interaction registries, and compile the assets of
+        # the learner view page, so that the extension modules and templates
+        # do not need to be loaded while serving user requests.
+        rule_domain.Registry.preload()
+        interaction_registry.Registry.get_all_specs()
+        player_assets_registry.Registry.compile_all()
 
 
 # Regex for base64 id encoding
@@ -233,6 +241,9 @@ urls = [
     get_redirect_route(
         r'%s/<exploration_id>' % feconf.EXPLORATION_INIT_URL_PREFIX,
         reader.ExplorationHandler, 'exploration_handler'),
+    get_redirect_route(
+        r'%s/<exploration_id>' % feconf.EXPLORATION_PAYLOAD_URL_PREFIX,
+        reader.ExplorationPayloadHandler, 'exploration_payload_handler'),
     get_redirect_route(
         r'/explorehandler/exploration_start_event/<exploration_id>',
         reader.ExplorationStartEventHandler,
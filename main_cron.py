@@ -33,6 +33,9 @@ urls = [
     main.get_redirect_route(
         r'/cron/jobs/cleanup', cron.CronMapreduceCleanupHandler,
         'job_cleanup_handler'),
+    main.get_redirect_route(
+        r'/cron/stats/flush_answer_buffer', cron.CronAnswerBufferFlushHandler,
+        'answer_buffer_flush_handler'),
 ]
 
 
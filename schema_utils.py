@@ -26,7 +26,7 @@ following Python types: bool, dict, float, int, list, unicode.
 
 __author__ = 'sll@google.com (Sean Lip)'
 
-import numbers
+import copy
 import urllib
 import urlparse
 
@@ -54,6 +54,186 @@ SCHEMA_TYPE_LIST = 'list'
 SCHEMA_TYPE_UNICODE = 'unicode'
 
 
+# The maximum number of compiled schemas to keep. When there are more, all of
+# them are discarded; in practice, this only happens if schema dicts are
+# created on the fly.
+_MAX_COMPILED_SCHEMAS = 500
+# Maps the id of each compiled schema dict to a 3-tuple containing the schema
+# dict itself (which keeps its id from being reused), a deep copy of it (which
+# is used to detect changes to the dict) and the compiled normalizer. This is
+# a plain dict, rather than a utils.LRUCache, because lookups are on the
+# answer path and need to be as cheap as possible.
+_COMPILED_SCHEMAS = {}
+
+
+def _bind(get_fn, fn_id):
+    """Returns get_fn(fn_id). If that fails, returns a function that looks up
+    get_fn(fn_id) each time it is called instead, so that the failure is
+    reported when an object is normalized rather than when the schema is
+    compiled.
+    """
+    try:
+        return get_fn(fn_id)
+    except Exception:
+        def _get_fn_and_call(*args, **kwargs):
+            return get_fn(fn_id)(*args, **kwargs)
+        return _get_fn_and_call
+
+
+def _compile_type_normalizer(schema):
+    """Returns a function that normalizes an object against the type given in
+    the schema, but that does not check choices or apply post-normalizers and
+    validators.
+    """
+    schema_type = schema[SCHEMA_KEY_TYPE]
+
+    if schema_type == SCHEMA_TYPE_BOOL:
+        def normalize_bool(obj):
+            assert isinstance(obj, bool), ('Expected bool, received %s' % obj)
+            return obj
+        return normalize_bool
+    elif schema_type == SCHEMA_TYPE_CUSTOM:
+        def get_custom_normalizer(obj_type):
+            # Importing this at the top of the file causes a circular
+            # dependency.
+            # TODO(sll): Either get rid of custom objects or find a way to
+            # merge them into the schema framework -- probably the latter.
+            from core.domain import obj_services
+            return obj_services.Registry.get_object_class_by_type(
+                obj_type).normalize
+        return _bind(get_custom_normalizer, schema[SCHEMA_KEY_OBJ_TYPE])
+    elif schema_type == SCHEMA_TYPE_DICT:
+        property_normalizers = [
+            (prop[SCHEMA_KEY_NAME], _compile_schema(prop[SCHEMA_KEY_SCHEMA]))
+            for prop in schema[SCHEMA_KEY_PROPERTIES]]
+        expected_dict_keys = frozenset([
+            key for (key, _) in property_normalizers])
+
+        def normalize_dict(obj):
+            assert isinstance(obj, dict), ('Expected dict, received %s' % obj)
+            assert obj.viewkeys() == expected_dict_keys
+            return {
+                key: normalize_property(obj[key])
+                for (key, normalize_property) in property_normalizers}
+        return normalize_dict
+    elif schema_type == SCHEMA_TYPE_FLOAT:
+        # float() always returns a real number, so its result need not be
+        # checked.
+        return float
+    elif schema_type == SCHEMA_TYPE_INT:
+        def normalize_int(obj):
+            obj = int(obj)
+            # int() returns a long if obj is too large for an int.
+            assert isinstance(obj, int), ('Expected int, received %s' % obj)
+            return obj
+        return normalize_int
+    elif schema_type == SCHEMA_TYPE_HTML:
+        def normalize_html(obj):
+            assert isinstance(obj, basestring), (
+                'Expected unicode HTML string, received %s' % obj)
+            return html_cleaner.clean(unicode(obj))
+        return normalize_html
+    elif schema_type == SCHEMA_TYPE_LIST:
+        normalize_item = _compile_schema(schema[SCHEMA_KEY_ITEMS])
+        has_len = SCHEMA_KEY_LEN in schema
+        expected_len = schema.get(SCHEMA_KEY_LEN)
+
+        def normalize_list(obj):
+            assert isinstance(obj, list), ('Expected list, received %s' % obj)
+            if has_len:
+                assert len(obj) == expected_len
+            return [normalize_item(item) for item in obj]
+        return normalize_list
+    elif schema_type == SCHEMA_TYPE_UNICODE:
+        def normalize_unicode(obj):
+            assert isinstance(obj, basestring), (
+                'Expected unicode string, received %s' % obj)
+            return unicode(obj)
+        return normalize_unicode
+    else:
+        def fail(unused_obj):
+            raise Exception('Invalid schema type: %s' % schema_type)
+        return fail
+
+
+def _compile_schema(schema):
+    """Returns a function that takes an object and behaves like
+    normalize_against_schema(obj, schema).
+
+    The schema is interpreted only once, here: the returned function is built
+    from closures with the expected dict keys precomputed and the
+    normalizers and validators already looked up.
+    """
+    normalize_type = _compile_type_normalizer(schema)
+
+    has_choices = SCHEMA_KEY_CHOICES in schema
+    choices = schema.get(SCHEMA_KEY_CHOICES)
+
+    post_normalizers = []
+    for normalizer in schema.get(SCHEMA_KEY_POST_NORMALIZERS, []):
+        kwargs = dict(normalizer)
+        del kwargs['id']
+        post_normalizers.append(
+            (_bind(Normalizers.get, normalizer['id']), kwargs))
+
+    validators = []
+    for validator in schema.get(SCHEMA_KEY_VALIDATORS, []):
+        kwargs = dict(validator)
+        del kwargs['id']
+        validators.append(
+            (validator['id'], _bind(_Validators.get, validator['id']), kwargs))
+
+    if not has_choices and not post_normalizers and not validators:
+        return normalize_type
+
+    def normalize(obj):
+        normalized_obj = normalize_type(obj)
+
+        if has_choices:
+            assert normalized_obj in choices, (
+                'Received %s which is not in the allowed range of choices: %s'
+                % (normalized_obj, choices))
+
+        # When type normalization is finished, apply the post-normalizers in
+        # the given order.
+        for (normalizer_fn, kwargs) in post_normalizers:
+            normalized_obj = normalizer_fn(normalized_obj, **kwargs)
+
+        # Validate the normalized object.
+        for (validator_id, validator_fn, kwargs) in validators:
+            assert validator_fn(normalized_obj, **kwargs), (
+                'Validation failed: %s (%s) for object %s' % (
+                    validator_id, kwargs, normalized_obj))
+
+        return normalized_obj
+
+    return normalize
+
+
+def get_schema_normalizer(schema):
+    """Returns a function that takes an object and behaves like
+    normalize_against_schema(obj, schema).
+
+    Compiled schemas are cached by the identity of the schema dict, so
+    callers that normalize many objects against the same schema dict (such as
+    the SCHEMA of an object class) compile it only once. Changes made to the
+    schema dict after it was compiled are detected, and cause it to be
+    compiled again.
+    """
+    schema_id = id(schema)
+    cached_value = _COMPILED_SCHEMAS.get(schema_id)
+    if cached_value is not None:
+        (cached_schema, schema_copy, normalizer) = cached_value
+        if cached_schema is schema and schema_copy == schema:
+            return normalizer
+
+    normalizer = _compile_schema(schema)
+    if len(_COMPILED_SCHEMAS) >= _MAX_COMPILED_SCHEMAS:
+        _COMPILED_SCHEMAS.clear()
+    _COMPILED_SCHEMAS[schema_id] = (schema, copy.deepcopy(schema), normalizer)
+    return normalizer
+
+
 def normalize_against_schema(obj, schema):
     """Validate the given object using the schema, normalizing if necessary.
 
@@ -63,90 +243,7 @@ def normalize_against_schema(obj, schema):
     Raises:
         AssertionError: if the object fails to validate against the schema.
     """
-    normalized_obj = None
-
-    if schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_BOOL:
-        assert isinstance(obj, bool), ('Expected bool, received %s' % obj)
-        normalized_obj = obj
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_CUSTOM:
-        # Importing this at the top of the file causes a circular dependency.
-        # TODO(sll): Either get rid of custom objects or find a way to merge
-        # them into the schema framework -- probably the latter.
-        from core.domain import obj_services
-        obj_class = obj_services.Registry.get_object_class_by_type(
-            schema[SCHEMA_KEY_OBJ_TYPE])
-        normalized_obj = obj_class.normalize(obj)
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_DICT:
-        assert isinstance(obj, dict), ('Expected dict, received %s' % obj)
-        expected_dict_keys = [
-            p[SCHEMA_KEY_NAME] for p in schema[SCHEMA_KEY_PROPERTIES]]
-        assert set(obj.keys()) == set(expected_dict_keys)
-
-        normalized_obj = {}
-        for prop in schema[SCHEMA_KEY_PROPERTIES]:
-            key = prop[SCHEMA_KEY_NAME]
-            normalized_obj[key] = normalize_against_schema(
-                obj[key], prop[SCHEMA_KEY_SCHEMA])
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_FLOAT:
-        obj = float(obj)
-        assert isinstance(obj, numbers.Real), (
-            'Expected float, received %s' % obj)
-        normalized_obj = obj
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_INT:
-        obj = int(obj)
-        assert isinstance(obj, numbers.Integral), (
-            'Expected int, received %s' % obj)
-        assert isinstance(obj, int), ('Expected int, received %s' % obj)
-        normalized_obj = obj
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_HTML:
-        assert isinstance(obj, basestring), (
-            'Expected unicode HTML string, received %s' % obj)
-        obj = unicode(obj)
-        assert isinstance(obj, unicode), (
-            'Expected unicode, received %s' % obj)
-        normalized_obj = html_cleaner.clean(obj)
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_LIST:
-        assert isinstance(obj, list), ('Expected list, received %s' % obj)
-        item_schema = schema[SCHEMA_KEY_ITEMS]
-        if SCHEMA_KEY_LEN in schema:
-            assert len(obj) == schema[SCHEMA_KEY_LEN]
-        normalized_obj = [
-            normalize_against_schema(item, item_schema) for item in obj
-        ]
-    elif schema[SCHEMA_KEY_TYPE] == SCHEMA_TYPE_UNICODE:
-        assert isinstance(obj, basestring), (
-            'Expected unicode string, received %s' % obj)
-        obj = unicode(obj)
-        assert isinstance(obj, unicode), (
-            'Expected unicode, received %s' % obj)
-        normalized_obj = obj
-    else:
-        raise Exception('Invalid schema type: %s' % schema[SCHEMA_KEY_TYPE])
-
-    if SCHEMA_KEY_CHOICES in schema:
-        assert normalized_obj in schema[SCHEMA_KEY_CHOICES], (
-            'Received %s which is not in the allowed range of choices: %s' %
-            (normalized_obj, schema[SCHEMA_KEY_CHOICES]))
-
-    # When type normalization is finished, apply the post-normalizers in the
-    # given order.
-    if SCHEMA_KEY_POST_NORMALIZERS in schema:
-        for normalizer in schema[SCHEMA_KEY_POST_NORMALIZERS]:
-            kwargs = dict(normalizer)
-            del kwargs['id']
-            normalized_obj = Normalizers.get(normalizer['id'])(
-                normalized_obj, **kwargs)
-
-    # Validate the normalized object.
-    if SCHEMA_KEY_VALIDATORS in schema:
-        for validator in schema[SCHEMA_KEY_VALIDATORS]:
-            kwargs = dict(validator)
-            del kwargs['id']
-            assert _Validators.get(validator['id'])(normalized_obj, **kwargs), (
-                'Validation failed: %s (%s) for object %s' % (
-                    validator['id'], kwargs, normalized_obj))
-
-    return normalized_obj
+    return get_schema_normalizer(schema)(obj)
 
 
 class Normalizers(object):
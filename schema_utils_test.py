@@ -563,3 +563,23 @@ class SchemaNormalizationUnitTests(test_utils.GenericTestBase):
         ], None, 123, 'abc']
 
         self.check_normalization(schema, mappings, invalid_vals)
+
+    def test_compiled_normalizers_are_reused_until_the_schema_changes(self):
+        schema = {
+            'type': schema_utils.SCHEMA_TYPE_LIST,
+            'items': {
+                'type': schema_utils.SCHEMA_TYPE_INT,
+            },
+        }
+        normalizer = schema_utils.get_schema_normalizer(schema)
+        self.assertEqual(normalizer(['1', 2]), [1, 2])
+        self.assertIs(schema_utils.get_schema_normalizer(schema), normalizer)
+
+        # An equal, but distinct, schema dict is compiled separately.
+        self.assertIsNot(
+            schema_utils.get_schema_normalizer(dict(schema)), normalizer)
+
+        schema['items']['type'] = schema_utils.SCHEMA_TYPE_UNICODE
+        self.assertEqual(
+            schema_utils.normalize_against_schema(['1', 'a'], schema),
+            ['1', 'a'])
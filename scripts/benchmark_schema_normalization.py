@@ -0,0 +1,175 @@
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark comparing interpreted and compiled schema normalization.
+
+For a few typical schemas (those of rule inputs, and of interaction
+customization args), this reports the average time needed to normalize a
+value:
+  - by interpreting the schema dict on every call, as
+    schema_utils.normalize_against_schema() used to do;
+  - by calling schema_utils.normalize_against_schema(), which reuses the
+    normalizer that was compiled for the schema dict the first time it was
+    seen.
+
+Run this script from the oppia/ directory:
+
+    python scripts/benchmark_schema_normalization.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+CURR_DIR = os.path.abspath(os.getcwd())
+THIRD_PARTY_DIR = os.path.join(CURR_DIR, 'third_party')
+for path in [
+        os.path.join(THIRD_PARTY_DIR, 'html5lib-python-0.95'),
+        os.path.join(THIRD_PARTY_DIR, 'bleach-1.2.2'),
+        CURR_DIR]:
+    sys.path.insert(0, path)
+
+from extensions.objects.models import objects
+import schema_utils
+
+
+_PARSER = argparse.ArgumentParser()
+_PARSER.add_argument(
+    '--num_calls', help='number of normalizations to time for each schema',
+    type=int, default=20000)
+
+# A schema like that of the 'choices' customization arg of an interaction.
+CHOICES_SCHEMA = {
+    'type': 'list',
+    'items': {
+        'type': 'unicode',
+        'post_normalizers': [{'id': 'normalize_spaces'}],
+        'validators': [{'id': 'is_nonempty'}],
+    },
+    'validators': [{
+        'id': 'has_length_at_least',
+        'min_value': 1,
+    }, {
+        'id': 'is_uniquified',
+    }],
+}
+
+BENCHMARK_CASES = [
+    ('NonnegativeInt', objects.NonnegativeInt.SCHEMA, '42'),
+    ('CoordTwoDim', objects.CoordTwoDim.SCHEMA, [1.5, '2.5']),
+    ('ListOfUnicodeString', objects.ListOfUnicodeString.SCHEMA, [
+        'apple', 'banana', 'cherry', 'durian']),
+    ('choices customization arg', CHOICES_SCHEMA, [
+        '  Option  %s ' % ind for ind in range(5)]),
+    ('Graph (6 vertices)', objects.Graph.SCHEMA, {
+        'vertices': [
+            {'x': ind, 'y': ind * 2.0, 'label': 'v%s' % ind}
+            for ind in range(6)],
+        'edges': [
+            {'src': ind, 'dst': ind + 1, 'weight': 1} for ind in range(5)],
+        'isLabeled': True,
+        'isDirected': False,
+        'isWeighted': False,
+    }),
+]
+
+
+def _interpret_against_schema(obj, schema):
+    """Normalizes obj against the schema by interpreting the schema dict, in
+    the same way as schema_utils.normalize_against_schema() did before
+    schemas were compiled. Custom and HTML schemas are not supported.
+    """
+    if schema['type'] == schema_utils.SCHEMA_TYPE_BOOL:
+        assert isinstance(obj, bool), ('Expected bool, received %s' % obj)
+        normalized_obj = obj
+    elif schema['type'] == schema_utils.SCHEMA_TYPE_DICT:
+        assert isinstance(obj, dict), ('Expected dict, received %s' % obj)
+        expected_dict_keys = [p['name'] for p in schema['properties']]
+        assert set(obj.keys()) == set(expected_dict_keys)
+
+        normalized_obj = {}
+        for prop in schema['properties']:
+            key = prop['name']
+            normalized_obj[key] = _interpret_against_schema(
+                obj[key], prop['schema'])
+    elif schema['type'] == schema_utils.SCHEMA_TYPE_FLOAT:
+        obj = float(obj)
+        normalized_obj = obj
+    elif schema['type'] == schema_utils.SCHEMA_TYPE_INT:
+        obj = int(obj)
+        assert isinstance(obj, int), ('Expected int, received %s' % obj)
+        normalized_obj = obj
+    elif schema['type'] == schema_utils.SCHEMA_TYPE_LIST:
+        assert isinstance(obj, list), ('Expected list, received %s' % obj)
+        if 'len' in schema:
+            assert len(obj) == schema['len']
+        normalized_obj = [
+            _interpret_against_schema(item, schema['items']) for item in obj]
+    elif schema['type'] == schema_utils.SCHEMA_TYPE_UNICODE:
+        assert isinstance(obj, basestring), (
+            'Expected unicode string, received %s' % obj)
+        normalized_obj = unicode(obj)
+    else:
+        raise Exception('Unsupported schema type: %s' % schema['type'])
+
+    if 'choices' in schema:
+        assert normalized_obj in schema['choices']
+
+    for normalizer in schema.get('post_normalizers', []):
+        kwargs = dict(normalizer)
+        del kwargs['id']
+        normalized_obj = schema_utils.Normalizers.get(normalizer['id'])(
+            normalized_obj, **kwargs)
+
+    for validator in schema.get('validators', []):
+        kwargs = dict(validator)
+        del kwargs['id']
+        assert schema_utils._Validators.get(validator['id'])(
+            normalized_obj, **kwargs)
+
+    return normalized_obj
+
+
+def _get_average_time_usec(normalize_fn, obj, schema, num_calls):
+    start_time = time.time()
+    for _ in range(num_calls):
+        normalize_fn(obj, schema)
+    return (time.time() - start_time) * 1000000 / num_calls
+
+
+def main():
+    parsed_args = _PARSER.parse_args()
+
+    print 'Average time per normalization, over %s calls:' % (
+        parsed_args.num_calls)
+    print '%-28s %18s %18s %8s' % (
+        'Schema', 'Interpreted (us)', 'Compiled (us)', 'Speedup')
+
+    for (name, schema, obj) in BENCHMARK_CASES:
+        assert (_interpret_against_schema(obj, schema) ==
+                schema_utils.normalize_against_schema(obj, schema))
+
+        interpreted_time_usec = _get_average_time_usec(
+            _interpret_against_schema, obj, schema, parsed_args.num_calls)
+        compiled_time_usec = _get_average_time_usec(
+            schema_utils.normalize_against_schema, obj, schema,
+            parsed_args.num_calls)
+        print '%-28s %18.2f %18.2f %7.1fx' % (
+            name, interpreted_time_usec, compiled_time_usec,
+            interpreted_time_usec / compiled_time_usec)
+
+
+if __name__ == '__main__':
+    main()
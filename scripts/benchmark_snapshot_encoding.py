@@ -0,0 +1,174 @@
+# Copyright 2014 The Oppia Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark comparing full and delta-encoded version snapshots.
+
+This simulates the version history of an exploration in which each commit
+edits the content of a single state, and reports, for full snapshots and for
+delta-encoded snapshots with various keyframe intervals:
+  - the total size of the stored snapshots;
+  - the average time needed to decode the snapshot of a version.
+
+Note that decoding a delta-encoded snapshot also requires fetching two
+snapshot entities (the delta and its keyframe) rather than one; the latency of
+that extra datastore read is not included here.
+
+Run this script from the oppia/ directory:
+
+    python scripts/benchmark_snapshot_encoding.py
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+import utils
+
+
+_PARSER = argparse.ArgumentParser()
+_PARSER.add_argument(
+    '--num_states', help='number of states in the exploration', type=int,
+    default=30)
+_PARSER.add_argument(
+    '--num_versions', help='number of versions to simulate', type=int,
+    default=200)
+_PARSER.add_argument(
+    '--num_reads', help='number of random version reads to time', type=int,
+    default=2000)
+
+KEYFRAME_INTERVALS = [5, 10, 20, 50]
+# Keep in sync with VersionedModel._MAX_SNAPSHOT_DELTA_SIZE_FRACTION.
+MAX_SNAPSHOT_DELTA_SIZE_FRACTION = 0.5
+
+
+def _get_random_text(length):
+    return ''.join(random.choice('abcdefghij ') for _ in range(length))
+
+
+def _get_initial_snapshot(num_states):
+    states = {}
+    for ind in range(num_states):
+        states['State %s' % ind] = {
+            'content': [{'type': 'text', 'value': _get_random_text(500)}],
+            'param_changes': [],
+            'interaction': {
+                'id': 'TextInput',
+                'customization_args': {'placeholder': {'value': ''}},
+                'handlers': [{
+                    'name': 'submit',
+                    'rule_specs': [{
+                        'definition': {'rule_type': 'default'},
+                        'dest': 'State %s' % ((ind + 1) % num_states),
+                        'feedback': [_get_random_text(100)],
+                        'param_changes': [],
+                    }],
+                }],
+            },
+        }
+    return {
+        'title': 'Benchmark exploration',
+        'category': 'Benchmarks',
+        'objective': _get_random_text(100),
+        'init_state_name': 'State 0',
+        'states': states,
+        'param_specs': {},
+        'param_changes': [],
+        'version': 1,
+    }
+
+
+def _get_version_history(num_states, num_versions):
+    """Returns a list of the snapshots of successive versions."""
+    snapshot = _get_initial_snapshot(num_states)
+    snapshots = [snapshot]
+    for version in range(2, num_versions + 1):
+        snapshot = copy.deepcopy(snapshot)
+        state_name = 'State %s' % random.randrange(num_states)
+        snapshot['states'][state_name]['content'][0]['value'] = (
+            _get_random_text(500))
+        snapshot['version'] = version
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _encode(snapshots, keyframe_interval):
+    """Encodes the snapshots in the same way as VersionedModel, and returns a
+    list of (keyframe index, JSON-encoded content) tuples, where the keyframe
+    index is None for full snapshots. If keyframe_interval is None, all
+    snapshots are stored in full.
+    """
+    encoded_snapshots = []
+    keyframe_index = None
+    for (ind, snapshot) in enumerate(snapshots):
+        encoded_snapshot = json.dumps(snapshot)
+        if (keyframe_interval is not None and keyframe_index is not None and
+                ind - keyframe_index < keyframe_interval):
+            encoded_delta = json.dumps(utils.compute_dict_delta(
+                snapshots[keyframe_index], snapshot))
+            if (len(encoded_delta) <=
+                    len(encoded_snapshot) * MAX_SNAPSHOT_DELTA_SIZE_FRACTION):
+                encoded_snapshots.append((keyframe_index, encoded_delta))
+                continue
+
+        encoded_snapshots.append((None, encoded_snapshot))
+        keyframe_index = ind
+    return encoded_snapshots
+
+
+def _decode(encoded_snapshots, ind):
+    (keyframe_index, content) = encoded_snapshots[ind]
+    if keyframe_index is None:
+        return json.loads(content)
+    return utils.apply_dict_delta(
+        json.loads(encoded_snapshots[keyframe_index][1]), json.loads(content))
+
+
+def main():
+    parsed_args = _PARSER.parse_args()
+    snapshots = _get_version_history(
+        parsed_args.num_states, parsed_args.num_versions)
+    read_indexes = [
+        random.randrange(len(snapshots))
+        for _ in range(parsed_args.num_reads)]
+
+    print 'Simulated %s versions of an exploration with %s states.' % (
+        parsed_args.num_versions, parsed_args.num_states)
+    print '%-20s %15s %20s' % (
+        'Encoding', 'Total size (KB)', 'Avg decode time (ms)')
+
+    for keyframe_interval in [None] + KEYFRAME_INTERVALS:
+        encoded_snapshots = _encode(snapshots, keyframe_interval)
+        for ind in range(len(snapshots)):
+            assert _decode(encoded_snapshots, ind) == snapshots[ind]
+
+        total_size = sum([len(content) for (_, content) in encoded_snapshots])
+        start_time = time.time()
+        for ind in read_indexes:
+            _decode(encoded_snapshots, ind)
+        average_decode_time_msec = (
+            (time.time() - start_time) * 1000 / len(read_indexes))
+
+        print '%-20s %15.1f %20.3f' % (
+            'full' if keyframe_interval is None else
+            'keyframes every %s' % keyframe_interval,
+            total_size / 1024.0, average_decode_time_msec)
+
+
+if __name__ == '__main__':
+    main()
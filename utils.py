@@ -17,6 +17,8 @@
 __author__ = 'sll@google.com (Sean Lip)'
 
 import base64
+import collections
+import copy
 import datetime
 import hashlib
 import json
@@ -36,6 +38,16 @@ import zipfile
 # type.
 ANY_TYPE = 1
 
+# The YAML loader to use. The libyaml-based loader is much faster than the
+# pure-Python one, but it is only available if PyYAML was built with libyaml.
+# Note that the pure-Python dumper is always used, since the libyaml-based
+# dumper wraps long strings differently, which would change the format of
+# exported explorations.
+try:
+    _YAML_SAFE_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_SAFE_LOADER = yaml.SafeLoader
+
 
 class InvalidInputException(Exception):
     """Error class for invalid input."""
@@ -193,7 +205,7 @@ def yaml_from_dict(dictionary, width=80):
 def dict_from_yaml(yaml_str):
     """Gets the dict representation of a YAML string."""
     try:
-        retrieved_dict = yaml.safe_load(yaml_str)
+        retrieved_dict = yaml.load(yaml_str, Loader=_YAML_SAFE_LOADER)
         assert isinstance(retrieved_dict, dict)
         return retrieved_dict
     except yaml.YAMLError as e:
@@ -351,6 +363,30 @@ def generate_random_string(length):
     return base64.urlsafe_b64encode(os.urandom(length))
 
 
+class WriteOnlyStream(object):
+    """A minimal file-like object that passes everything that is written to
+    it to a callback, e.g. the write() method of a response, rather than
+    buffering it.
+
+    It also keeps track of the number of bytes written so far, since some
+    writers (such as zipfile.ZipFile) need to call tell().
+    """
+
+    def __init__(self, write_fn):
+        self._write_fn = write_fn
+        self._position = 0
+
+    def write(self, data):
+        self._write_fn(data)
+        self._position += len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+
 def vfs_construct_path(a, *p):
     """Mimics behavior of os.path.join on Posix machines."""
     path = a
@@ -402,3 +438,157 @@ def get_short_language_description(full_language_description):
     else:
         ind = full_language_description.find(' (')
         return full_language_description[:ind]
+
+
+def compute_dict_delta(old_dict, new_dict):
+    """Returns a delta that transforms old_dict into new_dict when passed to
+    apply_dict_delta().
+
+    The delta is computed structurally: nested dicts are compared key by key,
+    and only the values that differ are included. Other values (including
+    lists) are replaced as a whole. The delta is a dict that may contain the
+    following keys:
+      - 'set': a dict with the new values of added or changed keys.
+      - 'delete': a list of the removed keys.
+      - 'update': a dict mapping keys whose values are dicts in both old_dict
+          and new_dict to the deltas between those dicts.
+    """
+    values_to_set = {}
+    updates = {}
+    for (key, new_value) in new_dict.iteritems():
+        if key not in old_dict:
+            values_to_set[key] = new_value
+        elif isinstance(new_value, dict) and isinstance(old_dict[key], dict):
+            sub_delta = compute_dict_delta(old_dict[key], new_value)
+            if sub_delta:
+                updates[key] = sub_delta
+        elif old_dict[key] != new_value:
+            values_to_set[key] = new_value
+
+    delta = {}
+    if values_to_set:
+        delta['set'] = values_to_set
+    keys_to_delete = [key for key in old_dict if key not in new_dict]
+    if keys_to_delete:
+        delta['delete'] = keys_to_delete
+    if updates:
+        delta['update'] = updates
+    return delta
+
+
+def apply_dict_delta(old_dict, delta):
+    """Returns the result of applying a delta computed by compute_dict_delta()
+    to old_dict. old_dict is not modified.
+    """
+    new_dict = dict(old_dict)
+    for key in delta.get('delete', []):
+        del new_dict[key]
+    for (key, sub_delta) in delta.get('update', {}).iteritems():
+        new_dict[key] = apply_dict_delta(old_dict[key], sub_delta)
+    new_dict.update(copy.deepcopy(delta.get('set', {})))
+    return new_dict
+
+
+class LRUCache(object):
+    """A bounded, in-process, least-recently-used cache.
+
+    Entries are evicted (least recently used first) whenever the number of
+    entries exceeds max_entries, or the sum of the caller-supplied entry sizes
+    exceeds max_size_bytes. The contents are local to a single instance and
+    are not shared across instances, so callers are responsible for
+    invalidating entries that may have become stale.
+
+    Values returned by get() are shared between all callers, and should be
+    treated as read-only.
+    """
+
+    def __init__(self, max_entries, max_size_bytes=None):
+        """Args:
+          - max_entries: the maximum number of entries to keep.
+          - max_size_bytes: the maximum combined size of all entries, in
+              bytes, or None if the size of the cache should be bounded only
+              by the number of entries.
+        """
+        if max_entries <= 0:
+            raise ValueError(
+                'Expected max_entries to be positive, received %s' %
+                max_entries)
+
+        self._max_entries = max_entries
+        self._max_size_bytes = max_size_bytes
+        # Maps each key to a (value, size_bytes) 2-tuple, in order of least
+        # recent use.
+        self._entries = collections.OrderedDict()
+        self._total_size_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_size_bytes(self):
+        return self._total_size_bytes
+
+    def keys(self):
+        """Returns the keys in the cache, least recently used first."""
+        return self._entries.keys()
+
+    def get(self, key, default=None):
+        """Returns the value for the given key, marking it as recently used.
+
+        Returns default if the key is not in the cache.
+        """
+        if key not in self._entries:
+            return default
+
+        entry = self._entries.pop(key)
+        self._entries[key] = entry
+        return entry[0]
+
+    def put(self, key, value, size_bytes=0):
+        """Adds a value to the cache, replacing any existing value for the
+        given key.
+
+        Returns:
+          a list of the keys that were evicted to make room for the new
+          entry. If the entry is itself too large to fit in the cache, it is
+          not stored, and its key is included in the returned list.
+        """
+        self.delete(key)
+
+        if (self._max_size_bytes is not None and
+                size_bytes > self._max_size_bytes):
+            return [key]
+
+        self._entries[key] = (value, size_bytes)
+        self._total_size_bytes += size_bytes
+
+        evicted_keys = []
+        while len(self._entries) > self._max_entries or (
+                self._max_size_bytes is not None and
+                self._total_size_bytes > self._max_size_bytes):
+            evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_size_bytes -= evicted_size
+            evicted_keys.append(evicted_key)
+
+        return evicted_keys
+
+    def delete(self, key):
+        """Removes the given key from the cache, if it is present.
+
+        Returns True if the key was present, and False otherwise.
+        """
+        if key not in self._entries:
+            return False
+
+        _, size_bytes = self._entries.pop(key)
+        self._total_size_bytes -= size_bytes
+        return True
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        self._entries.clear()
+        self._total_size_bytes = 0
+
@@ -16,8 +16,10 @@
 
 __author__ = 'Jeremy Emerson'
 
+
 import test_utils
 import utils
+import yaml
 
 
 class UtilsTests(test_utils.GenericTestBase):
@@ -69,6 +71,15 @@ class UtilsTests(test_utils.GenericTestBase):
         with self.assertRaises(utils.InvalidInputException):
             yaml_str = utils.dict_from_yaml('{')
 
+    def test_dict_from_yaml_with_pure_python_loader(self):
+        """Test that dict_from_yaml falls back to the pure-Python loader."""
+        yaml_str = utils.yaml_from_dict({'a': ['b', 2, {'c': 3.5}]})
+        with self.swap(utils, '_YAML_SAFE_LOADER', yaml.SafeLoader):
+            self.assertEqual(
+                utils.dict_from_yaml(yaml_str), {'a': ['b', 2, {'c': 3.5}]})
+            with self.assertRaises(utils.InvalidInputException):
+                utils.dict_from_yaml('{')
+
     def test_recursively_remove_key(self):
         """Test recursively_remove_key method."""
         d = {'a': 'b'}
@@ -159,3 +170,97 @@ class UtilsTests(test_utils.GenericTestBase):
         self.assertEqual(p, 'foo')
         p = utils.vfs_normpath('/foo//bar//baz//')
         self.assertEqual(p, '/foo/bar/baz')
+
+
+class DictDeltaTests(test_utils.GenericTestBase):
+    """Test the computation and application of structural dict deltas."""
+
+    def test_delta_round_trip(self):
+        old_dict = {
+            'title': 'Old title',
+            'states': {
+                'A': {'content': 'a', 'handlers': [1, 2]},
+                'B': {'content': 'b'},
+            },
+            'removed': True,
+        }
+        new_dict = {
+            'title': 'New title',
+            'states': {
+                'A': {'content': 'a', 'handlers': [1, 2, 3]},
+                'C': {'content': 'c'},
+            },
+            'added': {'x': 1},
+        }
+
+        delta = utils.compute_dict_delta(old_dict, new_dict)
+        self.assertEqual(delta, {
+            'set': {'title': 'New title', 'added': {'x': 1}},
+            'delete': ['removed'],
+            'update': {
+                'states': {
+                    'set': {'C': {'content': 'c'}},
+                    'delete': ['B'],
+                    'update': {'A': {'set': {'handlers': [1, 2, 3]}}},
+                },
+            },
+        })
+        self.assertEqual(utils.apply_dict_delta(old_dict, delta), new_dict)
+        self.assertIn('B', old_dict['states'])
+
+        self.assertEqual(utils.compute_dict_delta(new_dict, new_dict), {})
+
+
+class LRUCacheTests(test_utils.GenericTestBase):
+    """Test the in-process LRU cache."""
+
+    def test_get_and_put(self):
+        cache = utils.LRUCache(3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', default=5), 5)
+
+        self.assertEqual(cache.put('a', 1), [])
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIn('a', cache)
+        self.assertEqual(len(cache), 1)
+
+        cache.put('a', 2)
+        self.assertEqual(cache.get('a'), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_eviction_by_number_of_entries(self):
+        cache = utils.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        # Accessing 'a' makes 'b' the least recently used entry.
+        cache.get('a')
+        self.assertEqual(cache.put('c', 3), ['b'])
+        self.assertEqual(sorted(cache.keys()), ['a', 'c'])
+
+    def test_eviction_by_size(self):
+        cache = utils.LRUCache(10, max_size_bytes=100)
+        cache.put('a', 'x', size_bytes=40)
+        cache.put('b', 'y', size_bytes=40)
+        self.assertEqual(cache.total_size_bytes, 80)
+
+        self.assertEqual(cache.put('c', 'z', size_bytes=40), ['a'])
+        self.assertEqual(cache.total_size_bytes, 80)
+
+        # Entries that are larger than the cache are not stored.
+        self.assertEqual(cache.put('d', 'w', size_bytes=101), ['d'])
+        self.assertNotIn('d', cache)
+        self.assertEqual(cache.total_size_bytes, 80)
+
+    def test_delete_and_clear(self):
+        cache = utils.LRUCache(5, max_size_bytes=100)
+        cache.put('a', 1, size_bytes=10)
+        cache.put('b', 2, size_bytes=20)
+
+        self.assertTrue(cache.delete('a'))
+        self.assertFalse(cache.delete('a'))
+        self.assertEqual(cache.total_size_bytes, 20)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.total_size_bytes, 0)
+